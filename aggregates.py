@@ -0,0 +1,185 @@
+"""
+Running totals per team and season that are updated with the games and
+shots of each refresh instead of being rebuilt from the full history.
+
+The state is a dictionary of tables. 'counts' holds the summed attempts,
+makes and distance of every shot bucket and the wins and losses of every
+(Year, Franchise). The other tables are derived from it: the shooting
+splits and win percentage of every team, the league averages, the edge
+case metric and the win correlations. When deltas are applied, only the
+seasons they touch are recomputed.
+"""
+import os
+import pandas as pd
+from shots import COUNT_COLUMNS, bucket_counts, shooting_splits
+from data_analysis import edge_cases_frame, correlations_frame, \
+    franchise_keys, load_playoff_outcomes
+
+AGGREGATES_PATH = 'Data/aggregates.pkl'
+
+COLUMNS = COUNT_COLUMNS + ['Wins', 'Losses']
+
+DERIVED = ['splits', 'league_averages', 'edge_cases', 'correlations']
+
+
+def empty_state():
+    """
+    Creates the state of a dataset without any games.
+    Args:
+        None.
+    Returns:
+        A dictionary of empty Pandas dataframes, see the module docstring.
+    """
+    index = pd.MultiIndex.from_tuples([], names=['Year', 'Franchise'])
+    state = {'counts': pd.DataFrame(columns=COLUMNS, index=index, dtype=float)}
+    state.update({name: None for name in DERIVED})
+    return state
+
+
+def load_state(path=AGGREGATES_PATH):
+    """
+    Loads the saved state.
+    Args:
+        path: A string representing the file the state was saved to.
+    Returns:
+        A dictionary as returned by empty_state, which is empty if nothing
+        was saved yet.
+    """
+    if not os.path.exists(path):
+        return empty_state()
+    return pd.read_pickle(path)
+
+
+def save_state(state, path=AGGREGATES_PATH):
+    """
+    Saves the state.
+    Args:
+        state: A dictionary as returned by apply_deltas.
+        path: A string representing the file to save the state to.
+    """
+    pd.to_pickle(state, f'{path}.tmp')
+    os.replace(f'{path}.tmp', path)
+
+
+def shot_deltas(shots):
+    """
+    Gets the deltas of some new shots.
+    Args:
+        shots: A Pandas data frame of shots, see shots.bucket_counts.
+    Returns:
+        A Pandas data frame indexed by (Year, Franchise) with the columns
+        in COUNT_COLUMNS.
+    """
+    return bucket_counts(shots)
+
+
+def game_deltas(games):
+    """
+    Gets the deltas of some new game results.
+    Args:
+        games: A Pandas data frame with one row per team and game, and
+        columns 'year', 'team' (any team name or abbreviation) and 'won'
+        (a boolean).
+    Returns:
+        A Pandas data frame indexed by (Year, Franchise) with columns
+        'Wins' and 'Losses'.
+    """
+    years = games['year'].astype('int64').rename('Year')
+    keys = [years, franchise_keys(games['team'].astype(str),
+        years).rename('Franchise')]
+    won = games['won'].astype(bool)
+    return pd.DataFrame({'Wins': won.astype(int), 'Losses': (~won).astype(int)},
+        index=games.index).groupby(keys).sum()
+
+
+def _replace_years(table, update, years):
+    """
+    Replaces the rows of some seasons of a derived table.
+    Args:
+        table: A Pandas dataframe with the season as first index level, or
+        None.
+        update: A Pandas dataframe with the new rows of those seasons.
+        years: A list of the seasons to replace, in the type of the index.
+    Returns:
+        A Pandas dataframe sorted by its index.
+    """
+    if table is None:
+        return update.sort_index()
+    kept = table[~table.index.get_level_values(0).isin(years)]
+    return pd.concat([kept, update]).sort_index()
+
+
+def refresh(state, years, outcomes=None, k=5):
+    """
+    Recomputes the derived tables of some seasons from the counts.
+    Args:
+        state: A dictionary as returned by empty_state or apply_deltas.
+        years: A list of ints of the seasons to recompute.
+        outcomes: An optional Pandas series of the playoffs outcomes, as
+        returned by data_analysis.load_playoff_outcomes, which it defaults
+        to.
+        k: An int representing how many of the top and bottom teams of
+        each stat count as edge cases.
+    Returns:
+        A new state dictionary where only the rows of these seasons changed.
+    """
+    outcomes = load_playoff_outcomes() if outcomes is None else outcomes
+    years = sorted({int(year) for year in years})
+    counts = state['counts']
+    rows = counts[counts.index.get_level_values('Year').isin(years)]
+
+    splits = shooting_splits(rows)
+    stats = list(splits.columns)
+    splits.insert(0, 'Win_Percent', rows['Wins'] / (rows['Wins'] + rows['Losses']))
+    league = shooting_splits(rows.groupby(level='Year').sum())
+    seasons = [str(year) for year in years]
+
+    state = dict(state)
+    state['splits'] = _replace_years(state['splits'], splits, years)
+    state['league_averages'] = _replace_years(state['league_averages'],
+        league, years)
+    state['edge_cases'] = _replace_years(state['edge_cases'],
+        edge_cases_frame(splits[stats], outcomes, k), seasons)
+    state['correlations'] = _replace_years(state['correlations'],
+        correlations_frame(splits.dropna(subset=['Win_Percent'])), seasons)
+    return state
+
+
+def apply_deltas(state, deltas, outcomes=None, k=5):
+    """
+    Adds new games or seasons to the running totals, and recomputes the
+    derived tables of the seasons they touch.
+    Args:
+        state: A dictionary as returned by empty_state, load_state or
+        apply_deltas.
+        deltas: A Pandas data frame indexed by (Year, Franchise) with any of
+        the columns in COLUMNS, as returned by shot_deltas or game_deltas.
+        outcomes: An optional Pandas series of the playoffs outcomes, see
+        refresh.
+        k: An int representing how many of the top and bottom teams of
+        each stat count as edge cases.
+    Returns:
+        A tuple of the new state dictionary and a sorted list of ints of the
+        seasons that were recomputed.
+    """
+    deltas = deltas.reindex(columns=COLUMNS, fill_value=0).astype(float)
+    counts = state['counts'].add(deltas, fill_value=0).sort_index()
+    years = sorted(set(deltas.index.get_level_values('Year')))
+    state = refresh(dict(state, counts=counts), years, outcomes, k)
+    return state, years
+
+
+def stat_summary(state, stat):
+    """
+    Pulls a single stat for every team over every season of the state.
+    Args:
+        state: A dictionary as returned by apply_deltas.
+        stat: A string of a column of the splits table.
+    Returns:
+        A Pandas dataframe where indices are franchise IDs and columns are
+        the seasons, like data_analysis.nba_stat_summary.
+    """
+    summary = state['splits'][stat].unstack('Year')
+    summary.columns = summary.columns.astype(str)
+    summary.columns.name = None
+    return summary
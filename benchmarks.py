@@ -0,0 +1,303 @@
+"""
+Benchmarks comparing the table extraction used by the scraper with the
+previous BeautifulSoup and pd.read_html path, and the pages and datasets
+used by the benchmark suite in test_benchmarks.py.
+
+Run with `python benchmarks.py`. The full suite runs with
+`python -m pytest test_benchmarks.py --benchmark-only --benchmark-autosave`
+(a plain pytest run skips it); add `--benchmark-compare
+--benchmark-compare-fail=mean:20%` to fail on a regression against the
+last saved run.
+"""
+import os
+import sys
+import time
+import subprocess
+import tracemalloc
+from itertools import groupby
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+from tables import extract_table
+
+
+def _header_cells(labels):
+    """
+    Builds the header cells of one header row, merging repeated labels into
+    a single cell with colspan like basketball-reference.com does.
+    Args:
+        labels: A list of strings with the label of every column.
+    Returns:
+        A string of <th> elements.
+    """
+    cells = []
+    for label, group in groupby(labels):
+        span = len(list(group))
+        text = '' if label.startswith('Unnamed:') else label
+        colspan = f' colspan="{span}"' if span > 1 else ''
+        cells.append(f'<th{colspan}>{text}</th>')
+    return ''.join(cells)
+
+
+def shooting_page(year, playoff, padding=0):
+    """
+    Builds a page holding a season's team shooting table, from the CSV
+    the scraper saved for it.
+    Args:
+        year: An int representing the year of data.
+        playoff: A boolean representing whether to use the playoffs table.
+        padding: An int representing the number of unrelated tables to
+        put before the shooting table, to get the size of a full page.
+    Returns:
+        The bytes of the page.
+    """
+    suffix = 'p' if playoff else ''
+    data = pd.read_csv(f'Data/season_shooting/{year}{suffix}.csv',
+        header=[0, 1, 2], index_col=0, dtype=str, keep_default_na=False)
+    head = ''.join(f'<tr>{_header_cells(list(level))}</tr>'
+        for level in zip(*data.columns))
+    rows = [f'<tr><th scope="row">{values[0]}</th>' +
+        ''.join(f'<td><a href="#">{value}</a></td>' if column == 1
+            else f'<td>{value}</td>' for column, value in enumerate(values[1:], 1)) +
+        '</tr>' for values in data.itertuples(index=False)]
+    filler = ''.join(f'<div id="filler_{i}"><table id="filler_{i}_table">' +
+        '<tr><td>x</td><td>1,000</td></tr>' * 50 + '</table></div>'
+        for i in range(padding))
+    return (f'<html><body>{filler}<div id="div_team_shooting">' +
+        '<table id="team_shooting" class="stats_table">' +
+        f'<thead>{head}</thead><tbody>{"".join(rows[:-1])}</tbody>' +
+        f'<tfoot>{rows[-1]}</tfoot></table></div></body></html>').encode()
+
+
+def _table_page(tables):
+    """
+    Builds a page holding some simple tables.
+    Args:
+        tables: A list of tuples of the table id, a list of header labels
+        and a list of rows, each a list of cell strings.
+    Returns:
+        The bytes of the page.
+    """
+    markup = []
+    for table_id, labels, rows in tables:
+        head = ''.join(f'<th>{label}</th>' for label in labels)
+        body = ''.join('<tr>' + ''.join(f'<td>{cell}</td>' for cell in row) +
+            '</tr>' for row in rows)
+        markup.append(f'<table id="{table_id}"><thead><tr>{head}</tr></thead>' +
+            f'<tbody>{body}</tbody></table>')
+    return f'<html><body>{"".join(markup)}</body></html>'.encode()
+
+
+def win_data_page(year):
+    """
+    Builds a season page holding the standings tables, from the CSV the
+    scraper saved for it. Before 2016 the teams are split into division
+    tables with a header row per division, like basketball-reference.com.
+    Args:
+        year: An int representing the year of data.
+    Returns:
+        The bytes of the page.
+    """
+    record = pd.read_csv(f'Data/win-loss/all_records_{year}.csv', index_col=0)
+    rows = [[team, wins, losses]
+        for team, (wins, losses) in zip(record.index, record.values)]
+    half = len(rows) // 2
+    conferences = {'E': rows[:half], 'W': rows[half:]}
+    if year >= 2016:
+        return _table_page([(f'confs_standings_{side}', ['Team', 'W', 'L'],
+            teams) for side, teams in conferences.items()])
+    tables = []
+    for side, teams in conferences.items():
+        division_rows = []
+        for start in range(0, len(teams), 5):
+            division_rows.append([f'Group {start // 5} Division', '', ''])
+            division_rows += teams[start:start + 5]
+        tables.append((f'divs_standings_{side}', ['Team', 'W', 'L'],
+            division_rows))
+    return _table_page(tables)
+
+
+def playoff_series_page(year):
+    """
+    Builds an expanded playoffs standings page, from the CSV the scraper
+    saved for it.
+    Args:
+        year: An int representing the year of data.
+    Returns:
+        The bytes of the page.
+    """
+    outcome = pd.read_csv(f'Data/playoffs_outcome/playoffs_{year}.csv',
+        index_col=0)
+    rows = [[rank, team, f'{series * 4 + 1}-{series + 3}']
+        for rank, (team, series) in enumerate(outcome.iloc[:, 0].items(), 1)]
+    return _table_page([('expanded_standings', ['Rk', 'Team', 'Overall'],
+        rows)])
+
+
+def efg_page(year):
+    """
+    Builds a miscellaneous stats page, from the eFG% the scraper saved for
+    the season.
+    Args:
+        year: An int representing the year of data.
+    Returns:
+        The bytes of the page.
+    """
+    efg = pd.read_csv('Data/efg/efg.csv', index_col=0)
+    values = efg.loc[efg['Year'] == year, 'eFG%']
+    labels = ['Rk', 'Team'] + [f'Stat {i}' for i in range(2, 17)] + ['eFG%']
+    rows = [[rank, f'Team {rank}'] + ['1.0'] * 15 + [value]
+        for rank, value in enumerate(values, 1)]
+    return _table_page([('misc_stats', labels, rows)])
+
+
+def large_table_page(rows, columns=12, seed=0):
+    """
+    Builds a page holding one play-by-play sized table of random numbers.
+    Args:
+        rows: An int representing the number of rows of the table.
+        columns: An int representing the number of columns of the table.
+        seed: An int seeding the random numbers.
+    Returns:
+        The bytes of the page.
+    """
+    values = np.random.default_rng(seed).random((rows, columns)).round(3)
+    return _table_page([('large', [f'Col {i}' for i in range(columns)],
+        values.astype(str).tolist())])
+
+
+def synthetic_data(root, seasons=100, seed=0):
+    """
+    Writes a scrapped data folder covering many seasons, by jittering the
+    stats of the last scrapped season, so the analysis can be measured on
+    more data than exists.
+    Args:
+        root: A string representing the folder to write 'Data' in.
+        seasons: An int representing the number of seasons, ending in 2020.
+        seed: An int seeding the random numbers.
+    Returns:
+        A list of ints with the years written.
+    """
+    rng = np.random.default_rng(seed)
+    templates = {playoff: pd.read_csv(
+        f'Data/season_shooting/2020{"p" if playoff else ""}.csv',
+        header=[0, 1, 2], index_col=0, dtype=str, keep_default_na=False)
+        for playoff in (False, True)}
+    for folder in ['season_shooting', 'playoffs_outcome', 'win-loss']:
+        os.makedirs(os.path.join(root, 'Data', folder), exist_ok=True)
+
+    years = list(range(2021 - seasons, 2021))
+    rounds = [4, 3, 2, 2, 1, 1, 1, 1] + [0] * 8
+    for year in years:
+        for playoff, template in templates.items():
+            season = template.copy()
+            stats = season.iloc[:, 2:].replace('', np.nan).astype(float)
+            stats *= rng.uniform(0.9, 1.1, stats.shape)
+            # Games and minutes played stay whole numbers, as in DATA_TYPES.
+            stats.iloc[:, :2] = stats.iloc[:, :2].round()
+            season.iloc[:, 2:] = stats.round(3).astype(str).replace('nan', '')
+            suffix = 'p' if playoff else ''
+            season.to_csv(os.path.join(root,
+                f'Data/season_shooting/{year}{suffix}.csv'))
+
+        playoff_teams = templates[True].iloc[:-1, 1].str.replace('*', '',
+            regex=False)
+        pd.DataFrame(rng.permutation(rounds), index=playoff_teams.values).to_csv(
+            os.path.join(root, f'Data/playoffs_outcome/playoffs_{year}.csv'))
+        teams = templates[False].iloc[:-1, 1].str.replace('*', '', regex=False)
+        wins = rng.integers(15, 68, len(teams))
+        pd.DataFrame({0: wins, 1: 82 - wins}, index=teams.values).to_csv(
+            os.path.join(root, f'Data/win-loss/all_records_{year}.csv'))
+    return years
+
+
+# Import time each module may add on top of pandas and NumPy, in seconds,
+# and the libraries they must only import when first used.
+IMPORT_BUDGETS = {'data_analysis': 0.15, 'graphs': 0.2, 'service': 0.25}
+
+LAZY_IMPORTS = ['scipy.stats', 'matplotlib', 'seaborn', 'plotly']
+
+
+def import_times(module):
+    """
+    Measures the import time of a module in a fresh interpreter with
+    `python -X importtime`.
+    Args:
+        module: A string with the name of the module to import.
+    Returns:
+        A dictionary where keys are the names of every module imported and
+        values are their cumulative import time in seconds.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+        f'import {module}'], capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)))
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def legacy_extract(content, table_id=None):
+    """
+    Gets one table from a page the way the scraper used to: a full
+    BeautifulSoup tree, then pd.read_html on the table's markup.
+    Args:
+        content: The bytes of the page.
+        table_id: An optional string with the id of the table to get.
+    Returns:
+        A Pandas data frame with the table.
+    """
+    soup = BeautifulSoup(content, 'html.parser')
+    attrs = {'id': table_id} if table_id else {}
+    return pd.read_html(str(soup.find('table', attrs=attrs)))[0]
+
+
+def measure(function, pages, table_id=None):
+    """
+    Measures the time and peak memory of extracting a table from pages.
+    Args:
+        function: A function taking the page content and the table id.
+        pages: A list of page contents.
+        table_id: An optional string with the id of the table to get.
+    Returns:
+        A tuple of the seconds per page and the peak traced memory in bytes.
+    """
+    start = time.perf_counter()
+    for content in pages:
+        function(content, table_id)
+    seconds = (time.perf_counter() - start) / len(pages)
+
+    tracemalloc.start()
+    function(pages[0], table_id)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def bench_table_extraction(padding=200, repeat=3):
+    """
+    Compares extract_table with the legacy path on every shooting table.
+    Args:
+        padding: An int representing the number of unrelated tables on
+        each page.
+        repeat: An int representing the number of passes over the pages.
+    Returns:
+        A Pandas data frame with the time per page and peak memory of both
+        paths.
+    """
+    pages = [shooting_page(year, playoff, padding)
+        for year in range(2010, 2021) for playoff in (False, True)] * repeat
+    results = {}
+    for name, function in [('legacy', legacy_extract),
+        ('extract_table', extract_table)]:
+        seconds, peak = measure(function, pages, 'team_shooting')
+        results[name] = {'ms_per_page': seconds * 1000,
+            'peak_mb': peak / 2 ** 20}
+    return pd.DataFrame(results).T
+
+
+if __name__ == '__main__':
+    print(bench_table_extraction())
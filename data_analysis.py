@@ -2,13 +2,13 @@
 Functions to analyse and select data from scrapped files.
 """
 import os
-import operator
-import statistics
+import functools
 import pandas as pd
 import numpy as np
+from season_cache import cached_frame
+from franchises import franchise_id
+from instrument import instrumented, count
 
-pd.options.mode.chained_assignment = None
-pd.set_option('display.max_colwidth', 0)
 
 DATA_NAMES = {
     'Rank': 'Rank of Team',
@@ -31,8 +31,29 @@ DATA_NAMES = {
     'Field_Goals_3P': 'Percent of Field Goals that were 3 Points'
 }
 
-YEARS_LIST = ['2010','2011','2012','2013','2014', \
-    '2015','2016','2017','2018','2019','2020', ]
+STAT_NAMES = list(DATA_NAMES.keys())[2:]
+
+DATA_TYPES = dict({
+    'Rank': 'int8',
+    'Team': 'category',
+    'Games_Played': 'int16',
+    'Minutes_Played': 'int32',
+}, **{stat: 'float32' for stat in STAT_NAMES[2:]})
+
+LEAGUE_AVERAGE_TYPES = {stat: 'float32' for stat in STAT_NAMES}
+
+SEASON_SHOOTING_DIR = 'Data/season_shooting'
+
+PLAYOFFS_OUTCOME_DIR = 'Data/playoffs_outcome'
+
+WIN_LOSS_DIR = 'Data/win-loss'
+
+LEAGUE_AVERAGE = 'League Average'
+
+# Version of the cleaning done by read_season_csv, stored with the cached
+# seasons. Change it with the cleaning so caches written before are rebuilt.
+CLEAN_VERSION = '2'
+
 
 def get_file_names():
     """
@@ -42,10 +63,7 @@ def get_file_names():
     Returns:
         List of strings containing all the names of the files.
     """
-    owd = os.getcwd()
-    names = os.listdir(os.chdir('Data/season_shooting'))
-    os.chdir(owd)
-    return names
+    return os.listdir(SEASON_SHOOTING_DIR)
 
 
 def get_season_clean_csv(data_set):
@@ -64,10 +82,417 @@ def get_season_clean_csv(data_set):
 
     data_set.columns = readable_column_headers
     data_set = data_set.drop(columns = ['nan'])
-    data_set.loc[:,'Rank'] = list(np.zeros(data_set.shape[0]))
+    data_set.loc[:,'Rank'] = 0
+    return data_set
+
+
+def season_file_path(year, playoff):
+    """
+    Gets the path of a scrapped season file.
+    Args:
+        year: An int representing the year of data.
+        playoff: A boolean representing whether to get the playoff or regular
+        season file.
+    Returns:
+        A string with the path of the CSV file.
+    """
+    suffix = 'p' if playoff else ''
+    return f"{SEASON_SHOOTING_DIR}/{year}{suffix}.csv"
+
+
+@instrumented('analysis')
+def read_season_csv(year, playoff):
+    """
+    Reads and cleans a single scrapped season file, including its league
+    average row.
+    Args:
+        year: An int representing the year of data to read.
+        playoff: A boolean representing whether to read playoff or regular
+        season data.
+    Returns:
+        A cleaned-up Pandas data frame where the Team column has no
+        playoff asterisk and every stat column is numeric.
+    """
+    data_set = pd.read_csv(season_file_path(year, playoff))
+    data_set.columns = data_set.iloc[1]
+    data_set = get_season_clean_csv(data_set[2:])
+    data_set['Team'] = data_set['Team'].str.replace("*","", regex=False)
+    data_set[STAT_NAMES] = data_set[STAT_NAMES].astype(float)
+    count('rows', data_set.shape[0])
+    return data_set.drop(columns = ['Rank'])
+
+
+@instrumented('analysis')
+def load_season(year, playoff, columns=None):
+    """
+    Gets a cleaned season from the on-disk cache, re-reading the scrapped
+    CSV only when it changed since the cache was written.
+    Args:
+        year: An int representing the year of data to read.
+        playoff: A boolean representing whether to read playoff or regular
+        season data.
+        columns: An optional list of the columns to read, every column by
+        default.
+    Returns:
+        A cleaned-up Pandas data frame, as returned by read_season_csv.
+    """
+    return cached_frame(season_file_path(year, playoff),
+        lambda: read_season_csv(year, playoff), columns,
+        version=CLEAN_VERSION)
+
+
+def season_partitions():
+    """
+    Lists the scrapped season files without reading them.
+    Args:
+        None.
+    Returns:
+        A sorted list of (year, playoff) tuples of an int and a boolean.
+    """
+    partitions = []
+    for file_name in get_file_names():
+        name = file_name[:-4]
+        partitions.append((int(name.rstrip('p')), name.endswith('p')))
+    return sorted(partitions)
+
+
+def _read_seasons(partitions, columns=None):
+    """
+    Reads and stacks some season files.
+    Args:
+        partitions: A list of (year, playoff) tuples of the files to read.
+        columns: An optional list of the stats to read, every stat by
+        default. 'Team' is always read.
+    Returns:
+        A Pandas dataframe indexed by (Year, Playoff, Franchise), including
+        the league average rows, with float64 stats.
+    """
+    columns = None if columns is None else ['Team'] + list(columns)
+    seasons = []
+    for year, playoff in partitions:
+        season = load_season(year, playoff, columns)
+        season.insert(0, 'Playoff', playoff)
+        season.insert(0, 'Year', year)
+        seasons.append(season)
+    if not seasons:
+        seasons = [pd.DataFrame(columns=['Year', 'Playoff'] +
+            (columns or ['Team'] + STAT_NAMES))]
+
+    seasons = pd.concat(seasons, ignore_index=True)
+    seasons.insert(2, 'Franchise', franchise_keys(seasons['Team'].astype(str),
+        seasons['Year']))
+    seasons = seasons.set_index(['Year', 'Playoff', 'Franchise'])
+    return seasons.sort_index(level=['Year', 'Playoff'], sort_remaining=False)
+
+
+def franchise_keys(teams, years=None):
+    """
+    Gets the franchise ID of every team name in a column.
+    Args:
+        teams: A Pandas series of team names.
+        years: An optional int with the season of every team, or a Pandas
+        series with the season of each row, so that names used by two
+        franchises (see franchises.SHARED_NAMES) get the right ID.
+    Returns:
+        A Pandas series of franchise IDs, where the league average row keeps
+        LEAGUE_AVERAGE as its key.
+    """
+    def key(team, year):
+        return team if team == LEAGUE_AVERAGE else franchise_id(team, year)
+
+    if years is None or np.ndim(years) == 0:
+        return teams.map({team: key(team, years) for team in teams.unique()})
+    pairs = pd.MultiIndex.from_arrays([teams, years])
+    unique = pairs.unique()
+    keys = pd.Series([key(team, year) for team, year in unique], index=unique)
+    return pd.Series(keys.reindex(pairs).to_numpy(), index=teams.index,
+        name=teams.name)
+
+
+def apply_schema(frame, types=None):
+    """
+    Casts the columns of a data frame to their declared types.
+    Args:
+        frame: A Pandas dataframe with some of the columns in DATA_NAMES.
+        types: An optional dictionary of column names to dtypes, DATA_TYPES
+        by default. Columns missing from frame are skipped.
+    Returns:
+        A Pandas dataframe with the declared dtypes.
+    Raises:
+        ValueError if a column declared as an integer holds fractions.
+    """
+    types = DATA_TYPES if types is None else types
+    types = {column: dtype for column, dtype in types.items()
+        if column in frame.columns}
+    for column, dtype in types.items():
+        if dtype.startswith('int') and (frame[column] % 1 != 0).any():
+            raise ValueError(f'{column} holds fractions, it cannot be {dtype}')
+    return frame.astype(types)
+
+
+@functools.lru_cache(maxsize=None)
+@instrumented('analysis')
+def _load_season_tables():
+    """
+    Loads and cleans every scrapped season file (regular season and
+    playoffs) once, and splits the teams from the league averages.
+    Args:
+        None.
+    Returns:
+        A tuple of the season store and the league averages, see
+        load_season_store and load_league_averages.
+    """
+    seasons = _read_seasons(season_partitions())
+    is_average = seasons.index.get_level_values('Franchise') == LEAGUE_AVERAGE
+    store = apply_schema(seasons[~is_average])
+    averages = seasons[is_average].droplevel('Franchise')[STAT_NAMES]
+    return store, apply_schema(averages, LEAGUE_AVERAGE_TYPES)
+
+
+def load_season_store():
+    """
+    Loads and cleans every scrapped season file (regular season and
+    playoffs) once, and keeps the result in memory.
+    Args:
+        None.
+    Returns:
+        A Pandas dataframe in long format indexed by (Year, Playoff,
+        Franchise), with the team name as it was that season in the 'Team'
+        column and one column per stat in DATA_NAMES, typed as declared in
+        DATA_TYPES. League averages are kept apart, see
+        load_league_averages.
+    Call clear_caches() after re-running the scraper to pick up the new
+    files.
+    """
+    return _load_season_tables()[0]
+
+
+def _season_rows(year, playoff):
+    """
+    Looks up the rows for a single season in the season store.
+    Args:
+        year: An int or string representing the year of data.
+        playoff: A boolean representing whether to pull playoff or regular
+        season data.
+    Returns:
+        A Pandas dataframe indexed by franchise ID.
+    """
+    return load_season_store().loc[(int(year), bool(playoff))]
+
+
+class SeasonQuery:
+    """
+    A lazy selection of seasons, season types, teams and stats of the
+    season store, built by chaining filters:
+
+        query().seasons(2014, 2020).teams('HOU').stats(['Field_Goals_3P'])
+
+    Nothing is read until collect() is called. If the season store is not
+    in memory, only the files of the selected seasons and season types and
+    the selected columns of their Feather cache are read. Otherwise the
+    store is filtered without touching the disk.
+    """
+
+    def __init__(self, years=None, playoff=None, franchises=None,
+        columns=None):
+        """
+        Creates a query, see query.
+        Args:
+            years: An optional frozenset of ints of the seasons to keep.
+            playoff: An optional boolean of the season type to keep.
+            franchises: An optional frozenset of the franchise IDs to keep.
+            columns: An optional list of the stats to keep.
+        """
+        self._years = years
+        self._playoff = playoff
+        self._franchises = franchises
+        self._columns = columns
+
+    def _replace(self, **filters):
+        """
+        Copies the query with some filters changed.
+        Args:
+            filters: Keyword arguments of __init__.
+        Returns:
+            A new SeasonQuery.
+        """
+        return SeasonQuery(**dict({'years': self._years,
+            'playoff': self._playoff, 'franchises': self._franchises,
+            'columns': self._columns}, **filters))
+
+    def seasons(self, first, last=None):
+        """
+        Keeps some seasons.
+        Args:
+            first: An int of the first season to keep, or a list of ints of
+            the seasons to keep.
+            last: An optional int of the last season to keep, first if None.
+        Returns:
+            A new SeasonQuery.
+        """
+        if isinstance(first, (int, np.integer, str)):
+            years = range(int(first), int(first if last is None else last) + 1)
+        else:
+            years = [int(year) for year in first]
+        return self._replace(years=frozenset(years))
+
+    def playoff(self, playoff=True):
+        """
+        Keeps one season type.
+        Args:
+            playoff: A boolean, True for the playoffs and False for the
+            regular season, or None to keep both.
+        Returns:
+            A new SeasonQuery.
+        """
+        return self._replace(playoff=None if playoff is None else bool(playoff))
+
+    def teams(self, *teams):
+        """
+        Keeps some teams.
+        Args:
+            teams: Names (current or historical), abbreviations or franchise
+            IDs of the teams to keep, or one list of them.
+        Returns:
+            A new SeasonQuery.
+        """
+        if len(teams) == 1 and not isinstance(teams[0], str):
+            teams = teams[0]
+        return self._replace(franchises=frozenset(franchise_id(team)
+            for team in teams))
+
+    def stats(self, stats):
+        """
+        Keeps some stats.
+        Args:
+            stats: A list of strings of stats in DATA_NAMES.
+        Returns:
+            A new SeasonQuery.
+        """
+        return self._replace(columns=list(stats))
+
+    def partitions(self):
+        """
+        Lists the season files the query needs.
+        Returns:
+            A list of (year, playoff) tuples, see season_partitions.
+        """
+        return [(year, playoff) for year, playoff in season_partitions()
+            if (self._years is None or year in self._years) and
+            (self._playoff is None or playoff == self._playoff)]
+
+    @instrumented('analysis')
+    def collect(self):
+        """
+        Runs the query.
+        Returns:
+            A Pandas dataframe like load_season_store, with the rows and
+            columns selected.
+        """
+        columns = ['Team'] + (STAT_NAMES if self._columns is None
+            else self._columns)
+        # A loaded store is filtered in memory instead of read again.
+        if _load_season_tables.cache_info().currsize:
+            seasons = load_season_store()
+            keep = np.ones(seasons.shape[0], dtype=bool)
+            for level, values in [('Year', self._years),
+                ('Playoff', None if self._playoff is None else {self._playoff}),
+                ('Franchise', self._franchises)]:
+                if values is not None:
+                    keep &= seasons.index.get_level_values(level).isin(values)
+            seasons = seasons.loc[keep, columns]
+            seasons['Team'] = seasons['Team'].cat.remove_unused_categories()
+            return seasons
+
+        seasons = _read_seasons(self.partitions(), self._columns)
+        franchises = seasons.index.get_level_values('Franchise')
+        keep = franchises != LEAGUE_AVERAGE
+        if self._franchises is not None:
+            keep &= franchises.isin(self._franchises)
+        return apply_schema(seasons.loc[keep, columns])
+
+
+def query(load=False):
+    """
+    Starts a query of every season, season type, team and stat, see
+    SeasonQuery.
+    Args:
+        load: A boolean representing whether to load the whole season store
+        in memory first, so that the query and every later one are filtered
+        from it. Analyses that use most of the store load it, one-off
+        queries only read the files they need.
+    Returns:
+        A SeasonQuery.
+    """
+    if load:
+        load_season_store()
+    return SeasonQuery()
+
+
+@instrumented('analysis')
+def team_stats(stats=None, playoff=False, years=None):
+    """
+    Gets some stats of every team for one season type.
+    Args:
+        stats: An optional list of strings of the stats, every stat in
+        DATA_NAMES by default.
+        playoff: A boolean representing whether to get playoff or regular
+        season stats.
+        years: An optional list of ints of the seasons to get, every
+        scrapped season by default.
+    Returns:
+        A Pandas dataframe indexed by (Year, Franchise) with one column per
+        stat.
+    """
+    seasons = query(load=True).playoff(playoff)
+    if stats is not None:
+        seasons = seasons.stats(stats)
+    if years is not None:
+        seasons = seasons.seasons(years)
+    return seasons.collect().drop(columns=['Team']).droplevel('Playoff')
+
+
+def scrapped_years():
+    """
+    Gets the years of every scrapped season.
+    Args:
+        None.
+    Returns:
+        A sorted list of strings of the years, like '2010'.
+    """
+    return sorted({str(year) for year, _ in season_partitions()})
+
+
+def __getattr__(name):
+    """
+    Gets YEARS_LIST, the list of scrapped years, from the scrapped data
+    when it is first used instead of when the module is imported.
+    Args:
+        name: A string with the name of the module attribute.
+    Returns:
+        A list of strings as returned by scrapped_years.
+    Raises:
+        AttributeError for any other name.
+    """
+    if name == 'YEARS_LIST':
+        return scrapped_years()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _as_season_frame(rows):
+    """
+    Converts season store rows back to the layout of a cleaned season file.
+    Args:
+        rows: A Pandas dataframe indexed by franchise ID.
+    Returns:
+        A Pandas dataframe with the columns listed in DATA_NAMES.
+    """
+    data_set = rows.reset_index(drop=True)
+    data_set.insert(0, 'Rank', np.zeros(data_set.shape[0], DATA_TYPES['Rank']))
     return data_set
 
 
+@instrumented('analysis')
 def season_full_data(year, playoff):
     """
     Gets the full data for any season in the scrapped data.
@@ -78,17 +503,23 @@ def season_full_data(year, playoff):
     Returns:
         A cleaned-up Pandas data frame with full-season data.
     """
-    if playoff:
-        data_set = pd.read_csv(f"Data/season_shooting/{year}p.csv")
-    else:
-        data_set = pd.read_csv(f"Data/season_shooting/{year}.csv")
-    data_set.columns = data_set.iloc[1]
-    data_set = data_set[2:-1]
-    data_set['Team'] = data_set['Team'].str.replace("*","", regex=False)
+    return _as_season_frame(_season_rows(year, playoff))
+
 
-    return get_season_clean_csv(data_set)
+def load_league_averages():
+    """
+    Gets the league average of every stat, season and season type once.
+    Args:
+        None.
+    Returns:
+        A Pandas dataframe indexed by (Year, Playoff) with one column per
+        stat in STAT_NAMES, typed as declared in LEAGUE_AVERAGE_TYPES.
+    Call clear_caches() after re-running the scraper.
+    """
+    return _load_season_tables()[1]
 
 
+@instrumented('analysis')
 def season_summary(year, playoff):
     """
     Get season summary stats for each year.
@@ -101,17 +532,12 @@ def season_summary(year, playoff):
     This stat will be the league average of each stat listed in DATA_NAMES
     for all teams.
     """
-    if playoff:
-        data_set = pd.read_csv(f"Data/season_shooting/{year}p.csv")
-    else:
-        data_set = pd.read_csv(f"Data/season_shooting/{year}.csv")
-    data_set.columns = data_set.iloc[1]
-    data_set = data_set[-1:]
-    data_set['Team'] = data_set['Team'].str.replace("*","", regex=False)
-
-    return get_season_clean_csv(data_set)
+    summary = load_league_averages().loc[[(int(year), bool(playoff))]]
+    summary.insert(0, 'Team', LEAGUE_AVERAGE)
+    return _as_season_frame(summary)
 
 
+@instrumented('analysis')
 def nba_stat_summary(stat_nba, playoff):
     """
     Pulls data for a single stat for every team over the scrapped data.
@@ -120,98 +546,183 @@ def nba_stat_summary(stat_nba, playoff):
         playoff: A boolean representing whether to pull playoff data or
         regular season.
     Returns:
-        A Pandas dataframe where indices represent different teams and
-        column header represents the season.
+        A Pandas dataframe where indices represent different teams (by
+        franchise ID) and column header represents the season. Teams that
+        did not play in a season have no value for it.
     """
-    stat_summary_df = pd.DataFrame(columns=YEARS_LIST)
+    seasons = query(load=True).playoff(playoff).stats([stat_nba]).collect()
+    stat_summary_df = seasons[stat_nba].droplevel('Playoff').unstack('Year')
+    stat_summary_df.columns = stat_summary_df.columns.astype(str)
+    stat_summary_df.columns.name = None
+
+    return stat_summary_df.reindex(columns=scrapped_years())
 
-    for years in YEARS_LIST:
-        season_full =  season_full_data(years, playoff)
-        stat_summary_df[years] = pd.to_numeric(season_full[stat_nba])
 
-    return stat_summary_df
+@functools.lru_cache(maxsize=256)
+def _team_summary(franchise, playoff):
+    """
+    Gets the seasons of one franchise.
+    Args:
+        franchise: A string with a franchise ID.
+        playoff: A boolean to keep only the playoffs (True) or the regular
+        season (False), or None to keep both.
+    Returns:
+        A Pandas dataframe shared by every caller, which must not be
+        modified, see team_summary.
+    """
+    seasons = query().teams(franchise).playoff(playoff).collect()
+    seasons = seasons.drop(columns=['Team'])
+    seasons.insert(0, 'Rank', np.zeros(seasons.shape[0], DATA_TYPES['Rank']))
+    years = seasons.index.get_level_values('Year').astype(str)
+    playoffs = np.where(seasons.index.get_level_values('Playoff'), 'p', '')
+    seasons.index = (years + playoffs).rename(None)
+    return seasons
 
 
-def team_summary(team):
+@instrumented('analysis')
+def team_summary(team, playoff=None):
     """
-    Get team summary stats for each year from the scrapped CSV.
+    Get team summary stats for each season from the scrapped CSV.
     Args:
-        team: A string representing the name of the team to pull data for.
+        team: A string representing the name (current or historical) or
+        abbreviation of the team to pull data for.
+        playoff: An optional boolean to keep only the playoffs (True) or
+        the regular season (False). Both are kept if it is None.
     Returns:
         A Pandas dataframe containing the team summary from
-        scarpped CSV.
+        scarpped CSV, indexed by season name ('2010' for the regular
+        season, '2010p' for the playoffs).
     Team summary stats include yearly averages for all stats listed in
-    DATA_NAMES.
+    DATA_NAMES, over every season of the franchise.
     """
-    file_names = sorted(get_file_names())
-    team_summary_full = pd.DataFrame(columns = list(DATA_NAMES.keys()),
-        index = file_names)
+    return _team_summary(franchise_id(team), playoff).copy()
+
 
-    for files in file_names:
-        if 'p' in files:
-            continue
-        data_set = season_full_data(files[:-4], False)
-        if team in data_set.Team.values:
-            data_set.set_index("Team", inplace=True)
-            data_set.head()
-            team_summary_full.loc[files] = data_set.loc[team]
+@functools.lru_cache(maxsize=None)
+@instrumented('analysis')
+def load_playoff_outcomes():
+    """
+    Loads the playoffs outcome of every scrapped season once.
+    Args:
+        None.
+    Returns:
+        A Pandas series indexed by (Year, Franchise) where values are the
+        number of playoffs series' won by teams that made the playoffs.
+    Call clear_caches() after re-running the scraper.
+    """
+    outcomes = {}
+    for file_name in sorted(os.listdir(PLAYOFFS_OUTCOME_DIR)):
+        year = int(file_name[len('playoffs_'):-4])
+        outcome = pd.read_csv(f"{PLAYOFFS_OUTCOME_DIR}/{file_name}")
+        outcomes[year] = pd.Series(outcome.iloc[:,1].values,
+            index=franchise_keys(outcome.iloc[:,0], year).values)
+    return pd.concat(outcomes, names=['Year', 'Franchise'])
 
-    team_summary_full.pop("Team")
-    team_summary_full.index = team_summary_full.index.str.replace('.csv'
-        ,'', regex=True)
 
-    return team_summary_full.dropna()
+@instrumented('analysis')
+def edge_cases_matrix(stats=None, k=5, playoff=False):
+    """
+    Calculates the edge metric of many stats for every season at once.
 
+    Args:
+        stats: An optional list of strings of the stats to rank teams by,
+        every stat in DATA_NAMES by default.
+        k: An int representing how many of the top and bottom teams of
+        each stat count as edge cases.
+        playoff: A boolean representing whether to rank teams by playoff or
+        regular season data.
+    Returns:
+        A Pandas data frame indexed by season, with two column levels: the
+        measure ('Edge Case Metric' or 'All Edge Cases') and the stat.
+    1 Point is added to the "edge" metric during a season if a team that is
+    top k in a stat makes the playoffs.
+    1 point is subtracted if a team that is bottom k in a stat makes the
+    playoffs. Ties are ranked in the order teams appear in the scrapped data.
+    """
+    return edge_cases_frame(team_stats(stats, playoff), load_playoff_outcomes(), k)
 
+
+@instrumented('analysis')
+def edge_cases_frame(teams, outcomes, k=5):
+    """
+    Calculates the edge metric of every column of a table of team stats.
+    Args:
+        teams: A Pandas dataframe indexed by (Year, Franchise) with one
+        column per stat, and no league average rows.
+        outcomes: A Pandas series indexed by (Year, Franchise) of the teams
+        that made the playoffs, as returned by load_playoff_outcomes.
+        k: An int representing how many of the top and bottom teams of
+        each stat count as edge cases.
+    Returns:
+        A Pandas data frame as returned by edge_cases_matrix, for the
+        seasons of teams that have playoffs outcomes.
+    """
+    stats = list(teams.columns)
+    teams = teams[teams.index.get_level_values('Year').isin(
+        outcomes.index.get_level_values('Year'))]
+    by_year = teams.groupby(level='Year', sort=True)
+    ranks = by_year.rank(method='first').to_numpy()
+    sizes = by_year[stats[0]].transform('size').to_numpy()[:, np.newaxis]
+    made_playoffs = teams.index.isin(outcomes.index)[:, np.newaxis]
+
+    top = (ranks > sizes - k) & made_playoffs
+    bottom = (ranks <= k) & made_playoffs
+    years = teams.index.get_level_values('Year')
+    metric = pd.DataFrame(top.astype(int) - bottom, index=years,
+        columns=stats).groupby(level='Year').sum()
+    total = pd.DataFrame(top.astype(int) + bottom, index=years,
+        columns=stats).groupby(level='Year').sum()
+
+    edge_data = pd.concat({'Edge Case Metric': metric,
+        'All Edge Cases': total}, axis=1)
+    edge_data.index = edge_data.index.astype(str).rename('Season')
+    return edge_data
+
+
+@instrumented('analysis')
 def edge_cases_metric(stat):
     """
     Calculates the edge metric for each season.
 
     Args:
-        None.
+        stat: A string of the nba stat to rank teams by.
     Returns:
-        A dictionary where key is an int representing the year and the
-    value is the number of edge-cases during that year.
+        A Pandas data frame with a row per season, and columns 'Season',
+        'Edge Case Metric' and 'All Edge Cases'.
     1 Point is added to the "edge" metric during a season if a team that is
     top 5 in 3PA makes the playoffs.
     1 point is subtracted if a team that is bottom 5 in 3PA makes the playoffs.
     """
-    edges = []
-    metrics = []
-    nums_total = []
-    edge_data = pd.DataFrame()
-    for i in range(10,21):
-        data = season_full_data(f"20{i}", False)
-        playoffs = list(pd.read_csv(f'Data/playoffs_outcome/playoffs_20{i}.csv').iloc[:,0])
-        percents = dict(zip(data['Team'].str.replace("*","", regex=False),data[stat]))
-
-        for j in range(0, len(percents)):
-            percents[list(percents.keys())[j]] = float(percents[list(percents.keys())[j]])
-
-        percents = sorted(percents.items(), key=operator.itemgetter(1))
-        bottom_five = percents[0:5]
-        top_five = percents[-5:-1]
-
-        top_five.append(percents[len(percents)-1])
-        #return top_five, bottom_five, sorted_percents, playoffs
-        metric = 0
-        num_total = 0
-        for k in range(0,5):
-            if bottom_five[k][0] in playoffs:
-                metric -= 1
-                num_total += 1
-            if top_five[k][0] in playoffs:
-                metric += 1
-                num_total += 1
-        edges.append(f"20{i}")
-        metrics.append(metric)
-        nums_total.append(num_total)
-    edge_data['Season'] = edges
-    edge_data['Edge Case Metric'] = metrics
-    edge_data['All Edge Cases'] = nums_total
-    return edge_data
+    edge_data = edge_cases_matrix([stat]).xs(stat, axis=1, level=1)
+    edge_data.columns.name = None
+    return edge_data.reset_index()
 
 
+@instrumented('analysis')
+def playoff_round_stats(stats=None, playoff=False, years=None):
+    """
+    Averages stats by playoffs outcome, for every season at once.
+    Args:
+        stats: An optional list of strings of the stats to average, every
+        stat in DATA_NAMES by default.
+        playoff: A boolean representing whether to average the playoffs or
+        regular season stats of the teams.
+        years: An optional list of ints of the seasons to average, every
+        scrapped season by default.
+    Returns:
+        A Pandas dataframe indexed by (Year, Round), where Round is the number
+        of playoffs series' won, with the mean of every stat over the teams
+        of that season and outcome.
+    """
+    outcomes = load_playoff_outcomes().rename('Round')
+    if years is not None:
+        outcomes = outcomes.loc[[int(year) for year in years]]
+    joined = team_stats(stats, playoff, years).join(outcomes, how='inner')
+    return joined.groupby([joined.index.get_level_values('Year'),
+        'Round']).mean()
+
+
+@instrumented('analysis')
 def playoff_round_3p(year, playoff):
     """
     Compares playoffs outcome to % of shots attempted
@@ -225,37 +736,199 @@ def playoff_round_3p(year, playoff):
         won and the key is a list where the 0th element is %3PA and the 1st is
         %3PM
     """
-    playoffs = pd.read_csv(f"Data/playoffs_outcome/playoffs_{year}.csv")
-    dic_playoff = dict(zip(playoffs.iloc[:,0],playoffs.iloc[:,1]))
-    # Accounting forhanges in team names
-    if 'New Jersey Nets' in dic_playoff:
-        dic_playoff['Brooklyn Nets'] = dic_playoff.pop('New Jersey Nets')
-    if 'Charlotte Bobcats' in dic_playoff:
-        dic_playoff['Charlotte Hornets'] = dic_playoff.pop('Charlotte Bobcats')
-    if 'New Orleans Hornets' in dic_playoff:
-        dic_playoff['New Orleans Pelicans'] = dic_playoff.pop('New Orleans Hornets')
-
-    season_data = season_full_data(year, playoff)
-    playoff_data = {}
-
-    for i in range(season_data.shape[0]):
-        name = season_data.iloc[i,1]
-        if name not in list(dic_playoff.keys()):
-            continue
-        if dic_playoff[name] in playoff_data:
-            playoff_data[dic_playoff[name]][0].append(float(season_data.iloc[i,11]))
-            playoff_data[dic_playoff[name]][1].append(float(season_data.iloc[i,17]))
-        else:
-            playoff_data[dic_playoff[name]] = [[float(season_data.iloc[i,11])],
-            [float(season_data.iloc[i,17])]]
+    means = playoff_round_stats(['Field_Goals_Attempted_3PA', 'Field_Goals_3P'],
+        playoff, [year]).loc[int(year)]
+    return {int(rounds): values.tolist() for rounds, values in
+        zip(means.index, means.to_numpy())}
+
+
+@functools.lru_cache(maxsize=None)
+@instrumented('analysis')
+def load_win_records():
+    """
+    Loads the win/loss record of every scrapped season once.
+    Args:
+        None.
+    Returns:
+        A Pandas dataframe indexed by (Year, Franchise) with columns 'Team',
+        'Wins', 'Losses' and 'Win_Percent'.
+    Call clear_caches() after re-running the scraper.
+    """
+    records = {}
+    for file_name in sorted(os.listdir(WIN_LOSS_DIR)):
+        year = int(file_name[len('all_records_'):-4])
+        record = pd.read_csv(f"{WIN_LOSS_DIR}/{file_name}")
+        record.columns = ['Team', 'Wins', 'Losses']
+        records[year] = record.set_index(franchise_keys(record['Team'], year))
+    records = pd.concat(records, names=['Year', 'Franchise'])
+    records['Win_Percent'] = records['Wins'] / \
+        (records['Wins'] + records['Losses'])
+    return records
+
+
+@instrumented('analysis')
+def win_stat_frame(stats, playoff=False, years=None):
+    """
+    Joins each team's regular season win percentage with its stats.
+    Args:
+        stats: A list of strings of the stats to join.
+        playoff: A boolean representing whether to join playoff or regular
+        season stats.
+        years: An optional list of ints of the years to join, every
+        scrapped year by default. Only the rows of these years are joined.
+    Returns:
+        A Pandas dataframe indexed by (Year, Franchise) with a
+        'Win_Percent' column followed by the stats, for every team that
+        has both.
+    """
+    wins = load_win_records()[['Win_Percent']]
+    if years is not None:
+        wins = wins.loc[[int(year) for year in years]]
+    return wins.join(team_stats(stats, playoff, years), how='inner')
+
+
+@instrumented('analysis')
+def win_stat_pairs(pairs, playoff=False):
+    """
+    Gets the win percentage and stat of every team for many (season, stat)
+    pairs with a single join.
+    Args:
+        pairs: A list of tuples of an int year and a string stat.
+        playoff: A boolean representing whether to use playoff or regular
+        season stats.
+    Returns:
+        A Pandas dataframe indexed by (Year, Stat, Franchise) with columns
+        'Win_Percent' and 'Value', holding the rows of the requested pairs
+        in the order they were requested.
+    """
+    pairs = [(int(year), stat) for year, stat in pairs]
+    stats = list(dict.fromkeys(stat for _, stat in pairs))
+    frame = win_stat_frame(stats, playoff, sorted({year for year, _ in pairs}))
+    year_rows = frame.groupby(level='Year').indices
+    rows = [year_rows.get(year, np.array([], dtype=int)) for year, _ in pairs]
+    lengths = [len(positions) for positions in rows]
+    rows = np.concatenate(rows)
+    columns = np.repeat([stats.index(stat) for _, stat in pairs], lengths)
+
+    index = pd.MultiIndex.from_arrays([
+        np.repeat([year for year, _ in pairs], lengths),
+        np.repeat([stat for _, stat in pairs], lengths),
+        frame.index.get_level_values('Franchise')[rows]],
+        names=['Year', 'Stat', 'Franchise'])
+    return pd.DataFrame({'Win_Percent': frame['Win_Percent'].to_numpy()[rows],
+        'Value': frame[stats].to_numpy()[rows, columns]}, index=index)
+
+
+def season_arrays(frame):
+    """
+    Packs a long data frame into a (season, team, column) array.
+    Args:
+        frame: A Pandas dataframe with 'Year' as the first index level.
+    Returns:
+        A tuple of the sorted years and a NumPy array padded with NaN for
+        seasons with fewer teams.
+    """
+    years, year_codes = np.unique(frame.index.get_level_values('Year'),
+        return_inverse=True)
+    rows = frame.groupby(level='Year').cumcount().to_numpy()
+    arrays = np.full((len(years), rows.max(initial=-1) + 1, frame.shape[1]),
+        np.nan)
+    arrays[year_codes, rows] = frame.to_numpy(dtype=float)
+    return years, arrays
+
+
+def pearson_coefficients(arrays):
+    """
+    Correlates the first column of a (..., team, column) array with every
+    other column, along the team axis, skipping missing values.
+    Args:
+        arrays: A NumPy array as returned by season_arrays, optionally with
+        leading axes such as resampling replicates.
+    Returns:
+        A tuple of two NumPy arrays shaped (..., stat): the Pearson
+        correlation coefficients and the number of teams correlated.
+    """
+    win = arrays[..., :1]
+    stat = arrays[..., 1:]
+    valid = ~np.isnan(win) & ~np.isnan(stat)
+    count = valid.sum(axis=-2)
+    win = np.where(valid, win, 0)
+    stat = np.where(valid, stat, 0)
+    win = np.where(valid, win - win.sum(axis=-2, keepdims=True) /
+        count[..., np.newaxis, :], 0)
+    stat = np.where(valid, stat - stat.sum(axis=-2, keepdims=True) /
+        count[..., np.newaxis, :], 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = (win * stat).sum(axis=-2) / np.sqrt(
+            (win ** 2).sum(axis=-2) * (stat ** 2).sum(axis=-2))
+    return np.clip(corr, -1, 1), count
+
+
+def _pearson(arrays):
+    """
+    Correlates the first column of a (season, team, column) array with
+    every other column, season by season, skipping missing values.
+    Args:
+        arrays: A NumPy array as returned by season_arrays.
+    Returns:
+        A tuple of two (season, stat) NumPy arrays: the Pearson
+        correlation coefficients and the two-sided p-values.
+    """
+    # scipy takes most of a second to import, so only callers pay for it.
+    from scipy.special import stdtr # pylint: disable=import-outside-toplevel
+    corr, count = pearson_coefficients(arrays)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t_stat = corr * np.sqrt((count - 2) / (1 - corr ** 2))
+    p_value = 2 * stdtr(count - 2, -np.abs(t_stat))
+    return corr, p_value
 
-    for i in range(0,5):
-        playoff_data[i][0] = statistics.mean(playoff_data[i][0])
-        playoff_data[i][1] = statistics.mean(playoff_data[i][1])
 
-    return dict(sorted(playoff_data.items()))
+@instrumented('analysis')
+def win_correlations(stats=None, playoff=False):
+    """
+    Correlates the regular season win percentage with many stats for
+    every season at once.
+    Args:
+        stats: An optional list of strings of the stats to correlate,
+        every stat in DATA_NAMES by default.
+        playoff: A boolean representing whether to correlate with playoff
+        or regular season stats.
+    Returns:
+        A Pandas dataframe indexed by season, with two column levels: the
+        measure ('R^2', 'Pearson', 'Pearson p-value', 'Spearman',
+        'Spearman p-value') and the stat.
+    Win percentage is wins over games played by each team.
+    """
+    stats = STAT_NAMES if stats is None else list(stats)
+    return correlations_frame(win_stat_frame(stats, playoff))
 
 
+@instrumented('analysis')
+def correlations_frame(frame):
+    """
+    Correlates the first column of a table of team stats with every other
+    column, season by season.
+    Args:
+        frame: A Pandas dataframe indexed by (Year, Franchise) with the win
+        percentage in the first column and one column per stat after it.
+    Returns:
+        A Pandas dataframe as returned by win_correlations.
+    """
+    stats = list(frame.columns[1:])
+    years, values = season_arrays(frame)
+    _, ranks = season_arrays(frame.groupby(level='Year').rank())
+    pearson, pearson_p = _pearson(values)
+    spearman, spearman_p = _pearson(ranks)
+
+    index = pd.Index(years.astype(str), name='Season')
+    measures = {'R^2': pearson ** 2, 'Pearson': pearson,
+        'Pearson p-value': pearson_p, 'Spearman': spearman,
+        'Spearman p-value': spearman_p}
+    return pd.concat({measure: pd.DataFrame(values, index=index, columns=stats)
+        for measure, values in measures.items()}, axis=1)
+
+
+@instrumented('analysis')
 def win_compare_r_squared(stat_nba):
     """
     Compares the win/loss record to a NBA stat and outputs
@@ -266,24 +939,62 @@ def win_compare_r_squared(stat_nba):
         A dictionary with keys as years and the values as the
         r^2 values.
     """
-    win_loss_record = pd.DataFrame(columns=YEARS_LIST)
-    print(f"R^2 values for {stat_nba}")
-    for years in YEARS_LIST:
-        win_data = pd.read_csv(f'Data/win-loss/all_records_{years}.csv').iloc[:,1]
-        games_played = int(season_summary(years, False).iloc[:,2])
-        win_loss_record[years] = [int(i) for i in win_data]
-        win_loss_record[years] = win_loss_record[years].div(games_played).round(2)
-
-    win_loss_record.index = pd.read_csv('Data/win-loss/all_records_2010.csv').index
-    nba_stat = nba_stat_summary(stat_nba, False)
-    nba_stat.index = pd.read_csv('Data/win-loss/all_records_2010.csv').index
-
-    r_squared_dict = {}
-    for year in YEARS_LIST:
-        stat_values = nba_stat[str(year)]
-        win_values = win_loss_record[str(year)]
-        corr_matrix = np.corrcoef(win_values, stat_values)
-        corr_xy = corr_matrix[0,1]
-        r_sq = corr_xy**2
-        r_squared_dict[year] = round(r_sq,4)
-    return r_squared_dict
+    r_squared = win_correlations([stat_nba])['R^2'][stat_nba]
+    return r_squared.round(4).to_dict()
+
+
+# Cached loaders of other modules built from the scrapped files, see
+# register_cache.
+_registered_caches = []
+
+
+def register_cache(loader):
+    """
+    Makes clear_caches also clear a cached loader of another module, for
+    results built from the tables of this one.
+    Args:
+        loader: A function wrapped in functools.lru_cache.
+    Returns:
+        The loader, so this can be used as a decorator.
+    """
+    _registered_caches.append(loader)
+    return loader
+
+
+def clear_caches():
+    """
+    Drops every table kept in memory, including those of the loaders
+    registered with register_cache, so the next call reloads the scrapped
+    files.
+    Args:
+        None.
+    Returns:
+        None.
+    """
+    for loader in [_load_season_tables, _team_summary, load_playoff_outcomes,
+        load_win_records, *_registered_caches]:
+        loader.cache_clear()
+
+
+@instrumented('analysis')
+def memory_report():
+    """
+    Compares the memory used by the typed season tables with the same
+    tables in float64 with team names as Python strings.
+    Args:
+        None.
+    Returns:
+        A Pandas dataframe indexed by table name, with the number of rows,
+        the bytes used with and without the schema, and their ratio.
+    """
+    report = {}
+    for name, table in [('season_store', load_season_store()),
+        ('league_averages', load_league_averages())]:
+        untyped = table.astype({column: object if dtype == 'category'
+            else np.float64 for column, dtype in table.dtypes.items()})
+        report[name] = {'rows': table.shape[0],
+            'bytes': table.memory_usage(deep=True).sum(),
+            'untyped_bytes': untyped.memory_usage(deep=True).sum()}
+    report = pd.DataFrame(report).T
+    report['ratio'] = report['untyped_bytes'] / report['bytes']
+    return report
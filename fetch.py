@@ -0,0 +1,213 @@
+"""
+Concurrent HTTP fetching for the scraper, with a shared connection pool,
+a cap on in-flight requests per host and retries with exponential backoff.
+"""
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+MAX_WORKERS = 8
+MAX_PER_HOST = 3
+TIMEOUT = 30
+RETRIES = 4
+BACKOFF = 1.0
+MAX_DELAY = 60.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MANIFEST_PATH = 'Data/manifest.json'
+
+
+def make_session(pool_size=MAX_WORKERS):
+    """
+    Creates a requests session that keeps connections alive between calls.
+    Args:
+        pool_size: An int representing the number of connections to keep
+        open per host.
+    Returns:
+        A requests Session that can be shared between threads.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def retry_delay(response, attempt, backoff=BACKOFF, max_delay=MAX_DELAY):
+    """
+    Gets how long to wait before retrying a request.
+    Args:
+        response: The requests Response that failed, or None if the request
+        raised a connection error.
+        attempt: An int representing the number of attempts made so far.
+        backoff: A float representing the delay in seconds after the first
+        failed attempt.
+        max_delay: A float representing the longest delay in seconds.
+    Returns:
+        A float with the number of seconds to wait, or None if the server
+        asks to wait longer than max_delay. A numeric Retry-After header is
+        respected, otherwise the delay doubles every attempt, up to
+        max_delay.
+    """
+    if response is not None:
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            delay = float(retry_after)
+            return delay if delay <= max_delay else None
+    delay = backoff * 2 ** (attempt - 1) * (1 + random.random() / 2)
+    return min(delay, max_delay)
+
+
+def fetch_url(session, url, host_limit, retries=RETRIES, backoff=BACKOFF,
+    timeout=TIMEOUT, headers=None, max_delay=MAX_DELAY):
+    """
+    Gets a single URL, retrying on rate limits, server errors and dropped
+    connections.
+    Args:
+        session: A requests Session to send the request with.
+        url: A string representing the URL to get.
+        host_limit: A semaphore bounding the in-flight requests to the host.
+        retries: An int representing the number of retries after the first
+        attempt.
+        backoff: A float representing the delay in seconds after the first
+        failed attempt.
+        timeout: A float representing the timeout of each attempt in seconds.
+        headers: An optional dictionary of extra request headers.
+        max_delay: A float representing the longest delay in seconds
+        between attempts.
+    Returns:
+        The successful requests Response, which has status 304 if
+        conditional headers were sent and the page did not change.
+    Raises:
+        requests.RequestException if every attempt failed, or if the
+        server asks to wait longer than max_delay before retrying.
+    """
+    for attempt in range(1, retries + 2):
+        try:
+            with host_limit:
+                response = session.get(url, timeout=timeout, headers=headers)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt > retries:
+                raise
+            response = None
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt > retries:
+                response.raise_for_status()
+                return response
+        delay = retry_delay(response, attempt, backoff, max_delay)
+        if delay is None:
+            raise requests.HTTPError(f'{url} asked to retry after '
+                f'{response.headers["Retry-After"]} s', response=response)
+        time.sleep(delay)
+    raise requests.RequestException(f'No attempts made for {url}')
+
+
+def fetch_all(urls, session=None, max_workers=MAX_WORKERS,
+    max_per_host=MAX_PER_HOST, headers=None, **kwargs):
+    """
+    Gets many URLs concurrently.
+    Args:
+        urls: An iterable of strings representing the URLs to get.
+        session: An optional requests Session to share. A new one is made
+        and closed if none is given.
+        max_workers: An int representing the number of worker threads.
+        max_per_host: An int representing the maximum number of requests
+        in flight to the same host.
+        headers: An optional dictionary where keys are URLs and values are
+        dictionaries of extra request headers for that URL.
+        **kwargs: Retry and timeout options passed on to fetch_url.
+    Returns:
+        A dictionary where keys are the URLs and values are either the
+        requests Response or the exception raised while getting it, so a
+        single failure does not stop the others.
+    """
+    urls = list(dict.fromkeys(urls))
+    own_session = session is None
+    if own_session:
+        session = make_session(max(max_workers, max_per_host))
+    hosts = {urlsplit(url).netloc for url in urls}
+    host_limits = {host: threading.BoundedSemaphore(max_per_host)
+        for host in hosts}
+
+    def fetch(url):
+        try:
+            return fetch_url(session, url, host_limits[urlsplit(url).netloc],
+                headers=(headers or {}).get(url), **kwargs)
+        except requests.RequestException as error:
+            return error
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return dict(zip(urls, pool.map(fetch, urls)))
+    finally:
+        if own_session:
+            session.close()
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """
+    Loads the record of previously downloaded pages.
+    Args:
+        path: A string representing the path of the manifest file.
+    Returns:
+        A dictionary where keys are URLs and values are dictionaries with
+        the 'etag', 'last_modified', 'sha1', 'path' and 'final' of the
+        last download. Empty if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as manifest_file:
+        return json.load(manifest_file)
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    """
+    Saves the record of downloaded pages.
+    Args:
+        manifest: A dictionary as returned by load_manifest.
+        path: A string representing the path of the manifest file.
+    """
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def conditional_headers(entry):
+    """
+    Gets the headers that make a request conditional on the page having
+    changed since it was last downloaded.
+    Args:
+        entry: A dictionary from the manifest, or None.
+    Returns:
+        A dictionary of If-None-Match and If-Modified-Since headers.
+    """
+    headers = {}
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry and entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+def manifest_entry(response, path, final):
+    """
+    Describes a downloaded page for the manifest.
+    Args:
+        response: The requests Response of the page.
+        path: A string representing the file the page was saved to.
+        final: A boolean representing whether the page can no longer change.
+    Returns:
+        A dictionary to store in the manifest under the page's URL.
+    """
+    return {'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'sha1': hashlib.sha1(response.content).hexdigest(),
+        'path': path,
+        'final': final}
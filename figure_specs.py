@@ -0,0 +1,181 @@
+"""
+Precomputed Plotly figure specs of the team summaries, for interactive_map.
+
+The stats of every franchise are written once to 'Data/cache/figures.json',
+for the regular season and the playoffs. Each stat is stored as a typed
+array spec: base64 float32 bytes that Plotly.js decodes itself, so the
+file holds no float lists and figures are built from it without
+converting any number. Every team's arrays cover the same seasons, so one
+x axis (first season and step) is shared by every team and trace. The file
+is rebuilt when the scrapped season files or data_analysis.CLEAN_VERSION
+change, and loaded the first time a spec is needed.
+"""
+import os
+import json
+import base64
+import hashlib
+import functools
+import numpy as np
+from data_analysis import query, season_partitions, register_cache, \
+    SEASON_SHOOTING_DIR, STAT_NAMES, CLEAN_VERSION
+from franchises import FRANCHISES, franchise_id, franchise_name
+from season_cache import CACHE_DIR
+
+FIGURE_PATH = os.path.join(CACHE_DIR, 'figures.json')
+
+SEASON_TYPES = {'season': False, 'playoffs': True}
+
+
+def encode_array(values, dtype='f4'):
+    """
+    Encodes numbers as a Plotly typed array spec.
+    Args:
+        values: A list or Numpy array of numbers.
+        dtype: A string with the Numpy type code to store, like 'f4'.
+    Returns:
+        A dictionary with the 'dtype' and the base64 'bdata' of the bytes.
+    """
+    data = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder('<'))
+    return {'dtype': dtype, 'bdata': base64.b64encode(data.tobytes()).decode()}
+
+
+def decode_array(spec):
+    """
+    Decodes a Plotly typed array spec.
+    Args:
+        spec: A dictionary as returned by encode_array.
+    Returns:
+        A read-only Numpy array.
+    """
+    dtype = np.dtype(spec['dtype']).newbyteorder('<')
+    return np.frombuffer(base64.b64decode(spec['bdata']), dtype)
+
+
+def source_stamp():
+    """
+    Fingerprints the scrapped season files without reading them.
+    Args:
+        None.
+    Returns:
+        A string with the hex SHA-1 digest of the version of the cleaning
+        (data_analysis.CLEAN_VERSION) and the name, modification time and
+        size of every season file.
+    """
+    digest = hashlib.sha1(f'{CLEAN_VERSION};'.encode())
+    for name in sorted(os.listdir(SEASON_SHOOTING_DIR)):
+        stat = os.stat(os.path.join(SEASON_SHOOTING_DIR, name))
+        digest.update(f'{name}:{stat.st_mtime_ns}:{stat.st_size};'.encode())
+    return digest.hexdigest()
+
+
+def build_specs():
+    """
+    Computes the figure specs of every franchise from the season store.
+    Args:
+        None.
+    Returns:
+        A dictionary with the 'stamp' of the season files, the shared 'axis'
+        ('x0', 'dx' and 'length' of the seasons), the list of 'stats' and
+        the 'teams', a dictionary from franchise ID to the team 'name' and,
+        for 'season' and 'playoffs', one typed array spec per stat with NaN
+        for the seasons the team did not play.
+    """
+    years = [year for year, _ in season_partitions()]
+    seasons = np.arange(min(years), max(years) + 1)
+    store = query().collect()
+    playoffs = store.index.get_level_values('Playoff')
+    franchises = store.index.get_level_values('Franchise')
+    teams = {}
+    for franchise in FRANCHISES:
+        team = {'name': franchise_name(franchise)}
+        for season_type, playoff in SEASON_TYPES.items():
+            rows = store[(playoffs == playoff) & (franchises == franchise)]
+            rows = rows.droplevel(['Playoff', 'Franchise'])
+            values = rows.reindex(seasons)[STAT_NAMES].to_numpy(np.float32)
+            team[season_type] = [encode_array(column) for column in values.T]
+        teams[franchise] = team
+    return {'stamp': source_stamp(),
+        'axis': {'x0': int(seasons[0]), 'dx': 1, 'length': len(seasons)},
+        'stats': STAT_NAMES, 'teams': teams}
+
+
+def write_specs(specs, path=FIGURE_PATH):
+    """
+    Writes figure specs to a JSON file, replacing any previous version.
+    Args:
+        specs: A dictionary as returned by build_specs.
+        path: A string representing the path to write to.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(specs, file, separators=(',', ':'))
+    os.replace(temp_path, path)
+
+
+@register_cache
+@functools.lru_cache(maxsize=None)
+def load_specs(path=None):
+    """
+    Gets the figure specs from disk, building and writing them only when
+    the file is missing or older than the scrapped season files.
+    Args:
+        path: An optional string representing the path of the JSON file,
+        FIGURE_PATH by default.
+    Returns:
+        A dictionary as returned by build_specs, shared by every caller,
+        which must not be modified.
+    Cleared by data_analysis.clear_caches().
+    """
+    path = FIGURE_PATH if path is None else path
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as file:
+            specs = json.load(file)
+        if specs.get('stamp') == source_stamp():
+            return specs
+    specs = build_specs()
+    write_specs(specs, path)
+    return specs
+
+
+def figure_spec(teams, path=None):
+    """
+    Builds the Plotly figure of the team summaries of one or more teams,
+    with a dropdown to pick the stat.
+    Args:
+        teams: A string with a team name or abbreviation, or a list of them
+        to compare.
+        path: An optional string representing the path of the figure
+        specs, FIGURE_PATH by default.
+    Returns:
+        A dictionary with the 'data' and 'layout' of a Plotly figure. There
+        are two traces per team, the regular season and the playoffs, on
+        the shared season axis. They show the first stat, and every
+        dropdown button replaces their y arrays with those of its stat.
+    Raises:
+        KeyError if a team is not found.
+    """
+    specs = load_specs(path)
+    teams = [teams] if isinstance(teams, str) else list(teams)
+    franchises = [franchise_id(team) for team in teams]
+    axis = specs['axis']
+    traces = [(specs['teams'][franchise], season_type)
+        for franchise in franchises for season_type in SEASON_TYPES]
+
+    data = [{'type': 'scatter', 'mode': 'lines+markers', 'x0': axis['x0'],
+        'dx': axis['dx'], 'y': team[season_type][0],
+        'name': f'{team["name"]} ({season_type})',
+        'legendgroup': team['name'],
+        'line': {'dash': 'dot' if SEASON_TYPES[season_type] else 'solid'}}
+        for team, season_type in traces]
+    buttons = [{'label': stat, 'method': 'update',
+        'args': [{'y': [team[season_type][index]
+            for team, season_type in traces]}, {'title.text': stat}]}
+        for index, stat in enumerate(specs['stats'])]
+    names = ' vs '.join(specs['teams'][franchise]['name']
+        for franchise in franchises)
+    layout = {'title': {'text': f'{names} Team Summary'}, 'height': 800,
+        'yaxis': {'type': 'log'}, 'xaxis': {'title': {'text': 'Season'},
+            'dtick': 1},
+        'updatemenus': [{'active': 0, 'buttons': buttons}]}
+    return {'data': data, 'layout': layout}
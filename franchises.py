@@ -0,0 +1,83 @@
+"""
+Canonical franchise IDs, so tables can be joined by team even when a
+franchise changed its name or is referred to by an abbreviation.
+"""
+
+FRANCHISES = {
+    'ATL': ('Atlanta Hawks', [], ['ATL']),
+    'BOS': ('Boston Celtics', [], ['BOS']),
+    'BRK': ('Brooklyn Nets', ['New Jersey Nets'], ['BKN', 'NJN']),
+    'CHI': ('Chicago Bulls', [], ['CHI']),
+    'CHO': ('Charlotte Hornets', ['Charlotte Bobcats'], ['CHA']),
+    'CLE': ('Cleveland Cavaliers', [], ['CLE']),
+    'DAL': ('Dallas Mavericks', [], ['DAL']),
+    'DEN': ('Denver Nuggets', [], ['DEN']),
+    'DET': ('Detroit Pistons', [], ['DET']),
+    'GSW': ('Golden State Warriors', [], ['GS']),
+    'HOU': ('Houston Rockets', [], ['HOU']),
+    'IND': ('Indiana Pacers', [], ['IND']),
+    'LAC': ('Los Angeles Clippers', ['LA Clippers'], ['LAC']),
+    'LAL': ('Los Angeles Lakers', [], ['LAL']),
+    'MEM': ('Memphis Grizzlies', ['Vancouver Grizzlies'], ['VAN']),
+    'MIA': ('Miami Heat', [], ['MIA']),
+    'MIL': ('Milwaukee Bucks', [], ['MIL']),
+    'MIN': ('Minnesota Timberwolves', [], ['MIN']),
+    'NOP': ('New Orleans Pelicans', ['New Orleans Hornets',
+        'New Orleans/Oklahoma City Hornets'], ['NO', 'NOH', 'NOK', 'CHH']),
+    'NYK': ('New York Knicks', [], ['NY']),
+    'OKC': ('Oklahoma City Thunder', ['Seattle SuperSonics'], ['SEA']),
+    'ORL': ('Orlando Magic', [], ['ORL']),
+    'PHI': ('Philadelphia 76ers', [], ['PHI']),
+    'PHO': ('Phoenix Suns', [], ['PHX']),
+    'POR': ('Portland Trail Blazers', [], ['POR']),
+    'SAC': ('Sacramento Kings', [], ['SAC']),
+    'SAS': ('San Antonio Spurs', [], ['SA']),
+    'TOR': ('Toronto Raptors', [], ['TOR']),
+    'UTA': ('Utah Jazz', [], ['UTAH']),
+    'WAS': ('Washington Wizards', ['Washington Bullets'], ['WSH', 'WSB']),
+}
+
+FRANCHISE_IDS = {alias.upper(): franchise
+    for franchise, (current_name, old_names, abbreviations) in FRANCHISES.items()
+    for alias in [franchise, current_name] + old_names + abbreviations}
+
+# Names used by two franchises, with the last season (by the year it ends)
+# and the ID of the franchise that used it first. The Charlotte Hornets of
+# 1989 to 2002 moved to New Orleans and are now the Pelicans.
+SHARED_NAMES = {
+    'CHARLOTTE HORNETS': (2002, 'NOP'),
+}
+
+
+def franchise_id(team, year=None):
+    """
+    Gets the franchise ID of a team.
+    Args:
+        team: A string with a current or historical team name, or an
+        abbreviation. A trailing playoff asterisk is ignored.
+        year: An optional int with the season (by the year it ends) the
+        name is from, needed for the names in SHARED_NAMES. Names are taken
+        as current if it is None.
+    Returns:
+        A string with the franchise ID (the current basketball-reference.com
+        abbreviation).
+    Raises:
+        KeyError if the team is not known.
+    """
+    name = team.replace('*', '').strip().upper()
+    if year is not None and name in SHARED_NAMES:
+        last_year, franchise = SHARED_NAMES[name]
+        if int(year) <= last_year:
+            return franchise
+    return FRANCHISE_IDS[name]
+
+
+def franchise_name(franchise):
+    """
+    Gets the current name of a franchise.
+    Args:
+        franchise: A string with a franchise ID.
+    Returns:
+        A string with the current team name.
+    """
+    return FRANCHISES[franchise][0]
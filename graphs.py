@@ -1,17 +1,95 @@
 """
 Functions to plot graphs of the analysed data.
+
+Every plot function draws on the current pyplot figure and shows it, like
+in the notebook, unless it is given a figure to draw on. render draws a
+plot on a new figure without pyplot, so it works without a display, and
+render_catalog renders every chart of the scrapped data across processes.
+
+matplotlib, seaborn and Plotly are imported the first time a plot uses
+them, so importing this module costs little more than data_analysis.
 """
-import plotly.graph_objects as go
+import io
+import sys
+import os
+import types
+import importlib
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
 import numpy as np
-from data_analysis import season_summary, nba_stat_summary,\
-    team_summary, edge_cases_metric, playoff_round_3p, DATA_NAMES, YEARS_LIST, \
-        win_compare_r_squared
+from data_analysis import load_league_averages, nba_stat_summary,\
+    team_summary, edge_cases_metric, playoff_round_3p, DATA_NAMES, \
+        win_compare_r_squared, win_stat_frame, win_stat_pairs, STAT_NAMES
+from franchises import FRANCHISES
+from figure_specs import figure_spec, load_specs
+from instrument import instrumented, span, count
+
+
+class _LazyModule(types.ModuleType):
+    """
+    A module imported the first time one of its attributes is used, so
+    importing graphs does not load the plotting libraries.
+    """
+
+    def __getattr__(self, attribute):
+        """
+        Imports the module and gets one of its attributes.
+        Args:
+            attribute: A string with the attribute name.
+        Returns:
+            The attribute of the imported module.
+        """
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attribute)
+
+
+plt = _LazyModule('matplotlib.pyplot')
+sns = _LazyModule('seaborn')
+go = _LazyModule('plotly.graph_objects')
+mpl_figure = _LazyModule('matplotlib.figure')
+mpl_agg = _LazyModule('matplotlib.backends.backend_agg')
 
 
-def season_summary_visual(stat, playoff, y_label, title):
+def _is_plotly(fig):
+    """
+    Checks whether a figure is a Plotly figure, without importing Plotly.
+    Args:
+        fig: A matplotlib or Plotly figure.
+    Returns:
+        A boolean.
+    """
+    return type(fig).__module__.startswith('plotly.')
+
+
+def _figure(fig):
+    """
+    Gets the figure a plot draws on.
+    Args:
+        fig: A matplotlib figure, or None for the current pyplot figure.
+    Returns:
+        A matplotlib figure.
+    """
+    return plt.gcf() if fig is None else fig
+
+
+def _finish(fig, show):
+    """
+    Shows a plot drawn on pyplot state.
+    Args:
+        fig: The matplotlib figure of the plot.
+        show: A boolean representing whether to show the plot.
+    Returns:
+        The matplotlib figure, or None if it was shown so that notebooks do
+        not display it twice.
+    """
+    if show:
+        plt.show()
+        return None
+    return fig
+
+
+def season_summary_visual(stat, playoff, y_label, title, fig=None):
     """
     Trend over time of the league average of a single stat, visualized
     as a matplotlib scatter plot.
@@ -23,31 +101,27 @@ def season_summary_visual(stat, playoff, y_label, title):
         season.
         y_label: A string representing the desired y-label of the plot.
         title: A string representing the desired title of the plot.
+        fig: An optional matplotlib figure to draw on. If it is None, the
+        plot is drawn on the current pyplot figure and shown.
 
     Returns:
-        Plots a scatter of season summary of a NBA stat.
-    """
-    data = []
-    year = []
-    head_list = list(DATA_NAMES.keys())
-    stat_index = head_list.index(stat)
-    for i in range(10,21):
-        if playoff:
-            all_stats = season_summary(f'20{i}', True)
-        else:
-            all_stats = season_summary(f'20{i}', False)
-        data.append(float(all_stats.iloc[0, stat_index]))
-        year.append(f'{i-1}-{i}')
+        The matplotlib figure (None if shown) with a scatter of season
+        summary of a NBA stat.
+    """
+    averages = load_league_averages().xs(bool(playoff), level='Playoff')[stat]
+    data = list(averages)
+    year = [f'{season % 100 - 1}-{season % 100}' for season in averages.index]
 
-    plt.plot(year, data)
-    plt.scatter(year, data)
-    plt.xlabel('Season')
-    plt.ylabel(y_label)
-    plt.title(title)
-    plt.show()
+    sub_plot = _figure(fig).gca()
+    sub_plot.plot(year, data)
+    sub_plot.scatter(year, data)
+    sub_plot.set_xlabel('Season')
+    sub_plot.set_ylabel(y_label)
+    sub_plot.set_title(title)
+    return _finish(_figure(fig), fig is None)
 
 
-def team_summary_visual(team, stat, playoff):
+def team_summary_visual(team, stat, playoff, fig=None):
     """
     Trend over time of a stat for a single team visualized as a matplotlib
     scatter plot.
@@ -57,37 +131,29 @@ def team_summary_visual(team, stat, playoff):
         stat: A string representing the desired stat to pull data for.
         playoff: A boolean representing whether to pull playoffs stats
         or regular season stats.
+        fig: An optional matplotlib figure to draw on. If it is None, the
+        plot is drawn on the current pyplot figure and shown.
 
     Returns:
-        Plots a scatter of a single team for a single stat.
+        The matplotlib figure (None if shown) with a scatter of a single
+        team for a single stat.
     """
-    team_stats = team_summary(team)
-    print(team_stats)
+    team_stats = team_summary(team, playoff)
     stats = {}
-    nums_for_stat = list(team_stats.loc[:,stat])
-    print(nums_for_stat)
-    for i in range(0, team_stats.shape[0]):
-        print(i)
-        name = team_stats.iloc[i].name
-        if name[len(name)-5:len(name)-4] == 'p' and playoff:
-            stats[name[2:4]] = round(float(nums_for_stat[i]),3)
-        elif name[len(name)-5:len(name)-4] == 'p' and not playoff:
-            continue
-        elif name[len(name)-5:len(name)-4] != 'p' and not playoff:
-            stats[name[2:4]] = round(float(nums_for_stat[i]),3)
-        else:
-            continue
+    for name, value in team_stats[stat].items():
+        stats[name[2:4]] = round(float(value),3)
 
     sorted_year = sorted(stats.items())
     sorted_stat = dict(sorted_year)
-    plt.plot(list(sorted_stat.keys()), list(sorted_stat.values()))
-    plt.scatter(list(sorted_stat.keys()), list(sorted_stat.values()))
-    plt.xlabel('Season')
-    plt.ylabel(stat)
-    plt.show()
+    sub_plot = _figure(fig).gca()
+    sub_plot.plot(list(sorted_stat.keys()), list(sorted_stat.values()))
+    sub_plot.scatter(list(sorted_stat.keys()), list(sorted_stat.values()))
+    sub_plot.set_xlabel('Season')
+    sub_plot.set_ylabel(stat)
+    return _finish(_figure(fig), fig is None)
 
 
-def win_compare(year,stat_nba, playoff, xlabel, ylabel,):
+def win_compare(year,stat_nba, playoff, xlabel, ylabel, fig=None):
     """
     Compares the win/loss record to a NBA stat for all teams
     over one season.
@@ -100,33 +166,55 @@ def win_compare(year,stat_nba, playoff, xlabel, ylabel,):
         or regular season stats.
         xlabel: A string label for the x-axis.
         ylabel: A string label for the y-axis.
-        title: A string for the title of the plot.
+        fig: An optional matplotlib figure to draw on. If it is None, the
+        plot is drawn on the current pyplot figure and shown.
 
     Returns:
-        Plots a scatter of the win/loss record against a NBA stat
-        for all teams.
+        The matplotlib figure (None if shown) with a scatter of the win/loss
+        record against a NBA stat for all teams.
     """
 
-    year = str(year)
-    win_loss_record = pd.DataFrame(columns=YEARS_LIST)
+    season = win_stat_frame([stat_nba], playoff, [year]).loc[int(year)]
+    sub_plot = _figure(fig).gca()
+    sub_plot.scatter(season['Win_Percent'], season[stat_nba])
+    sub_plot.set_xlabel(xlabel)
+    sub_plot.set_ylabel(ylabel)
+    sub_plot.set_title(f"{xlabel} vs {ylabel}")
+    return _finish(_figure(fig), fig is None)
 
-    for years in YEARS_LIST:
-        win_data = pd.read_csv(f'Data/win-loss/all_records_{year}.csv').iloc[:,1]
-        games_played = int(season_summary(years, playoff).iloc[:,2])
-        win_loss_record[years] = [int(i) for i in win_data]
-        win_loss_record[years] = win_loss_record[years].div(games_played).round(2)
 
-    win_loss_record.index = pd.read_csv(f'Data/win-loss/all_records_{year}.csv').index
-    nba_stat = nba_stat_summary(stat_nba, playoff)
-    nba_stat.index = pd.read_csv(f'Data/win-loss/all_records_{2010}.csv').index
-    plt.scatter(win_loss_record[year], nba_stat[year])
-    plt.xlabel(xlabel)
-    plt.ylabel(ylabel)
-    plt.title(f"{xlabel} vs {ylabel}")
-    plt.show()
+def win_compare_many(pairs, playoff, fig=None):
+    """
+    Compares the win/loss record to NBA stats for all teams over several
+    seasons, with one scatter subplot per (season, stat) pair.
 
+    Args:
+        pairs: A list of tuples of an int year and a string stat.
+        playoff: A boolean representing whether to pull playoffs stats
+        or regular season stats.
+        fig: An optional matplotlib figure to draw on. If it is None, the
+        plot is drawn on the current pyplot figure and shown.
 
-def nba_stat_plot(stat_nba, playoff):
+    Returns:
+        The matplotlib figure (None if shown) with a scatter of the win/loss
+        record against a NBA stat for every pair.
+    """
+    scatter = win_stat_pairs(pairs, playoff)
+    figure = _figure(fig)
+    seasons = scatter.groupby(level=['Year', 'Stat'], sort=False)
+    columns = min(len(seasons), 3)
+    rows = -(-len(seasons) // columns)
+    for i, ((year, stat), season) in enumerate(seasons):
+        sub_plot = figure.add_subplot(rows, columns, i + 1)
+        sub_plot.scatter(season['Win_Percent'], season['Value'])
+        sub_plot.set_xlabel('Win Percentage')
+        sub_plot.set_ylabel(stat)
+        sub_plot.set_title(str(year))
+    figure.tight_layout()
+    return _finish(figure, fig is None)
+
+
+def nba_stat_plot(stat_nba, playoff, fig=None):
     """
     Generates a box and whisker plot of a NBA stat over
     the scrapped data frame.
@@ -135,16 +223,18 @@ def nba_stat_plot(stat_nba, playoff):
         stat_nba: A string representing the desired stat to pull data for.
         playoff: A boolean representing whether to pull playoffs stats
         or regular season stats.
+        fig: An optional matplotlib figure to draw on. If it is None, the
+        plot is drawn on the current pyplot figure and shown.
 
     Returns:
-        A box and whisker plot for the particular NBA stat.
+        The matplotlib figure (None if shown) with a box and whisker plot
+        for the particular NBA stat.
     """
-    stat_summary = nba_stat_summary(stat_nba, playoff)
-    sns.boxplot(x="variable", y="value", data=pd.melt(stat_summary))
-    plt.show()
+    seaborn_plots_silent(stat_nba, playoff, _figure(fig).gca())
+    return _finish(_figure(fig), fig is None)
 
 
-def seaborn_plots_silent(stat_nba, playoff):
+def seaborn_plots_silent(stat_nba, playoff, sub_plot=None):
     """
     Generates a box and whisker plot of a NBA state over
     the scrapped data frame for subplots.
@@ -153,33 +243,37 @@ def seaborn_plots_silent(stat_nba, playoff):
         stat_nba: A string representing the desired stat to pull data for.
         playoff: A boolean representing whether to pull playoffs stats
         or regular season stats.
+        sub_plot: An optional matplotlib axes to draw on, the current
+        pyplot axes by default.
 
     Returns:
         A box and whisker plot for the particular NBA stat
         to be used in subplots.
     """
     stat_summary = nba_stat_summary(stat_nba, playoff)
-    sns.boxplot(x="variable", y="value", data=pd.melt(stat_summary))
+    return sns.boxplot(x="variable", y="value", data=pd.melt(stat_summary),
+        ax=sub_plot)
 
 
-def efg_vs_3pa():
+def efg_vs_3pa(fig=None):
     """
     Creates a plot comparing the effective field goal values
     to the 3 point attempted values.
 
     Args:
-        None.
+        fig: An optional matplotlib figure to draw on. If it is None, the
+        plot is drawn on the current pyplot figure and shown.
 
     Returns:
-        A boxplot comparing the effective field goal values
-        with the 3 point attempted values.
+        The matplotlib figure (None if shown) with a boxplot comparing the
+        effective field goal values with the 3 point attempted values.
     """
     efgs = pd.read_csv('Data/efg/efg.csv')
-    sns.boxplot(x="Year", y="eFG%", data=efgs)
-    plt.show()
+    sns.boxplot(x="Year", y="eFG%", data=efgs, ax=_figure(fig).gca())
+    return _finish(_figure(fig), fig is None)
 
 
-def playoff_3p_chart(year, playoffs):
+def playoff_3p_chart(year, playoffs, fig=None):
     """
     Generates a side-by-side bar chart to compare % Shots
     attempted and made for 3 pointers.
@@ -188,10 +282,12 @@ def playoff_3p_chart(year, playoffs):
         year: An int representing the year to pull data for.
         playoff: A boolean representing whether to pull playoffs stats
         or regular season stats.
+        fig: An optional matplotlib figure to draw on. If it is None, the
+        plot is drawn on a new pyplot figure and shown.
 
     Returns:
-        A side-by-side boxplot of comparing % Shots
-        attempted and made for 3 pointers.
+        The matplotlib figure (None if shown) with a side-by-side boxplot of
+        comparing % Shots attempted and made for 3 pointers.
     """
     data = playoff_round_3p(year, playoffs)
     labels = list(data.keys())
@@ -205,7 +301,10 @@ def playoff_3p_chart(year, playoffs):
     width = 0.35
 
     axis_ordered = np.arange(len(labels))
-    fig,sub_plots = plt.subplots()
+    if fig is None:
+        figure, sub_plots = plt.subplots()
+    else:
+        figure, sub_plots = fig, fig.subplots()
     sub_plots.bar(axis_ordered - width/2, threes_attempted, \
         width, label="% Shots Attempted from 3PT")
     sub_plots.bar(axis_ordered + width/2, threes_made, \
@@ -216,20 +315,23 @@ def playoff_3p_chart(year, playoffs):
     sub_plots.set_xticks(axis_ordered)
     sub_plots.set_xticklabels(labels)
     sub_plots.legend()
-    fig.tight_layout()
-    plt.show()
+    figure.tight_layout()
+    return _finish(figure, fig is None)
 
 
-def edge_case_graph(stat):
+def edge_case_graph(stat, fig=None):
     """
     Generates bar graph to compare the edge case metric over
     the scrapped data frame.
 
     Args:
-        None.
+        stat: A string representing the stat to rank teams by.
+        fig: An optional matplotlib figure to draw on. If it is None, the
+        plot is drawn on a new pyplot figure and shown.
 
     Returns:
-        A bar graph comparing the edge case metric.
+        The matplotlib figure (None if shown) with a bar graph comparing the
+        edge case metric.
 
     1 Point is added to the "edge" metric during a season if a team that is
     Top 5 in 3PA makes the playoffs.
@@ -237,7 +339,10 @@ def edge_case_graph(stat):
     """
     width = 0.35
     data = edge_cases_metric(stat)
-    fig, sub_plots = plt.subplots()
+    if fig is None:
+        figure, sub_plots = plt.subplots()
+    else:
+        figure, sub_plots = fig, fig.subplots()
     axis_ordered = np.arange(len(list(data['Season'])))
 
     sub_plots.bar(axis_ordered - width/2, list(data['Edge Case Metric']), \
@@ -249,103 +354,231 @@ def edge_case_graph(stat):
     sub_plots.set_ylabel('Number of Edge Cases')
     sub_plots.set_xlabel('Season')
     sub_plots.legend()
-    fig.tight_layout()
-    plt.show()
+    figure.tight_layout()
+    return _finish(figure, fig is None)
 
 
-def playoffs_versus_season():
+def playoffs_versus_season(fig=None):
     """
     Plots %3PA and %3PM for regular season and playoffs
     in subplots.
 
     Args:
-        None.
+        fig: An optional matplotlib figure to draw on. If it is None, the
+        plot is drawn on the current pyplot figure and shown.
 
     Returns:
-        A subplot of scatter plots comparing the %3PA
-        with the %3PM.
+        The matplotlib figure (None if shown) with a subplot of scatter
+        plots comparing the %3PA with the %3PM.
     """
-    plt.subplot(221)
-    seaborn_plots_silent('Field_Goals_Attempted_3PA', False)
-    plt.subplot(222)
-    seaborn_plots_silent('Field_Goals_Attempted_3PA', True)
-    plt.subplot(223)
-    seaborn_plots_silent('Field_Goals_3P', False)
-    plt.subplot(224)
-    seaborn_plots_silent('Field_Goals_3P', True)
-    plt.show()
+    figure = _figure(fig)
+    seaborn_plots_silent('Field_Goals_Attempted_3PA', False,
+        figure.add_subplot(221))
+    seaborn_plots_silent('Field_Goals_Attempted_3PA', True,
+        figure.add_subplot(222))
+    seaborn_plots_silent('Field_Goals_3P', False, figure.add_subplot(223))
+    seaborn_plots_silent('Field_Goals_3P', True, figure.add_subplot(224))
+    return _finish(figure, fig is None)
 
 
-def plot_win_compare_r_squared():
+def plot_win_compare_r_squared(fig=None):
     """
     Plots r-squared vals for %3PM and win% and %3PA and win% over time in
     subplots.
 
     Args:
-        None.
+        fig: An optional matplotlib figure to draw on. If it is None, the
+        plot is drawn on the current pyplot figure and shown.
 
     Returns:
-        A subplot of scatter plots comparing win% to season number
+        The matplotlib figure (None if shown) with a subplot of scatter
+        plots comparing win% to season number.
     """
     fga_r_sq = win_compare_r_squared("Field_Goals_3P")
     fgm_r_sq = win_compare_r_squared("Field_Goals_Attempted_3PA")
-    plt.subplot(121)
-    plt.scatter(fga_r_sq.keys(), fga_r_sq.values())
-    plt.xlabel('Season')
-    plt.ylabel('R-squared')
-    plt.title('R-Squared for %3PA and Win Percentage')
-    plt.subplot(122)
-    plt.scatter(fgm_r_sq.keys(), fgm_r_sq.values())
-    plt.xlabel('Season')
-    plt.ylabel('R-squared')
-    plt.title('R-Squared for %3PM and Win Percentage')
-    plt.show()
+    figure = _figure(fig)
+    sub_plot = figure.add_subplot(121)
+    sub_plot.scatter(fga_r_sq.keys(), fga_r_sq.values())
+    sub_plot.set_xlabel('Season')
+    sub_plot.set_ylabel('R-squared')
+    sub_plot.set_title('R-Squared for %3PA and Win Percentage')
+    sub_plot = figure.add_subplot(122)
+    sub_plot.scatter(fgm_r_sq.keys(), fgm_r_sq.values())
+    sub_plot.set_xlabel('Season')
+    sub_plot.set_ylabel('R-squared')
+    sub_plot.set_title('R-Squared for %3PM and Win Percentage')
+    return _finish(figure, fig is None)
+
+
+def interactive_map(team, fig=None):
+    """
+    Generates interactive map based on team names (includes playoffs).
+
+    Args:
+        team: A string containing a team name from the NBA, or a list of
+        them to compare the teams on the same plot.
+        fig: An optional Plotly figure to draw on. If it is None, the plot
+        is drawn on a new figure and shown.
 
+    Returns:
+        The Plotly figure (None if shown), an interactive plot with a
+        dropdown to observe a NBA stat for a team over the scrapped  data
+        sets.
 
-def interactive_map(team):
+    The figure is built from the precomputed specs of figure_specs, so the
+    stats are not recomputed and stay typed arrays in the figure JSON.
     """
-    Generates interactive map based on team names (includes playoffs).
+    spec = figure_spec(team)
+    figure = go.Figure() if fig is None else fig
+    figure.add_traces(spec['data'])
+    figure.update_layout(spec['layout'])
+    if fig is None:
+        figure.show()
+        return None
+    return figure
+
+
+def render(plot, *args, path=None, figsize=(6, 4), dpi=100, **kwargs):
+    """
+    Draws a plot on a new figure without pyplot or a display.
+    Args:
+        plot: One of the plot functions of this module.
+        args: The arguments of the plot function.
+        path: An optional string representing the file to write the plot
+        to. The format is taken from its extension, see save.
+        figsize: A tuple of the width and height of matplotlib plots in
+        inches.
+        dpi: An int representing the resolution of matplotlib plots.
+        kwargs: The keyword arguments of the plot function.
+    Returns:
+        The matplotlib or Plotly figure of the plot.
+    When instrument is enabled, the call is recorded as a span named after
+    the plot function.
+    """
+    with span(f'graphs.render.{plot.__name__}', 'graphs'):
+        if plot is interactive_map:
+            fig = plot(*args, fig=go.Figure(), **kwargs)
+        else:
+            fig = mpl_figure.Figure(figsize=figsize, dpi=dpi)
+            mpl_agg.FigureCanvasAgg(fig)
+            plot(*args, fig=fig, **kwargs)
+        if path is not None:
+            save(fig, path)
+    return fig
+
 
+@instrumented('graphs')
+def save(fig, path):
+    """
+    Writes a figure to a file.
+    Args:
+        fig: A matplotlib or Plotly figure.
+        path: A string representing the file to write. The format is taken
+        from its extension: '.png' or '.svg' for matplotlib figures, and
+        '.html' for every figure.
+    Raises:
+        ValueError if the format is not supported for the figure.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if _is_plotly(fig) and extension != '.html':
+        raise ValueError(f'Plotly figures can only be saved as .html: {path}')
+    if extension not in ('.png', '.svg', '.html'):
+        raise ValueError(f'Unsupported figure format: {path}')
+
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    if _is_plotly(fig):
+        fig.write_html(path, include_plotlyjs='cdn')
+    elif extension == '.html':
+        svg = io.StringIO()
+        fig.savefig(svg, format='svg')
+        with open(path, 'w', encoding='utf-8') as html_file:
+            html_file.write(f'<html><body>{svg.getvalue()}</body></html>')
+    else:
+        fig.savefig(path, format=extension[1:])
+    count('bytes', os.path.getsize(path))
+
+
+def chart_jobs(out_dir, teams=None, stats=None, image_format='png'):
+    """
+    Lists every chart of the catalog of the scrapped data.
+    Args:
+        out_dir: A string representing the folder to write the charts to.
+        teams: An optional list of team names or franchise IDs, every
+        franchise by default.
+        stats: An optional list of stats, every stat in STAT_NAMES by
+        default.
+        image_format: A string with the format of matplotlib charts, 'png',
+        'svg' or 'html'.
+    Returns:
+        A list of tuples of the plot function, its arguments and the path to
+        write it to.
+    """
+    teams = list(FRANCHISES) if teams is None else teams
+    stats = STAT_NAMES if stats is None else stats
+    jobs = []
+    for stat in stats:
+        for playoff in (False, True):
+            season_type = 'playoffs' if playoff else 'season'
+            jobs.append((season_summary_visual,
+                (stat, playoff, DATA_NAMES[stat], f'League Average {stat}'),
+                f'{out_dir}/league/{stat}_{season_type}.{image_format}'))
+            jobs.append((nba_stat_plot, (stat, playoff),
+                f'{out_dir}/spread/{stat}_{season_type}.{image_format}'))
+            for team in teams:
+                jobs.append((team_summary_visual, (team, stat, playoff),
+                    f'{out_dir}/teams/{team}/{stat}_{season_type}' +
+                    f'.{image_format}'))
+        jobs.append((edge_case_graph, (stat,),
+            f'{out_dir}/edge_cases/{stat}.{image_format}'))
+    for team in teams:
+        jobs.append((interactive_map, (team,),
+            f'{out_dir}/teams/{team}/summary.html'))
+    return jobs
+
+
+def _render_job(job):
+    """
+    Renders one chart of the catalog in a worker process.
     Args:
-        team: A string containing a team name from the NBA.
+        job: A tuple as returned by chart_jobs.
+    Returns:
+        A string with the path written.
+    """
+    plot, args, path = job
+    render(plot, *args, path=path)
+    return path
 
+
+@instrumented('graphs')
+def render_catalog(out_dir, teams=None, stats=None, image_format='png',
+    max_workers=None):
+    """
+    Renders every team, stat and season type chart of the scrapped data to
+    files, across a pool of processes.
+    Args:
+        out_dir: A string representing the folder to write the charts to.
+        teams: An optional list of team names or franchise IDs, every
+        franchise by default.
+        stats: An optional list of stats, every stat in STAT_NAMES by
+        default.
+        image_format: A string with the format of matplotlib charts, 'png',
+        'svg' or 'html'.
+        max_workers: An optional int representing the number of processes,
+        the number of CPUs by default.
     Returns:
-        An interactive plot with a dropdown to observe a NBA stat for
-        a team over the scrapped  data sets.
-    """
-    team_summary_df = team_summary(team)
-    fig = go.Figure()
-    for column in team_summary_df.columns.to_list():
-        fig.add_trace(
-            go.Scatter(
-                x = team_summary_df.index,
-                y = team_summary_df[column],
-                name = column
-            )
-        )
-
-    button_initial = dict(label = 'Please Select One', method = 'update',
-                      args = [{'title':'Please Select One',
-                               'showlegend':True}])
-
-    def create_layout_button(column):
-        return dict(label = column,
-                    method = 'update',
-                    args = [{'visible': team_summary_df.columns.isin([column]),
-                             'title': column,
-                             'showlegend': True}])
-
-    fig.update_layout(
-        updatemenus=[go.layout.Updatemenu(
-            active = 0,
-            buttons = [button_initial] + \
-            list(team_summary_df.columns.map(lambda column: create_layout_button(column)))
-            )
-        ],
-        yaxis_type="log"
-    )
-    fig.update_layout(
-        title_text=f"{team} Team Summary",
-        height=800
-    )
-    fig.show()
+        A list of strings with the paths written.
+    """
+    jobs = chart_jobs(out_dir, teams, stats, image_format)
+    # Writes the figure specs once, before the workers read them.
+    load_specs()
+    workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_render_job, jobs,
+            chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+if __name__ == '__main__':
+    paths = render_catalog(sys.argv[1] if len(sys.argv) > 1 else 'charts')
+    print(f'{len(paths)} charts rendered')
@@ -0,0 +1,265 @@
+"""
+Opt-in timing and profiling of the scraper, the analysis and the graphs.
+
+Instrumented functions are recorded as spans only between enable() and
+disable(); otherwise they cost one check per call. Every span records its
+wall time, the peak memory it allocated (when enabled with memory=True,
+through tracemalloc) and counters such as bytes fetched, rows parsed and
+cache hits and misses, which the code being measured reports with count().
+A span's counters include those of the spans it contains.
+
+Stages ('scraper', 'analysis', 'graphs') can also be run under cProfile,
+for example enable(profile=['analysis']), and the trace exported to JSON
+or CSV with write_trace. Spans are only recorded in the thread and process
+that enabled them, so charts rendered by graphs.render_catalog in other
+processes are not traced.
+"""
+import os
+import json
+import time
+import pstats
+import cProfile
+import functools
+import threading
+import contextlib
+import tracemalloc
+import pandas as pd
+
+COUNTERS = ['bytes', 'rows', 'cache_hits', 'cache_misses']
+
+_state = {'records': None, 'memory': False, 'profile': set(),
+    'profilers': {}, 'origin': 0.0, 'thread': None}
+
+_stack = []
+
+
+def enable(memory=False, profile=None):
+    """
+    Starts recording instrumented calls, dropping any previous trace.
+    Args:
+        memory: A boolean representing whether to measure the peak memory
+        of every span, which slows Python code down.
+        profile: An optional list of the stages to run under cProfile.
+    """
+    _state.update(records=[], memory=memory, profile=set(profile or []),
+        profilers={}, origin=time.perf_counter(),
+        thread=threading.get_ident())
+    _stack.clear()
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    """
+    Stops recording.
+    Returns:
+        A list of dictionaries of the recorded spans, see trace.
+    """
+    records = trace()
+    _state['records'] = None
+    if _state['memory'] and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return records
+
+
+def enabled():
+    """
+    Checks whether calls are being recorded in this thread.
+    Returns:
+        A boolean.
+    """
+    return _state['records'] is not None and \
+        _state['thread'] == threading.get_ident()
+
+
+def count(counter, amount=1):
+    """
+    Adds to a counter of the innermost running span, if any.
+    Args:
+        counter: A string, usually one of COUNTERS.
+        amount: A number to add.
+    """
+    if _stack and enabled():
+        counters = _stack[-1]['counters']
+        counters[counter] = counters.get(counter, 0) + amount
+
+
+def _start_profiler(stage):
+    """
+    Starts profiling a stage, unless a profiler is already running, in
+    which case the outer stage gets the time.
+    Args:
+        stage: A string with the stage name.
+    Returns:
+        The running cProfile.Profile, or None.
+    """
+    if stage not in _state['profile'] or \
+        any(running['profiler'] for running in _stack):
+        return None
+    profiler = _state['profilers'].setdefault(stage, cProfile.Profile())
+    profiler.enable()
+    return profiler
+
+
+@contextlib.contextmanager
+def span(name, stage):
+    """
+    Records a block of code as a span, when recording is enabled.
+    Args:
+        name: A string naming the span, like 'data_analysis.team_summary'.
+        stage: A string with the stage of the span.
+    Yields:
+        A dictionary of the span's counters, which can be added to
+        directly, or None when recording is disabled.
+    """
+    if not enabled():
+        yield None
+        return
+
+    memory = _state['memory'] and tracemalloc.is_tracing()
+    if memory:
+        current, peak = tracemalloc.get_traced_memory()
+        if _stack:
+            _stack[-1]['peak'] = max(_stack[-1]['peak'], peak)
+        tracemalloc.reset_peak()
+    record = {'name': name, 'stage': stage, 'depth': len(_stack),
+        'parent': _stack[-1]['name'] if _stack else None, 'counters': {},
+        'start_memory': current if memory else 0, 'peak': 0,
+        'profiler': None}
+    _stack.append(record)
+    record['profiler'] = _start_profiler(stage)
+    start = time.perf_counter()
+    try:
+        yield record['counters']
+    finally:
+        end = time.perf_counter()
+        if record['profiler']:
+            record['profiler'].disable()
+        _stack.pop()
+        row = {'name': name, 'stage': stage, 'depth': record['depth'],
+            'parent': record['parent'], 'start_s': start - _state['origin'],
+            'wall_s': end - start}
+        if memory:
+            peak = max(tracemalloc.get_traced_memory()[1], record['peak'])
+            row['peak_mb'] = (peak - record['start_memory']) / 2 ** 20
+            if _stack:
+                _stack[-1]['peak'] = max(_stack[-1]['peak'], peak)
+        row.update({counter: record['counters'].get(counter, 0)
+            for counter in COUNTERS})
+        row.update(record['counters'])
+        if _stack:
+            parent = _stack[-1]['counters']
+            for counter, amount in record['counters'].items():
+                parent[counter] = parent.get(counter, 0) + amount
+        if _state['records'] is not None:
+            _state['records'].append(row)
+
+
+def instrumented(stage):
+    """
+    Records every call of a function as a span named after it.
+    Args:
+        stage: A string with the stage of the function.
+    Returns:
+        A decorator. Put it under functools.lru_cache so only the calls
+        that miss the cache are recorded.
+    """
+    def decorator(function):
+        name = f'{function.__module__}.{function.__qualname__}'
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _state['records'] is None:
+                return function(*args, **kwargs)
+            with span(name, stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace():
+    """
+    Gets the spans recorded since enable() in the order they ended, so
+    inner spans come before the span that contains them.
+    Returns:
+        A list of dictionaries with the span 'name', 'stage', 'depth',
+        'parent', 'start_s' and 'wall_s' in seconds since enable(),
+        'peak_mb' with memory=True, and one key per counter.
+    """
+    return list(_state['records'] or [])
+
+
+def summary(records=None):
+    """
+    Totals the spans of every function.
+    Args:
+        records: An optional list of spans as returned by trace, the
+        current trace by default.
+    Returns:
+        A Pandas dataframe indexed by span name with the number of calls,
+        the total and largest wall time, the largest peak memory when it
+        was measured and the summed counters, slowest first.
+    """
+    frame = pd.DataFrame(trace() if records is None else records)
+    if frame.empty:
+        return frame
+    totals = {'calls': ('wall_s', 'size'), 'wall_s': ('wall_s', 'sum'),
+        'max_wall_s': ('wall_s', 'max')}
+    if 'peak_mb' in frame:
+        totals['peak_mb'] = ('peak_mb', 'max')
+    totals.update({counter: (counter, 'sum') for counter in frame.columns
+        if counter not in ['name', 'stage', 'depth', 'parent', 'start_s',
+            'wall_s', 'peak_mb']})
+    return frame.groupby('name').agg(**totals).sort_values('wall_s',
+        ascending=False)
+
+
+def write_trace(path, records=None):
+    """
+    Saves the spans to a file.
+    Args:
+        path: A string ending in '.json' or '.csv'.
+        records: An optional list of spans as returned by trace, the
+        current trace by default.
+    Raises:
+        ValueError for other file extensions.
+    """
+    records = trace() if records is None else records
+    extension = os.path.splitext(path)[1]
+    if extension == '.json':
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(records, file, indent=1)
+    elif extension == '.csv':
+        pd.DataFrame(records).to_csv(path, index=False)
+    else:
+        raise ValueError(f'Cannot write a trace to {extension} files')
+
+
+def profile_stats(stage):
+    """
+    Gets the cProfile statistics of a stage profiled since enable().
+    Args:
+        stage: A string with the stage name.
+    Returns:
+        A pstats.Stats, or None if the stage was not profiled.
+    """
+    profiler = _state['profilers'].get(stage)
+    return None if profiler is None else pstats.Stats(profiler)
+
+
+def write_profiles(folder):
+    """
+    Saves the cProfile statistics of every profiled stage, to be read with
+    pstats or snakeviz.
+    Args:
+        folder: A string representing the folder to write '<stage>.prof'
+        files to.
+    Returns:
+        A list of strings with the paths written.
+    """
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for stage, profiler in _state['profilers'].items():
+        paths.append(os.path.join(folder, f'{stage}.prof'))
+        profiler.dump_stats(paths[-1])
+    return paths
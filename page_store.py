@@ -0,0 +1,188 @@
+"""
+Local store of downloaded pages, so the scraper can parse them again
+without going back to the network.
+
+Pages are saved gzip-compressed under the SHA-1 of their content, so a page
+downloaded twice is only stored once. When the store grows past its size
+cap, the least recently used pages are deleted first.
+"""
+import os
+import gzip
+import json
+import hashlib
+
+STORE_DIR = 'Data/pages'
+MAX_BYTES = 256 * 1024 * 1024
+
+
+def _store_dir(store_dir):
+    """
+    Gets the folder of the page store.
+    Args:
+        store_dir: A string representing the folder, or None for STORE_DIR.
+    Returns:
+        A string with the folder of the page store.
+    """
+    return STORE_DIR if store_dir is None else store_dir
+
+
+def _object_path(sha1, store_dir):
+    """
+    Gets the path of a stored page.
+    Args:
+        sha1: A string with the hex SHA-1 of the page content.
+        store_dir: A string representing the folder of the page store.
+    Returns:
+        A string with the path of the compressed page.
+    """
+    return os.path.join(store_dir, 'objects', sha1[:2], f'{sha1}.gz')
+
+
+def _read_index(store_dir):
+    """
+    Reads the index of stored pages and the size of the store.
+    Args:
+        store_dir: A string representing the folder of the page store.
+    Returns:
+        A tuple of a dictionary as returned by load_index and an int with
+        the bytes of every stored page, or None if the index was written
+        before the size was kept in it.
+    """
+    path = os.path.join(store_dir, 'index.json')
+    if not os.path.exists(path):
+        return {}, None
+    with open(path, encoding='utf-8') as index_file:
+        index = json.load(index_file)
+    if 'pages' not in index:
+        return index, None
+    return index['pages'], index['bytes']
+
+
+def load_index(store_dir=None):
+    """
+    Loads the index of stored pages.
+    Args:
+        store_dir: An optional string representing the folder of the store.
+    Returns:
+        A dictionary where keys are URLs and values are the SHA-1 of the
+        last content stored for that URL.
+    """
+    return _read_index(_store_dir(store_dir))[0]
+
+
+def _save_index(index, total, store_dir):
+    """
+    Saves the index of stored pages.
+    Args:
+        index: A dictionary as returned by load_index.
+        total: An int with the bytes of every stored page.
+        store_dir: A string representing the folder of the page store.
+    """
+    path = os.path.join(store_dir, 'index.json')
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as index_file:
+        json.dump({'pages': index, 'bytes': total}, index_file, indent=1,
+            sort_keys=True)
+    os.replace(f'{path}.tmp', path)
+
+
+def _stored_objects(store_dir):
+    """
+    Lists the stored pages by walking the objects folder.
+    Args:
+        store_dir: A string representing the folder of the page store.
+    Returns:
+        A list of tuples of the modification time in nanoseconds, the size
+        in bytes and the SHA-1 of every stored page.
+    """
+    objects_dir = os.path.join(store_dir, 'objects')
+    if not os.path.isdir(objects_dir):
+        return []
+    objects = []
+    for folder in os.listdir(objects_dir):
+        for name in os.listdir(os.path.join(objects_dir, folder)):
+            if name.endswith('.gz'):
+                stat = os.stat(os.path.join(objects_dir, folder, name))
+                objects.append((stat.st_mtime_ns, stat.st_size, name[:-3]))
+    return objects
+
+
+def put_page(url, content, store_dir=None, max_bytes=MAX_BYTES):
+    """
+    Stores the content of a downloaded page.
+    Args:
+        url: A string representing the URL the page was downloaded from.
+        content: The bytes of the page.
+        store_dir: An optional string representing the folder of the store.
+        max_bytes: An int representing the size cap of the store on disk.
+    Returns:
+        A string with the hex SHA-1 of the content.
+    The size of the store is kept in its index, so pages are only evicted,
+    which walks the whole store, once it grows past max_bytes.
+    """
+    store_dir = _store_dir(store_dir)
+    index, total = _read_index(store_dir)
+    if total is None:
+        total = sum(size for _, size, _ in _stored_objects(store_dir))
+    sha1 = hashlib.sha1(content).hexdigest()
+    path = _object_path(sha1, store_dir)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(f'{path}.tmp', 'wb') as page_file:
+            page_file.write(content)
+        os.replace(f'{path}.tmp', path)
+        total += os.path.getsize(path)
+    else:
+        os.utime(path)
+
+    index[url] = sha1
+    _save_index(index, total, store_dir)
+    if total > max_bytes:
+        evict(max_bytes, store_dir)
+    return sha1
+
+
+def get_page(url, store_dir=None):
+    """
+    Gets the last stored content of a page.
+    Args:
+        url: A string representing the URL of the page.
+        store_dir: An optional string representing the folder of the store.
+    Returns:
+        The bytes of the page, or None if it is not in the store.
+    """
+    store_dir = _store_dir(store_dir)
+    sha1 = load_index(store_dir).get(url)
+    if sha1 is None or not os.path.exists(_object_path(sha1, store_dir)):
+        return None
+    path = _object_path(sha1, store_dir)
+    os.utime(path)
+    with gzip.open(path, 'rb') as page_file:
+        return page_file.read()
+
+
+def evict(max_bytes=MAX_BYTES, store_dir=None):
+    """
+    Deletes the least recently used pages until the store fits its cap.
+    Args:
+        max_bytes: An int representing the size cap of the store on disk.
+        store_dir: An optional string representing the folder of the store.
+    Returns:
+        A list of strings with the SHA-1 of the deleted pages.
+    """
+    store_dir = _store_dir(store_dir)
+    objects = _stored_objects(store_dir)
+    if not objects:
+        return []
+    total = sum(size for _, size, _ in objects)
+    evicted = []
+    for _, size, sha1 in sorted(objects):
+        if total <= max_bytes:
+            break
+        os.remove(_object_path(sha1, store_dir))
+        total -= size
+        evicted.append(sha1)
+
+    index = load_index(store_dir)
+    _save_index({url: sha1 for url, sha1 in index.items()
+        if sha1 not in evicted}, total, store_dir)
+    return evicted
@@ -0,0 +1,330 @@
+"""
+Bootstrap confidence intervals and permutation p-values for the Moreyball
+metrics: the R^2 of stats against the win percentage, the edge case metric
+and the mean stats by playoffs round.
+
+Every season is packed in a (season, team, column) array whose first
+column is the label (win percentage, making the playoffs or rounds won)
+and the other columns are stats. Replicates are drawn in batches as
+(replicate, season, team, column) arrays, resampling or permuting teams
+within each season, so a batch is computed with a few NumPy calls. Batches
+run across a pool of processes, each with its own random stream spawned
+from one seed, so results only depend on the seed and batch size.
+"""
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from data_analysis import load_playoff_outcomes, team_stats, win_stat_frame, \
+    season_arrays, pearson_coefficients, STAT_NAMES
+
+REPLICATES = 10000
+
+BATCH_SIZE = 500
+
+
+def r_squared(arrays):
+    """
+    Gets the R^2 of the label with every stat.
+    Args:
+        arrays: A (..., season, team, column) NumPy array where the first
+        column is the win percentage.
+    Returns:
+        A (..., season, stat) NumPy array.
+    """
+    return pearson_coefficients(arrays)[0] ** 2
+
+
+def edge_metric(arrays, k=5):
+    """
+    Gets the edge case metric of every stat, see
+    data_analysis.edge_cases_metric.
+    Args:
+        arrays: A (..., season, team, column) NumPy array where the first
+        column is 1 for teams that made the playoffs and 0 otherwise.
+        k: An int representing how many of the top and bottom teams of
+        each stat count as edge cases.
+    Returns:
+        A (..., season, stat) NumPy array.
+    """
+    values = arrays[..., 1:]
+    made = np.broadcast_to(arrays[..., :1] > 0, values.shape)
+    order = np.argsort(values, axis=-2, kind='stable')
+    made = np.take_along_axis(made, order, axis=-2)
+    position = np.arange(values.shape[-2])[:, np.newaxis]
+    count = (~np.isnan(values)).sum(axis=-2, keepdims=True)
+    top = made & (position >= count - k) & (position < count)
+    bottom = made & (position < np.minimum(count, k))
+    return top.sum(axis=-2) - bottom.sum(axis=-2)
+
+
+def round_means(arrays, rounds=5):
+    """
+    Gets the mean of every stat by playoffs round, over every season.
+    Args:
+        arrays: A (..., season, team, column) NumPy array where the first
+        column is the number of playoffs series' won.
+        rounds: An int representing the number of possible outcomes.
+    Returns:
+        A (..., round, stat) NumPy array.
+    """
+    outcome = (arrays[..., 0, np.newaxis] == np.arange(rounds)).astype(float)
+    values = arrays[..., 1:]
+    valid = ~np.isnan(values)
+    sums = np.einsum('...str,...stv->...rv', outcome, np.where(valid, values, 0))
+    counts = np.einsum('...str,...stv->...rv', outcome, valid.astype(float))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts
+
+
+def seed_streams(seed, count):
+    """
+    Spawns independent random streams from one seed.
+    Args:
+        seed: An int, or None for fresh entropy.
+        count: An int representing the number of streams.
+    Returns:
+        A list of NumPy SeedSequences.
+    """
+    return np.random.SeedSequence(seed).spawn(count)
+
+
+def _team_counts(arrays):
+    """
+    Counts the teams of every season of a padded array.
+    Args:
+        arrays: A (season, team, column) NumPy array as returned by
+        data_analysis.season_arrays, where padding rows are all NaN.
+    Returns:
+        A NumPy array of ints with the number of teams of every season.
+    """
+    return (~np.isnan(arrays).all(axis=2)).sum(axis=1)
+
+
+def _replicate(arrays, method, size, rng):
+    """
+    Draws a batch of resampled seasons.
+    Args:
+        arrays: A (season, team, column) NumPy array.
+        method: A string, 'bootstrap' to draw teams with replacement within
+        each season, or 'permutation' to shuffle the first column between
+        the teams of each season.
+        size: An int representing the number of replicates.
+        rng: A NumPy random Generator.
+    Returns:
+        A (replicate, season, team, column) NumPy array, padded with NaN
+        like arrays.
+    """
+    seasons, teams, _ = arrays.shape
+    counts = _team_counts(arrays)[:, np.newaxis]
+    padding = np.arange(teams) >= counts
+    if method == 'bootstrap':
+        rows = (rng.random((size, seasons, teams)) * counts).astype(int)
+        batch = arrays[np.arange(seasons)[:, np.newaxis], rows]
+        batch[:, padding] = np.nan
+        return batch
+    if method == 'permutation':
+        keys = rng.random((size, seasons, teams))
+        keys[:, padding] = np.inf
+        order = np.argsort(keys, axis=-1)
+        batch = np.repeat(arrays[np.newaxis], size, axis=0)
+        batch[..., 0] = np.take_along_axis(batch[..., 0], order, axis=-1)
+        return batch
+    raise ValueError(f"method must be 'bootstrap' or 'permutation', not {method}")
+
+
+def _run_batch(job):
+    """
+    Computes a statistic over one batch of replicates.
+    Args:
+        job: A tuple of the arrays, the statistic, the method, the number of
+        replicates, the SeedSequence and the keyword arguments of the
+        statistic.
+    Returns:
+        A (replicate, ...) NumPy array.
+    """
+    arrays, statistic, method, size, stream, kwargs = job
+    batch = _replicate(arrays, method, size, np.random.default_rng(stream))
+    return statistic(batch, **kwargs)
+
+
+def resample(arrays, statistic, method='bootstrap', replicates=REPLICATES,
+    seed=0, batch_size=BATCH_SIZE, max_workers=None, **kwargs):
+    """
+    Computes a statistic over many bootstrap or permutation replicates.
+    Args:
+        arrays: A (season, team, column) NumPy array as returned by
+        data_analysis.season_arrays.
+        statistic: A function of a (..., season, team, column) array, such
+        as r_squared, edge_metric or round_means. It must be defined at
+        module level to be sent to other processes.
+        method: A string, 'bootstrap' or 'permutation', see _replicate.
+        replicates: An int representing the number of replicates.
+        seed: An int seeding the random streams, or None.
+        batch_size: An int representing the number of replicates computed
+        at once, which bounds memory.
+        max_workers: An optional int representing the number of processes,
+        the number of CPUs by default. 1 runs in this process.
+        kwargs: Keyword arguments of the statistic.
+    Returns:
+        A (replicate, ...) NumPy array of the statistic.
+    """
+    sizes = [min(batch_size, replicates - start)
+        for start in range(0, replicates, batch_size)]
+    jobs = [(arrays, statistic, method, size, stream, kwargs)
+        for size, stream in zip(sizes, seed_streams(seed, len(sizes)))]
+    workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        return np.concatenate([_run_batch(job) for job in jobs])
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return np.concatenate(list(executor.map(_run_batch, jobs)))
+
+
+def confidence_interval(replicates, level=0.95):
+    """
+    Gets the percentile confidence interval of bootstrap replicates.
+    Args:
+        replicates: A (replicate, ...) NumPy array as returned by resample.
+        level: A float representing the confidence level.
+    Returns:
+        A tuple of two NumPy arrays with the lower and upper bounds.
+    """
+    with warnings.catch_warnings():
+        # Statistics undefined in every replicate, like the R^2 of a
+        # constant stat, stay NaN.
+        warnings.simplefilter('ignore', RuntimeWarning)
+        low, high = np.nanpercentile(replicates,
+            [50 * (1 - level), 50 * (1 + level)], axis=0)
+    return low, high
+
+
+def p_value(observed, null, alternative='two-sided'):
+    """
+    Gets the permutation p-value of an observed statistic.
+    Args:
+        observed: A NumPy array of the statistic of the data.
+        null: A (replicate, ...) NumPy array of permutation replicates, as
+        returned by resample.
+        alternative: A string, 'greater' to test if the statistic is larger
+        than by chance, or 'two-sided' to test if it is further from the
+        mean of the replicates.
+    Returns:
+        A NumPy array of p-values, counting the observed statistic as one of
+        the replicates so they are never 0, and NaN where the observed
+        statistic is.
+    """
+    if alternative == 'greater':
+        extreme = null >= observed
+    else:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            center = np.nanmean(null, axis=0)
+        extreme = np.abs(null - center) >= np.abs(observed - center)
+    p_values = (extreme.sum(axis=0) + 1) / (null.shape[0] + 1)
+    return np.where(np.isnan(observed), np.nan, p_values)
+
+
+def _summary(arrays, statistic, index, stats, alternative, replicates, seed,
+    level, max_workers, **kwargs):
+    """
+    Computes a statistic with its confidence interval and p-value.
+    Args:
+        arrays: A (season, team, column) NumPy array.
+        statistic: A function as taken by resample.
+        index: A Pandas index of the rows of the statistic.
+        stats: A list of strings of the stats, the columns of the statistic.
+        alternative: A string as taken by p_value.
+        replicates, seed, level, max_workers: See win_r_squared_test.
+        kwargs: Keyword arguments of the statistic.
+    Returns:
+        A Pandas dataframe, see win_r_squared_test.
+    """
+    observed = statistic(arrays, **kwargs)
+    low, high = confidence_interval(resample(arrays, statistic, 'bootstrap',
+        replicates, seed, max_workers=max_workers, **kwargs), level)
+    null = resample(arrays, statistic, 'permutation', replicates,
+        None if seed is None else seed + 1, max_workers=max_workers, **kwargs)
+    measures = {'Estimate': observed, 'CI Low': low, 'CI High': high,
+        'p-value': p_value(observed, null, alternative)}
+    return pd.concat({measure: pd.DataFrame(values, index=index, columns=stats)
+        for measure, values in measures.items()}, axis=1)
+
+
+def win_r_squared_test(stats=None, playoff=False, replicates=REPLICATES,
+    seed=0, level=0.95, max_workers=None):
+    """
+    Tests the R^2 of stats against the regular season win percentage, see
+    data_analysis.win_compare_r_squared.
+    Args:
+        stats: An optional list of strings of the stats, every stat in
+        DATA_NAMES by default.
+        playoff: A boolean representing whether to use playoff or regular
+        season stats.
+        replicates: An int representing the number of bootstrap and of
+        permutation replicates.
+        seed: An int seeding the random streams, or None.
+        level: A float representing the confidence level.
+        max_workers: An optional int representing the number of processes.
+    Returns:
+        A Pandas dataframe indexed by season, with two column levels: the
+        measure ('Estimate', 'CI Low', 'CI High', 'p-value') and the stat.
+        p-values test whether the R^2 is larger than with shuffled win
+        percentages.
+    """
+    stats = STAT_NAMES if stats is None else list(stats)
+    years, arrays = season_arrays(win_stat_frame(stats, playoff))
+    return _summary(arrays, r_squared, pd.Index(years, name='Year'), stats,
+        'greater', replicates, seed, level, max_workers)
+
+
+def edge_cases_test(stats=None, k=5, playoff=False, replicates=REPLICATES,
+    seed=0, level=0.95, max_workers=None):
+    """
+    Tests the edge case metric of stats, see data_analysis.edge_cases_matrix.
+    Args:
+        stats: An optional list of strings of the stats, every stat in
+        DATA_NAMES by default.
+        k: An int representing how many of the top and bottom teams of
+        each stat count as edge cases.
+        playoff, replicates, seed, level, max_workers: See
+        win_r_squared_test.
+    Returns:
+        A Pandas dataframe like win_r_squared_test. p-values test whether
+        the metric is further from 0 than if playoffs teams were drawn at
+        random.
+    """
+    stats = STAT_NAMES if stats is None else list(stats)
+    outcomes = load_playoff_outcomes()
+    teams = team_stats(stats, playoff)
+    teams = teams[teams.index.get_level_values('Year').isin(
+        outcomes.index.get_level_values('Year'))]
+    teams.insert(0, 'Made_Playoffs', teams.index.isin(outcomes.index))
+    years, arrays = season_arrays(teams)
+    return _summary(arrays, edge_metric, pd.Index(years, name='Year'), stats,
+        'two-sided', replicates, seed, level, max_workers, k=k)
+
+
+def playoff_round_test(stats=None, playoff=False, replicates=REPLICATES,
+    seed=0, level=0.95, max_workers=None):
+    """
+    Tests the mean stats by playoffs round over every season, see
+    data_analysis.playoff_round_stats.
+    Args:
+        stats: An optional list of strings of the stats, every stat in
+        DATA_NAMES by default.
+        playoff, replicates, seed, level, max_workers: See
+        win_r_squared_test.
+    Returns:
+        A Pandas dataframe like win_r_squared_test, indexed by round.
+        p-values test whether the mean is further from the mean of all
+        playoffs teams than if rounds were drawn at random.
+    """
+    stats = STAT_NAMES if stats is None else list(stats)
+    outcomes = load_playoff_outcomes().rename('Round')
+    teams = outcomes.to_frame().join(team_stats(stats, playoff), how='inner')
+    _, arrays = season_arrays(teams)
+    rounds = int(teams['Round'].max()) + 1
+    return _summary(arrays, round_means, pd.Index(range(rounds), name='Round'),
+        stats, 'two-sided', replicates, seed, level, max_workers,
+        rounds=rounds)
@@ -2,173 +2,643 @@
 Data scrapper functions to collect data from basketball-reference.com
 """
 
+import os
+import hashlib
+import datetime
 import pandas as pd
 from tqdm import tqdm
-from requests import get
-from bs4 import BeautifulSoup
+from fetch import fetch_all, make_session, load_manifest, save_manifest, \
+    conditional_headers, manifest_entry
+from page_store import put_page, get_page
+from tables import extract_table
+from instrument import instrumented, count
 
+FIRST_YEAR = 2010
 
-def run_scraper():
+WIDGET_URL = "https://widgets.sports-reference.com/wg.fcgi?css=1&site=bbr&" + \
+    "url={page}&div={div}"
+
+# Errors raised by the parse functions on truncated or malformed pages,
+# including lxml's XMLSyntaxError for empty ones.
+PARSE_ERRORS = (ValueError, IndexError, KeyError, SyntaxError)
+
+
+def shooting_url(year, playoff):
+    """
+    Gets the URL of the team shooting table of a season.
+
+    Args:
+        year: An int representing the year of data.
+        playoff: A boolean representing whether to get the playoffs or
+        regular season table.
+
+    Returns:
+        A string with the URL of the table.
+    """
+    league = 'playoffs' if playoff else 'leagues'
+    return WIDGET_URL.format(page=f"%2F{league}%2FNBA_{year}.html",
+        div="div_team_shooting")
+
+
+def win_data_url(year):
+    """
+    Gets the URL of the season page holding the standings of a season.
+
+    Args:
+        year: An int representing the year of data.
+
+    Returns:
+        A string with the URL of the page.
+    """
+    return f"https://www.basketball-reference.com/leagues/NBA_{year}.html"
+
+
+def playoff_series_url(year):
+    """
+    Gets the URL of the expanded playoffs standings table of a season.
+
+    Args:
+        year: An int representing the year of data.
+
+    Returns:
+        A string with the URL of the table.
+    """
+    return WIDGET_URL.format(page=f"%2Fplayoffs%2FNBA_{year}_standings.html",
+        div="div_expanded_standings")
+
+
+def efg_url(year):
+    """
+    Gets the URL of the miscellaneous stats table of a season.
+
+    Args:
+        year: An int representing the year of data.
+
+    Returns:
+        A string with the URL of the table.
+    """
+    return WIDGET_URL.format(page=f"%2Fleagues%2FNBA_{year}.html",
+        div="div_misc_stats")
+
+
+def current_season(today=None):
+    """
+    Gets the most recent season that has started. Seasons are named after
+    the year they end in, and start in October.
+
+    Args:
+        today: An optional datetime.date to use instead of today's date.
+
+    Returns:
+        An int representing the year of the season.
+    """
+    today = today or datetime.date.today()
+    return today.year + 1 if today.month >= 10 else today.year
+
+
+def season_years(first_year=FIRST_YEAR, last_year=None):
+    """
+    Gets the range of seasons to scrape.
+
+    Args:
+        first_year: An int representing the first season to scrape.
+        last_year: An optional int representing the last season to scrape,
+        the current season by default.
+
+    Returns:
+        A range of ints representing the years.
+    """
+    return range(first_year, (last_year or current_season()) + 1)
+
+
+def is_final(year, today=None):
+    """
+    Checks whether a season is over, so its pages will not change anymore.
+    Seasons are treated as final from November of the year they end in,
+    since some (like 2020) ran late into the fall.
+
+    Args:
+        year: An int representing the year of the season.
+        today: An optional datetime.date to use instead of today's date.
+
+    Returns:
+        A boolean, True if the season is final.
+    """
+    return (today or datetime.date.today()) >= datetime.date(year, 11, 1)
+
+
+def has_output(entry):
+    """
+    Checks whether the file a page recorded in the manifest was saved to
+    still exists.
+
+    Args:
+        entry: A dictionary from the manifest, or None.
+
+    Returns:
+        A boolean, True if the page can be skipped when it did not change.
+    """
+    return bool(entry) and os.path.exists(entry['path'])
+
+
+def is_fresh(entry):
+    """
+    Checks whether a page recorded in the manifest can be skipped.
+
+    Args:
+        entry: A dictionary from the manifest, or None.
+
+    Returns:
+        A boolean, True if the page belongs to a final season and the file
+        it was saved to still exists.
+    """
+    return has_output(entry) and entry['final']
+
+
+@instrumented('scraper')
+def fetch_pages(urls, manifest, session=None):
+    """
+    Downloads the pages that are missing or may have changed, sending
+    If-None-Match and If-Modified-Since headers when they were seen before
+    and the file they were saved to still exists.
+
+    Args:
+        urls: An iterable of strings representing the URLs of the pages.
+        manifest: A dictionary as returned by fetch.load_manifest.
+        session: An optional requests Session to share.
+
+    Returns:
+        A dictionary as returned by fetch.fetch_all. Fresh pages are left
+        out.
+    """
+    urls = list(urls)
+    fresh = {url for url in urls if is_fresh(manifest.get(url))}
+    count('cache_hits', len(fresh))
+    urls = [url for url in urls if url not in fresh]
+    headers = {url: conditional_headers(manifest.get(url)) for url in urls
+        if has_output(manifest.get(url))}
+    responses = fetch_all(urls, session, headers=headers)
+    count('bytes', sum(len(response.content) for response in responses.values()
+        if not isinstance(response, Exception)))
+    return responses
+
+
+def all_urls(years):
+    """
+    Gets every URL the scraper needs for the given years.
+
+    Args:
+        years: An iterable of ints representing the years to scrape.
+
+    Returns:
+        A list of strings with the URLs.
+    """
+    urls = []
+    for year in years:
+        urls += [shooting_url(year, True), shooting_url(year, False),
+            win_data_url(year), playoff_series_url(year), efg_url(year)]
+    return urls
+
+
+@instrumented('scraper')
+def run_scraper(years=None, offline=False):
     """
     Runs all of the scraper methods.
     Note: Requires folders 'Data/efg', 'Data/season_shooting',
     'Data/win-loss', and 'Data/playoffs_outcome' to exist.
+
+    Every page is downloaded concurrently first, then parsed. Pages of
+    final seasons already on disk are skipped, other known pages are only
+    parsed again if they changed. Pages that still fail after retrying are
+    reported and skipped.
+
+    Every downloaded page is kept in the page store, so with offline set
+    the pages can be parsed again (for example after changing a parse
+    function) without any network access.
+
+    Args:
+        years: An optional iterable of ints representing the years to
+        scrape, every season from FIRST_YEAR to the current one by default.
+        offline: A boolean representing whether to parse every page from
+        the page store instead of downloading it.
+
+    Returns:
+        A dictionary where keys are the URLs that could not be downloaded
+        or parsed and values are the errors.
     """
+    years = season_years() if years is None else years
+    manifest = load_manifest()
+    failures = {}
     with tqdm(total = 6, desc="Running Scraper") as pbar:
+        responses = {}
+        if not offline:
+            with make_session() as session:
+                responses = fetch_pages(all_urls(years), manifest, session)
         pbar.update(1)
-        get_shooting_playoffs()
-        pbar.update(1)
-        get_shooting_reg_season()
-        pbar.update(1)
-        get_win_data()
-        pbar.update(1)
-        get_playoff_series_won()
-        pbar.update(1)
-        get_efg()
-        pbar.update(1)
-        print("Scraper done running")
+        for get_table in [get_shooting_playoffs, get_shooting_reg_season,
+            get_win_data, get_playoff_series_won, get_efg]:
+            failures.update(get_table(years, responses, manifest, offline))
+            pbar.update(1)
+    missing = [url for url, error in failures.items()
+        if offline and isinstance(error, LookupError)]
+    if missing:
+        print(f"{len(missing)} pages are not in the page store")
+    for url, error in failures.items():
+        if url not in missing:
+            print(f"Failed to scrape {url}: {error}")
+    print("Scraper done running")
+    return failures
+
+
+def scrape_years(url_for_year, parse, years=None, responses=None,
+    manifest=None, output_path=None, offline=False):
+    """
+    Downloads one page per year and parses the ones that changed.
+
+    Args:
+        url_for_year: A function taking an int year and returning the URL
+        of the page to parse.
+        parse: A function taking the page content and the int year and
+        returning the parsed data.
+        years: An optional iterable of ints representing the years to
+        scrape, every season by default.
+        responses: An optional dictionary of already downloaded pages, as
+        returned by fetch.fetch_all. Missing pages are downloaded.
+        manifest: An optional dictionary as returned by fetch.load_manifest.
+        It is updated with the pages that were parsed.
+        output_path: A function taking an int year and returning the path
+        the parsed data will be saved to. Needed to update the manifest.
+        offline: A boolean representing whether to parse every page from
+        the page store instead of downloading it.
+
+    Returns:
+        A tuple of two dictionaries: the parsed data by year, and the
+        errors by URL for pages that could not be downloaded or parsed,
+        which do not stop the other years from being parsed. Pages that
+        are fresh, not modified or identical to the last download are in
+        neither.
+    """
+    years = season_years() if years is None else years
+    manifest = {} if manifest is None else manifest
+    urls = {year: url_for_year(year) for year in years}
+    if offline:
+        return parse_stored(urls, parse)
+
+    urls = {year: url for year, url in urls.items()
+        if not is_fresh(manifest.get(url))}
+    responses = dict(responses or {})
+    missing = [url for url in urls.values() if url not in responses]
+    if missing:
+        responses.update(fetch_pages(missing, manifest))
+
+    parsed = {}
+    failures = {}
+    for year, url in urls.items():
+        response = responses[url]
+        if isinstance(response, Exception):
+            failures[url] = response
+            continue
+        entry = manifest.get(url)
+        content = response.content
+        if has_output(entry) and (response.status_code == 304 or
+            entry['sha1'] == hashlib.sha1(content).hexdigest()):
+            if response.status_code == 200:
+                put_page(url, content)
+            entry['final'] = is_final(year)
+            count('cache_hits')
+            continue
+        if response.status_code == 304:
+            # The saved file is gone, so the unchanged page is parsed again
+            # from the page store.
+            content = get_page(url)
+            if content is None:
+                failures[url] = LookupError(f'{url} is not modified but its '
+                    'file and stored page are missing')
+                continue
+        count('cache_misses')
+        try:
+            parsed[year] = parse(content, year)
+        except PARSE_ERRORS as error:
+            failures[url] = error
+            continue
+        # Only pages that parse are stored, so offline runs never get a
+        # truncated copy back.
+        if response.status_code == 200:
+            put_page(url, content)
+        count('rows', len(parsed[year]))
+        if response.status_code == 304:
+            if entry:
+                entry['final'] = is_final(year)
+        elif output_path is not None:
+            manifest[url] = manifest_entry(response, output_path(year),
+                is_final(year))
+    return parsed, failures
+
+
+@instrumented('scraper')
+def parse_stored(urls, parse):
+    """
+    Parses pages from the page store.
+
+    Args:
+        urls: A dictionary where keys are int years and values are the URLs
+        of the pages.
+        parse: A function taking the page content and the int year and
+        returning the parsed data.
+
+    Returns:
+        A tuple of two dictionaries: the parsed data by year, and errors by
+        URL for the pages that are not in the store or could not be parsed.
+    """
+    parsed = {}
+    failures = {}
+    for year, url in urls.items():
+        content = get_page(url)
+        if content is None:
+            failures[url] = LookupError(f'{url} is not in the page store')
+            continue
+        try:
+            parsed[year] = parse(content, year)
+        except PARSE_ERRORS as error:
+            failures[url] = error
+            continue
+        count('rows', len(parsed[year]))
+    return parsed, failures
+
+
+def read_table(content, table_id=None):
+    """
+    Gets one table from a downloaded page.
+
+    Args:
+        content: The bytes of the page.
+        table_id: An optional string with the id of the table, the first
+        table on the page is used by default.
+
+    Returns:
+        A Pandas data frame with the table, as pd.read_html would return it.
+
+    Raises:
+        ValueError if the page has no such table.
+    """
+    table = extract_table(content, table_id)
+    if table is None:
+        raise ValueError(f"No table with id {table_id} found" if table_id
+            else "No table found")
+    return table
 
 
-def get_shooting_reg_season():
+def parse_shooting(content, year): # pylint: disable=unused-argument
+    """
+    Parses a team shooting table.
+
+    Args:
+        content: The bytes of the downloaded page.
+        year: An int representing the year of data.
+
+    Returns:
+        A Pandas data frame with the table as found on the page.
+    """
+    return read_table(content)
+
+
+@instrumented('scraper')
+def get_shooting_reg_season(years=None, responses=None, manifest=None,
+    offline=False):
     """
     Scrapes 10 seasons of shooting data from basketball-reference.com
     and converts it to CSV format.
 
     Args:
-        None.
+        years: An optional iterable of ints representing the years to
+        scrape, every season by default.
+        responses: An optional dictionary of already downloaded pages.
+        manifest: An optional dictionary as returned by fetch.load_manifest,
+        loaded from and saved to 'Data/manifest.json' by default.
+        offline: A boolean representing whether to parse the pages from the
+        page store instead of downloading them.
 
     Returns:
-        Creates .csv files in folder 'Data'.
+        Creates .csv files in folder 'Data', and returns a dictionary of
+        the URLs that could not be downloaded or parsed.
     """
-    for i in range(10,21):
-        raw_data = get("https://widgets.sports-reference.com/wg.fcgi?css=1&site="+
-            f"bbr&url=%2Fleagues%2FNBA_20{i}.html&div=div_team_shooting")
-        html_parser = BeautifulSoup(raw_data.content, 'html.parser')
-        table_finder = html_parser.find('table')
-        shooting_data_df = pd.read_html(str(table_finder))[0]
-        shooting_data_df.to_csv(f'Data/season_shooting/20{i}.csv')
+    manifest = load_manifest() if manifest is None else manifest
+    tables, failures = scrape_years(lambda year: shooting_url(year, False),
+        parse_shooting, years, responses, manifest,
+        lambda year: f'Data/season_shooting/{year}.csv', offline)
+    for year, shooting_data_df in tables.items():
+        shooting_data_df.to_csv(f'Data/season_shooting/{year}.csv')
+    save_manifest(manifest)
+    return failures
 
 
-def get_shooting_playoffs():
+@instrumented('scraper')
+def get_shooting_playoffs(years=None, responses=None, manifest=None,
+    offline=False):
     """
     Scrapes 10 playoffs of shooting data during playoffs from
     basketball-reference.com and converts it to CSV format.
 
     Args:
-        None.
+        years: An optional iterable of ints representing the years to
+        scrape, every season by default.
+        responses: An optional dictionary of already downloaded pages.
+        manifest: An optional dictionary as returned by fetch.load_manifest,
+        loaded from and saved to 'Data/manifest.json' by default.
+        offline: A boolean representing whether to parse the pages from the
+        page store instead of downloading them.
 
     Returns:
-        Creates .csv files in folder 'Data'.
+        Creates .csv files in folder 'Data', and returns a dictionary of
+        the URLs that could not be downloaded or parsed.
     """
-    for i in range(10,21):
-        raw_data = get("https://widgets.sports-reference.com/wg.fcgi?css=1&" + \
-            f"site=bbr&url=%2Fplayoffs%2FNBA_20{i}.html&div=div_team_shooting")
-        html_parser = BeautifulSoup(raw_data.content, 'html.parser')
-        table_finder = html_parser.find('table')
-        shooting_data_df = pd.read_html(str(table_finder))[0]
-        shooting_data_df.to_csv(f'Data/season_shooting/20{i}p.csv')
+    manifest = load_manifest() if manifest is None else manifest
+    tables, failures = scrape_years(lambda year: shooting_url(year, True),
+        parse_shooting, years, responses, manifest,
+        lambda year: f'Data/season_shooting/{year}p.csv', offline)
+    for year, shooting_data_df in tables.items():
+        shooting_data_df.to_csv(f'Data/season_shooting/{year}p.csv')
+    save_manifest(manifest)
+    return failures
 
 
-def get_win_data():
+def parse_win_data(content, year):
     """
-    Retrieves win-loss record data for a given year and returns a dictionary with
-    team name and win-loss in a tuple.
+    Parses the win-loss record of every team from a season page.
 
     Args:
-        year: An int representing the year of data to receive
+        content: The bytes of the downloaded page.
+        year: An int representing the year of data.
 
     Returns:
         A Pandas data frame where the index is the team name, the first column is
         the number of wins and the second is the number of losses.
     """
-    for i in range(10,21):
-        year = int(f"20{i}")
-        record = {}
-        raw_data = get(f"https://www.basketball-reference.com/leagues/NBA_{year}.html")
-        soup = BeautifulSoup(raw_data.content, 'html.parser')
-
-        if year >= 2016:
-            table_e = soup.find('table', attrs={'id':'confs_standings_E'})
-            table_w = soup.find('table', attrs={'id':'confs_standings_W'})
-            df_e = pd.read_html(str(table_e))[0]
-            df_w = pd.read_html(str(table_w))[0]
-        else:
-            table_e = soup.find('table', attrs={'id':'divs_standings_E'})
-            table_w = soup.find('table', attrs={'id':'divs_standings_W'})
-            df_e = pd.read_html(str(table_e))[0]
-            df_w = pd.read_html(str(table_w))[0]
-        for j in range(0,df_w.shape[0]):
-            key = df_e.iloc[j,0]
-            if key[len(key)-8: len(key)] == "Division":
-                continue
-            record[df_e.iloc[j,0]] = (df_e.iloc[j,1], df_e.iloc[j,2])
-            record[df_w.iloc[j,0]] = (df_w.iloc[j,1], df_w.iloc[j,2])
+    record = {}
+
+    if year >= 2016:
+        df_e = read_table(content, 'confs_standings_E')
+        df_w = read_table(content, 'confs_standings_W')
+    else:
+        df_e = read_table(content, 'divs_standings_E')
+        df_w = read_table(content, 'divs_standings_W')
+    for j in range(0,df_w.shape[0]):
+        key = df_e.iloc[j,0]
+        if key[len(key)-8: len(key)] == "Division":
+            continue
+        record[df_e.iloc[j,0]] = (df_e.iloc[j,1], df_e.iloc[j,2])
+        record[df_w.iloc[j,0]] = (df_w.iloc[j,1], df_w.iloc[j,2])
 
-        if 'New Jersey Nets' in record.keys():
-            record['Brooklyn Nets'] = record.pop('New Jersey Nets')
+    record = dict(sorted(record.items()))
+    record = pd.DataFrame.from_dict(record, orient='index')
+    record.index = record.index.str.replace("*","", regex=False)
+    return record
 
-        record = dict(sorted(record.items()))
-        record = pd.DataFrame.from_dict(record, orient='index')
-        record.index = record.index.str.replace("*","", regex=False)
 
+@instrumented('scraper')
+def get_win_data(years=None, responses=None, manifest=None,
+    offline=False):
+    """
+    Retrieves win-loss record data for every year and saves it to CSV
+    format.
+
+    Args:
+        years: An optional iterable of ints representing the years to
+        scrape, every season by default.
+        responses: An optional dictionary of already downloaded pages.
+        manifest: An optional dictionary as returned by fetch.load_manifest,
+        loaded from and saved to 'Data/manifest.json' by default.
+        offline: A boolean representing whether to parse the pages from the
+        page store instead of downloading them.
+
+    Returns:
+        Creates .csv files in folder 'Data/win-loss', and returns a
+        dictionary of the URLs that could not be downloaded or parsed.
+    """
+    manifest = load_manifest() if manifest is None else manifest
+    records, failures = scrape_years(win_data_url, parse_win_data, years,
+        responses, manifest, lambda year: f'Data/win-loss/all_records_{year}.csv',
+        offline)
+    for year, record in records.items():
         record.to_csv(f'Data/win-loss/all_records_{year}.csv')
+    save_manifest(manifest)
+    return failures
 
 
-def get_playoff_series_won():
+def parse_playoff_series_won(content, year): # pylint: disable=unused-argument
     """
-    Retrieves the number of game series' won by each team for
-    a single year in the playoffs.
+    Parses the number of game series' won by each team from the expanded
+    playoffs standings.
 
     Args:
-        year: An int that represents the year of data to retrieve.
+        content: The bytes of the downloaded page.
+        year: An int representing the year of data.
 
     Returns:
         A Pandas data frame where indices are team names, and the column
         is the number of playoffs series' won.
     """
-    for i in range(10,21):
-        series_results = {}
-        raw_data = get("https://widgets.sports-reference.com/wg.fcgi?css=1&site=bbr&" +
-                        f"url=%2Fplayoffs%2FNBA_20{i}_standings.html&div=div_expanded_standings")
-        soup = BeautifulSoup(raw_data.content, 'html.parser')
-        data = soup.find('table')
-        series_won_df = pd.read_html(str(data))[0]
-        for j in range(0,series_won_df.shape[0]):
-            record = series_won_df.iloc[j,2]
-            dash = record.index('-')
-            series_results[series_won_df.iloc[j,1]] = int(series_won_df.iloc[j,2][0:dash])//4
+    series_results = {}
+    series_won_df = read_table(content)
+    for j in range(0,series_won_df.shape[0]):
+        record = series_won_df.iloc[j,2]
+        dash = record.index('-')
+        series_results[series_won_df.iloc[j,1]] = int(series_won_df.iloc[j,2][0:dash])//4
+
+    series_results = pd.DataFrame.from_dict(series_results, orient='index')
+    series_results.index = series_results.index.str.replace("*","", regex=False)
+    return series_results
+
+
+@instrumented('scraper')
+def get_playoff_series_won(years=None, responses=None, manifest=None,
+    offline=False):
+    """
+    Retrieves the number of game series' won by each team for
+    every year in the playoffs.
+
+    Args:
+        years: An optional iterable of ints representing the years to
+        scrape, every season by default.
+        responses: An optional dictionary of already downloaded pages.
+        manifest: An optional dictionary as returned by fetch.load_manifest,
+        loaded from and saved to 'Data/manifest.json' by default.
+        offline: A boolean representing whether to parse the pages from the
+        page store instead of downloading them.
+
+    Returns:
+        Creates .csv files in folder 'Data/playoffs_outcome', and returns a
+        dictionary of the URLs that could not be downloaded or parsed.
+    """
+    manifest = load_manifest() if manifest is None else manifest
+    results, failures = scrape_years(playoff_series_url,
+        parse_playoff_series_won, years, responses, manifest,
+        lambda year: f'Data/playoffs_outcome/playoffs_{year}.csv', offline)
+    for year, series_results in results.items():
+        series_results.to_csv(f'Data/playoffs_outcome/playoffs_{year}.csv')
+    save_manifest(manifest)
+    return failures
+
+
+def parse_efg(content, year): # pylint: disable=unused-argument
+    """
+    Parses the eFG% of every team from the miscellaneous stats table.
 
-        series_results = pd.DataFrame.from_dict(series_results, orient='index')
-        series_results.index = series_results.index.str.replace("*","", regex=False)
-        series_results.to_csv(f'Data/playoffs_outcome/playoffs_20{i}.csv')
+    Args:
+        content: The bytes of the downloaded page.
+        year: An int representing the year of data.
 
+    Returns:
+        A list of the eFG% values in the order of the table.
+    """
+    efg_df = read_table(content, 'misc_stats')
+    return [efg_df.iloc[j,17] for j in range(0,efg_df.shape[0])]
 
-def get_efg():
+
+@instrumented('scraper')
+def get_efg(years=None, responses=None, manifest=None,
+    offline=False):
     """
     Scrapes eFG% for every team for each of the years
     from basket_reference.com.
 
     Args:
-        None.
+        years: An optional iterable of ints representing the years to
+        scrape, every season by default.
+        responses: An optional dictionary of already downloaded pages.
+        manifest: An optional dictionary as returned by fetch.load_manifest,
+        loaded from and saved to 'Data/manifest.json' by default.
+        offline: A boolean representing whether to parse the pages from the
+        page store instead of downloading them.
 
     Returns:
-        A Pandas data frame where indices are the year of team data collected,
-        and the column is eFG% of that team.
+        Creates 'Data/efg/efg.csv', where indices are the year of team data
+        collected, and the column is eFG% of that team, and returns a
+        dictionary of the URLs that could not be downloaded or parsed. Rows
+        of years that were not downloaded again are kept from the existing
+        file.
 
     Note that team names are not referenced in the data frame.
     """
+    manifest = load_manifest() if manifest is None else manifest
+    seasons, failures = scrape_years(efg_url, parse_efg, years, responses,
+        manifest, lambda year: 'Data/efg/efg.csv', offline)
+    if not seasons:
+        return failures
+
     efg_year = []
     efg = []
-    for i in range(10,21):
-        year = f"20{i}"
-        raw_data = get("https://widgets.sports-reference.com/wg.fcgi?css=1&site=bbr&" +
-                        f"url=%2Fleagues%2FNBA_{year}.html&div=div_misc_stats")
-        soup = BeautifulSoup(raw_data.content, 'html.parser')
-        data = soup.find('table', attrs={'id':'misc_stats'})
-        efg_df = pd.read_html(str(data))[0]
-        for j in range(0,efg_df.shape[0]):
-            efg.append(efg_df.iloc[j,17])
-            efg_year.append(year)
+    for year, season_efg in seasons.items():
+        efg += season_efg
+        efg_year += [str(year)] * len(season_efg)
 
     efg_df_extract = pd.DataFrame(list(zip(efg_year, efg)), columns=['Year', 'eFG%'])
+    if os.path.exists('Data/efg/efg.csv'):
+        efg_df_old = pd.read_csv('Data/efg/efg.csv', index_col=0, dtype={'Year': str})
+        efg_df_old = efg_df_old[~efg_df_old['Year'].isin(efg_year)]
+        efg_df_extract = pd.concat([efg_df_old, efg_df_extract], ignore_index=True)
+        efg_df_extract = efg_df_extract.sort_values('Year', kind='stable',
+            ignore_index=True)
     efg_df_extract.to_csv('Data/efg/efg.csv')
+    save_manifest(manifest)
+    return failures
@@ -0,0 +1,160 @@
+"""
+On-disk cache of cleaned data frames in the Arrow (Feather) format.
+
+Each cached file remembers the modification time, size and hash of the
+scrapped CSV it was built from and the version of the code that built it,
+and is rebuilt as soon as either changes.
+"""
+import os
+import hashlib
+from instrument import count
+
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:
+    pa = None
+
+CACHE_DIR = 'Data/cache'
+
+
+def file_hash(path):
+    """
+    Hashes the contents of a file.
+    Args:
+        path: A string representing the path of the file to hash.
+    Returns:
+        A string with the hex SHA-1 digest of the file.
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_path(source_path, cache_dir=CACHE_DIR):
+    """
+    Gets the path of the cached copy of a source file.
+    Args:
+        source_path: A string representing the path of the scrapped file.
+        cache_dir: A string representing the folder holding cached files.
+    Returns:
+        A string with the path of the Feather file for source_path.
+    """
+    name = os.path.normpath(source_path).replace(os.sep, '__')
+    return os.path.join(cache_dir, os.path.splitext(name)[0] + '.feather')
+
+
+def _source_stamp(source_path):
+    """
+    Gets the modification time and size of a source file.
+    Args:
+        source_path: A string representing the path of the scrapped file.
+    Returns:
+        A dictionary of byte strings to store as Arrow schema metadata.
+    """
+    stat = os.stat(source_path)
+    return {b'mtime_ns': str(stat.st_mtime_ns).encode(),
+        b'size': str(stat.st_size).encode()}
+
+
+def _write_cache(frame, path, metadata):
+    """
+    Writes a data frame to a Feather file, replacing any previous version.
+    Args:
+        frame: A Pandas data frame with a default index.
+        path: A string representing the path to write to.
+        metadata: A dictionary of byte strings describing the source file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), **metadata})
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    feather.write_feather(table, temp_path, compression='uncompressed')
+    os.replace(temp_path, path)
+
+
+def _read_metadata(path):
+    """
+    Reads the Arrow schema metadata of a Feather file without loading it.
+    Args:
+        path: A string representing the path of the Feather file.
+    Returns:
+        A dictionary of byte strings describing the source file.
+    """
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).schema.metadata or {}
+
+
+def _read_cache(path, columns=None):
+    """
+    Reads a Feather file through a memory map.
+    Args:
+        path: A string representing the path of the Feather file.
+        columns: An optional list of column names to read.
+    Returns:
+        A Pandas data frame with the cached data.
+    """
+    return feather.read_feather(path, columns=columns, memory_map=True)
+
+
+def cached_frame(source_path, build, columns=None, cache_dir=CACHE_DIR,
+    version='1'):
+    """
+    Gets the cleaned data frame for a source file, building it only when
+    the cached copy is missing or stale.
+    Args:
+        source_path: A string representing the path of the scrapped file.
+        build: A function with no arguments that reads and cleans
+        source_path into a Pandas data frame with a default index.
+        columns: An optional list of column names to return.
+        cache_dir: A string representing the folder holding cached files.
+        version: A string with the version of build. Change it whenever
+        build returns different data for the same file.
+    Returns:
+        A Pandas data frame with the cleaned data.
+    The cache is considered fresh if it was built by the same version and
+    the modification time and size of the source file match. If only the
+    modification time changed (for example after a git checkout) the
+    contents are hashed, and the cache is reused when the hash still
+    matches. Without pyarrow, build is always called.
+    """
+    if pa is None:
+        count('cache_misses')
+        frame = build()
+        return frame if columns is None else frame[columns]
+
+    path = cache_path(source_path, cache_dir)
+    stamp = _source_stamp(source_path)
+    if os.path.exists(path):
+        metadata = _read_metadata(path)
+        if metadata.get(b'version') == version.encode():
+            if all(metadata.get(key) == value for key, value in stamp.items()):
+                count('cache_hits')
+                return _read_cache(path, columns)
+            if metadata.get(b'sha1') == file_hash(source_path).encode():
+                count('cache_hits')
+                frame = _read_cache(path)
+                _write_cache(frame, path, {**metadata, **stamp})
+                return frame if columns is None else frame[columns]
+
+    count('cache_misses')
+    frame = build().reset_index(drop=True)
+    _write_cache(frame, path, {**stamp, b'version': version.encode(),
+        b'sha1': file_hash(source_path).encode()})
+    return frame if columns is None else frame[columns]
+
+
+def clear_cache(cache_dir=CACHE_DIR):
+    """
+    Deletes every cached Feather file.
+    Args:
+        cache_dir: A string representing the folder holding cached files.
+    """
+    if not os.path.isdir(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        if name.endswith('.feather'):
+            os.remove(os.path.join(cache_dir, name))
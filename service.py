@@ -0,0 +1,370 @@
+"""
+A local HTTP service serving the analyses of data_analysis as JSON.
+
+Run with `python service.py [port]` (8000 by default), then for example
+GET /stat_summary?stat=Field_Goals_3P&playoff=true, or
+GET /team_figure?teams=HOU,BOS for the Plotly figure of interactive_map
+comparing those teams. The season store is
+loaded once at start and kept in memory. Responses are kept in an LRU
+cache per endpoint and parameters, carry an ETag so clients can revalidate
+with If-None-Match and get a 304, and concurrent requests for the same
+response wait for a single computation.
+
+Only the standard library is used: requests are parsed from asyncio
+streams, and analyses run in a worker thread so the event loop keeps
+serving cached responses meanwhile.
+"""
+import sys
+import json
+import asyncio
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qsl
+from franchises import franchise_id
+from figure_specs import figure_spec
+from data_analysis import nba_stat_summary, edge_cases_metric, team_summary, \
+    load_season_store, STAT_NAMES
+
+CACHE_SIZE = 1024
+
+MAX_HEADER_BYTES = 64 * 1024
+
+REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request',
+    404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+def _stat(value):
+    """
+    Parses a stat parameter.
+    Args:
+        value: A string.
+    Returns:
+        The string, if it is a stat in DATA_NAMES.
+    Raises:
+        ValueError otherwise.
+    """
+    if value not in STAT_NAMES:
+        raise ValueError(f'Unknown stat {value}')
+    return value
+
+
+def _boolean(value):
+    """
+    Parses a boolean parameter.
+    Args:
+        value: A string, 'true', 'false', '1' or '0'.
+    Returns:
+        A boolean.
+    Raises:
+        ValueError for other strings.
+    """
+    values = {'true': True, '1': True, 'false': False, '0': False}
+    if value.lower() not in values:
+        raise ValueError(f'Expected true or false, not {value}')
+    return values[value.lower()]
+
+
+def _teams(value):
+    """
+    Parses a comma-separated list of teams.
+    Args:
+        value: A string of team names or abbreviations, like 'HOU,BOS'.
+    Returns:
+        A tuple of strings with the franchise IDs.
+    Raises:
+        KeyError if a team is not found.
+    """
+    return tuple(franchise_id(team) for team in value.split(','))
+
+
+# Every endpoint maps to an analysis function and its parameters, as tuples
+# of the name, the parser and the default value (REQUIRED if there is none).
+REQUIRED = object()
+
+ENDPOINTS = {
+    '/stat_summary': (nba_stat_summary,
+        [('stat', _stat, REQUIRED), ('playoff', _boolean, False)]),
+    '/edge_cases': (edge_cases_metric, [('stat', _stat, REQUIRED)]),
+    '/team_summary': (team_summary,
+        [('team', franchise_id, REQUIRED), ('playoff', _boolean, None)]),
+    '/team_figure': (figure_spec, [('teams', _teams, REQUIRED)]),
+}
+
+
+def parse_arguments(parameters, query):
+    """
+    Gets the arguments of an analysis from a query string.
+    Args:
+        parameters: A list of parameters as in ENDPOINTS.
+        query: A string with the query of the request URL.
+    Returns:
+        A tuple of the parsed arguments, in the order of parameters.
+    Raises:
+        ValueError if a parameter is missing, unknown or invalid.
+    """
+    values = dict(parse_qsl(query, keep_blank_values=True))
+    unknown = set(values) - {name for name, _, _ in parameters}
+    if unknown:
+        raise ValueError(f'Unknown parameters {", ".join(sorted(unknown))}')
+    arguments = []
+    for name, parse, default in parameters:
+        if name in values:
+            try:
+                arguments.append(parse(values[name]))
+            except KeyError as error:
+                raise ValueError(f'Unknown {name} {values[name]}') from error
+        elif default is REQUIRED:
+            raise ValueError(f'Missing parameter {name}')
+        else:
+            arguments.append(default)
+    return tuple(arguments)
+
+
+def to_json(result):
+    """
+    Serializes an analysis result.
+    Args:
+        result: A Pandas dataframe, or a dictionary such as a figure spec.
+    Returns:
+        The bytes of a JSON object. Dataframes have 'columns', 'index' and
+        'data' (one list per row), where missing values are null.
+    """
+    if isinstance(result, dict):
+        return json.dumps(result, separators=(',', ':')).encode()
+    return result.to_json(orient='split', double_precision=10).encode()
+
+
+def make_state(cache_size=CACHE_SIZE):
+    """
+    Creates the state of a service.
+    Args:
+        cache_size: An int representing the number of responses to keep.
+    Returns:
+        A dictionary with the 'cache' of responses (an OrderedDict from
+        least to most recently used), the 'pending' computations, the
+        'executor' running analyses and 'hits' and 'misses' counters.
+    """
+    return {'cache': OrderedDict(), 'cache_size': cache_size, 'pending': {},
+        'executor': ThreadPoolExecutor(max_workers=1), 'hits': 0, 'misses': 0}
+
+
+async def cached_response(state, key, compute):
+    """
+    Gets a response from the cache, or computes it once however many
+    requests ask for it at the same time.
+    Args:
+        state: A dictionary as returned by make_state.
+        key: A hashable identifying the response.
+        compute: A function with no arguments returning the body bytes,
+        run in the state's executor.
+    Returns:
+        A tuple of the quoted ETag string and the body bytes.
+    Raises:
+        Any exception raised by compute, to every waiting request.
+    """
+    cache = state['cache']
+    if key in cache:
+        cache.move_to_end(key)
+        state['hits'] += 1
+        return cache[key]
+    if key in state['pending']:
+        state['hits'] += 1
+        return await asyncio.shield(state['pending'][key])
+
+    state['misses'] += 1
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    state['pending'][key] = future
+    try:
+        body = await loop.run_in_executor(state['executor'], compute)
+        entry = (f'"{hashlib.sha1(body).hexdigest()}"', body)
+        cache[key] = entry
+        while len(cache) > state['cache_size']:
+            cache.popitem(last=False)
+        future.set_result(entry)
+        return entry
+    except Exception as error:
+        future.set_exception(error)
+        # Marks the error as seen when no other request is waiting.
+        future.exception()
+        raise
+    finally:
+        del state['pending'][key]
+
+
+def _error(status, message):
+    """
+    Builds an error response.
+    Args:
+        status: An int with the HTTP status.
+        message: A string describing the error.
+    Returns:
+        A tuple as returned by handle_request.
+    """
+    return status, {}, json.dumps({'error': message}).encode()
+
+
+async def handle_request(state, method, target, headers):
+    """
+    Answers one request.
+    Args:
+        state: A dictionary as returned by make_state.
+        method: A string with the HTTP method.
+        target: A string with the request path and query.
+        headers: A dictionary of lowercase header names to values.
+    Returns:
+        A tuple of the int status, a dictionary of extra headers and the
+        body bytes.
+    """
+    if method not in ('GET', 'HEAD'):
+        return _error(405, f'{method} is not supported')
+    url = urlsplit(target)
+    if url.path not in ENDPOINTS:
+        return _error(404, f'No endpoint {url.path}, try one of '
+            f'{", ".join(ENDPOINTS)}')
+    analysis, parameters = ENDPOINTS[url.path]
+    try:
+        arguments = parse_arguments(parameters, url.query)
+    except ValueError as error:
+        return _error(400, str(error))
+
+    try:
+        etag, body = await cached_response(state, (url.path, arguments),
+            lambda: to_json(analysis(*arguments)))
+    except Exception as error: # pylint: disable=broad-except
+        return _error(500, f'{type(error).__name__}: {error}')
+    extra = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if etag in [tag.strip() for tag in
+        headers.get('if-none-match', '').split(',')]:
+        return 304, extra, b''
+    return 200, extra, body
+
+
+async def read_request(reader):
+    """
+    Reads the request line and headers of one request.
+    Args:
+        reader: An asyncio StreamReader.
+    Returns:
+        A tuple of the method, the target, the HTTP version and a dictionary
+        of lowercase header names to values, or None if the client closed
+        the connection.
+    Raises:
+        ValueError if the request is malformed.
+    """
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as error:
+        if error.partial.strip():
+            raise ValueError('Incomplete request') from error
+        return None
+    except asyncio.LimitOverrunError as error:
+        raise ValueError('Request headers are too large') from error
+    lines = head.decode('latin-1').split('\r\n')
+    parts = lines[0].split(' ')
+    if len(parts) != 3:
+        raise ValueError(f'Malformed request line {lines[0]}')
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+    if int(headers.get('content-length', 0) or 0):
+        await reader.readexactly(int(headers['content-length']))
+    return parts[0], parts[1], parts[2], headers
+
+
+async def handle_connection(state, reader, writer):
+    """
+    Serves the requests of one connection until the client closes it, or
+    asks to with 'Connection: close'.
+    Args:
+        state: A dictionary as returned by make_state.
+        reader: An asyncio StreamReader.
+        writer: An asyncio StreamWriter.
+    """
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+            except ValueError as error:
+                request = None
+                status, extra, body = _error(400, str(error))
+                writer.write(_response(status, extra, body, False, True))
+            if request is None:
+                break
+            method, target, version, headers = request
+            status, extra, body = await handle_request(state, method, target,
+                headers)
+            keep_alive = headers.get('connection', '').lower() != 'close' and \
+                version == 'HTTP/1.1'
+            writer.write(_response(status, extra, body, method == 'HEAD',
+                not keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+def _response(status, extra, body, head_only, close):
+    """
+    Encodes a response.
+    Args:
+        status: An int with the HTTP status.
+        extra: A dictionary of extra headers.
+        body: The body bytes.
+        head_only: A boolean representing whether to leave the body out,
+        for HEAD requests.
+        close: A boolean representing whether the connection is closed
+        after the response.
+    Returns:
+        The bytes of the response.
+    """
+    headers = {'Content-Type': 'application/json',
+        'Content-Length': str(len(body)), **extra,
+        'Connection': 'close' if close else 'keep-alive'}
+    head = f'HTTP/1.1 {status} {REASONS[status]}\r\n' + ''.join(
+        f'{name}: {value}\r\n' for name, value in headers.items()) + '\r\n'
+    return head.encode('latin-1') + (b'' if head_only or status == 304 else body)
+
+
+async def start(host='127.0.0.1', port=8000, cache_size=CACHE_SIZE):
+    """
+    Loads the season store and starts serving.
+    Args:
+        host: A string with the address to listen on.
+        port: An int with the port to listen on, or 0 for any free port.
+        cache_size: An int representing the number of responses to keep.
+    Returns:
+        A tuple of the asyncio Server and the state dictionary.
+    """
+    state = make_state(cache_size)
+    await asyncio.get_running_loop().run_in_executor(state['executor'],
+        load_season_store)
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(state, reader, writer),
+        host, port, limit=MAX_HEADER_BYTES)
+    return server, state
+
+
+async def main(port=8000):
+    """
+    Serves until interrupted.
+    Args:
+        port: An int with the port to listen on.
+    """
+    server, _ = await start(port=port)
+    print(f'Serving {", ".join(ENDPOINTS)} on http://127.0.0.1:{port}')
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 8000))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,249 @@
+"""
+Ingestion of shot-level data into a partitioned Parquet dataset, and the
+shooting splits of DATA_NAMES computed from it.
+
+Shot records are read in chunks and appended to 'Data/shots' in one folder
+per year and franchise, so a season with millions of shots never has to be
+held in memory. The distance buckets are then summed batch by batch, so
+memory only grows with the number of teams and seasons.
+"""
+import os
+import uuid
+import numpy as np
+import pandas as pd
+from franchises import franchise_id
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+SHOTS_DIR = 'Data/shots'
+
+CHUNK_SIZE = 500000
+
+SHOT_COLUMNS = {
+    'year': 'int16',
+    'team': 'string',
+    'game_id': 'string',
+    'loc_x': 'float32',
+    'loc_y': 'float32',
+    'distance': 'float32',
+    'shot_type': 'int8',
+    'made': 'bool',
+}
+
+# Distance buckets of basketball-reference.com, in feet from the hoop for
+# 2 point shots, where BUCKET_EDGES are the lower bounds of all but the first.
+BUCKETS = ['0-3', '3-10', '10-16', '16+', '3P']
+BUCKET_EDGES = [3, 10, 16]
+
+COUNT_COLUMNS = [f'FGA_{bucket}' for bucket in BUCKETS] + \
+    [f'FGM_{bucket}' for bucket in BUCKETS] + ['Distance']
+
+
+def _require_pyarrow():
+    """
+    Checks that pyarrow, which reads and writes the dataset, is installed.
+    Raises:
+        ImportError if pyarrow is missing.
+    """
+    if pa is None:
+        raise ImportError('Shot data needs pyarrow, run `pip install pyarrow`')
+
+
+def read_shot_chunks(path, chunksize=CHUNK_SIZE):
+    """
+    Reads a CSV of shot records in chunks.
+    Args:
+        path: A string representing the path of the CSV, with one row per
+        shot and the columns in SHOT_COLUMNS. 'team' may be any current or
+        historical team name or abbreviation.
+        chunksize: An int representing the number of shots per chunk.
+    Returns:
+        An iterator of Pandas data frames with the columns in SHOT_COLUMNS,
+        where 'team' is the franchise ID.
+    """
+    with pd.read_csv(path, usecols=list(SHOT_COLUMNS), dtype=SHOT_COLUMNS,
+        chunksize=chunksize) as chunks:
+        for chunk in chunks:
+            pairs = pd.MultiIndex.from_frame(chunk[['team', 'year']])
+            teams = pairs.unique()
+            teams = pd.Series([franchise_id(team, year) for team, year in teams],
+                index=teams)
+            chunk['team'] = teams.reindex(pairs).to_numpy()
+            yield chunk
+
+
+def ingest_shots(chunks, dataset_dir=SHOTS_DIR):
+    """
+    Appends shot records to the partitioned dataset.
+    Args:
+        chunks: An iterable of Pandas data frames as returned by
+        read_shot_chunks.
+        dataset_dir: A string representing the folder of the dataset.
+    Returns:
+        A set of tuples of the (year, franchise) partitions written to.
+    """
+    _require_pyarrow()
+    batch_id = uuid.uuid4().hex
+    written = set()
+    for i, chunk in enumerate(chunks):
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        pq.write_to_dataset(table, dataset_dir,
+            partition_cols=['year', 'team'],
+            basename_template=f'{batch_id}-{i}-{{i}}.parquet')
+        written.update((int(year), team) for year, team in
+            chunk[['year', 'team']].drop_duplicates().itertuples(index=False))
+    return written
+
+
+def shot_dataset(dataset_dir=SHOTS_DIR):
+    """
+    Opens the partitioned dataset without reading it.
+    Args:
+        dataset_dir: A string representing the folder of the dataset.
+    Returns:
+        A pyarrow dataset of the shots.
+    """
+    _require_pyarrow()
+    return ds.dataset(dataset_dir, format='parquet', partitioning='hive')
+
+
+def _shot_sums(distance, shot_type, made):
+    """
+    Sums the attempts, makes and distance of every bucket of some shots.
+    Args:
+        distance: A numpy array of the distance of every shot in feet.
+        shot_type: A numpy array of the points of every shot, 2 or 3.
+        made: A numpy array of booleans, True for made shots.
+    Returns:
+        A numpy array ordered like COUNT_COLUMNS.
+    """
+    codes = np.where(shot_type == 3, len(BUCKETS) - 1,
+        np.searchsorted(BUCKET_EDGES, distance, side='right'))
+    attempts = np.bincount(codes, minlength=len(BUCKETS))
+    makes = np.bincount(codes, weights=made, minlength=len(BUCKETS))
+    return np.concatenate([attempts, makes, [distance.sum(dtype=np.float64)]])
+
+
+def _counts_frame(totals):
+    """
+    Builds the bucket counts table from summed partitions.
+    Args:
+        totals: A dictionary where keys are (year, franchise) tuples and
+        values are arrays as returned by _shot_sums.
+    Returns:
+        A Pandas data frame as returned by bucket_counts.
+    """
+    index = pd.MultiIndex.from_tuples(sorted(totals),
+        names=['Year', 'Franchise'])
+    return pd.DataFrame([totals[key] for key in index], index=index,
+        columns=COUNT_COLUMNS)
+
+
+def bucket_counts(shots):
+    """
+    Counts the attempts and makes of every distance bucket of some shots.
+    Args:
+        shots: A Pandas data frame with columns 'year', 'team', 'distance',
+        'shot_type' and 'made'.
+    Returns:
+        A Pandas data frame indexed by (Year, Franchise) with the attempts
+        ('FGA_<bucket>'), makes ('FGM_<bucket>') and summed distance
+        ('Distance') of the shots, for every bucket in BUCKETS.
+    """
+    totals = {}
+    for (year, team), group in shots.groupby(['year', 'team'], sort=False):
+        totals[(int(year), team)] = _shot_sums(group['distance'].to_numpy(),
+            group['shot_type'].to_numpy(), group['made'].to_numpy())
+    return _counts_frame(totals)
+
+
+def shot_counts(dataset_dir=SHOTS_DIR, years=None, teams=None,
+    batch_size=CHUNK_SIZE):
+    """
+    Sums the bucket counts of the dataset one batch at a time.
+    Args:
+        dataset_dir: A string representing the folder of the dataset.
+        years: An optional list of ints of the years to count.
+        teams: An optional list of franchise IDs to count.
+        batch_size: An int representing the maximum number of shots read
+        at once.
+    Returns:
+        A Pandas data frame as returned by bucket_counts, for every
+        (Year, Franchise) partition read.
+    """
+    condition = None
+    if years is not None:
+        condition = ds.field('year').isin([int(year) for year in years])
+    if teams is not None:
+        team_condition = ds.field('team').isin(list(teams))
+        condition = team_condition if condition is None else \
+            condition & team_condition
+
+    totals = {}
+    for fragment in shot_dataset(dataset_dir).get_fragments(filter=condition):
+        keys = ds.get_partition_keys(fragment.partition_expression)
+        key = (int(keys['year']), keys['team'])
+        for batch in fragment.to_batches(batch_size=batch_size,
+            columns=['distance', 'shot_type', 'made']):
+            sums = _shot_sums(*(batch.column(name).to_numpy(zero_copy_only=False)
+                for name in ['distance', 'shot_type', 'made']))
+            totals[key] = totals[key] + sums if key in totals else sums
+    return _counts_frame(totals)
+
+
+def shooting_splits(counts):
+    """
+    Converts bucket counts to the shooting splits of a season file.
+    Args:
+        counts: A Pandas data frame as returned by bucket_counts or
+        shot_counts.
+    Returns:
+        A Pandas data frame with the same index and the stat columns of
+        DATA_NAMES from 'Field_Goal_Percent' to 'Field_Goals_3P': the share
+        of attempts and the field goal percentage of every bucket.
+    """
+    attempts = counts[[f'FGA_{bucket}' for bucket in BUCKETS]].to_numpy(float)
+    makes = counts[[f'FGM_{bucket}' for bucket in BUCKETS]].to_numpy(float)
+    total_attempts = attempts.sum(axis=1)
+    two_attempts = attempts[:, :-1].sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = attempts / total_attempts[:, None]
+        percents = makes / attempts
+        splits = {
+            'Field_Goal_Percent': makes.sum(axis=1) / total_attempts,
+            'Average_Distance': counts['Distance'].to_numpy(float) /
+                total_attempts,
+            'Field_Goals_Attempted_2PA': two_attempts / total_attempts,
+            '2PA_0-3': shares[:, 0],
+            '2PA_3-10': shares[:, 1],
+            '2PA_10-16': shares[:, 2],
+            '2PA_16+': shares[:, 3],
+            'Field_Goals_Attempted_3PA': shares[:, 4],
+            'Field_Goals_2P': makes[:, :-1].sum(axis=1) / two_attempts,
+            '2P_0-3': percents[:, 0],
+            '2P_0-6': percents[:, 1],
+            '2P_10-16': percents[:, 2],
+            '2P16+': percents[:, 3],
+            'Field_Goals_3P': percents[:, 4],
+        }
+    return pd.DataFrame(splits, index=counts.index)
+
+
+def ingest_shot_file(path, dataset_dir=SHOTS_DIR, chunksize=CHUNK_SIZE):
+    """
+    Streams a CSV of shot records into the partitioned dataset.
+    Args:
+        path: A string representing the path of the CSV, see
+        read_shot_chunks.
+        dataset_dir: A string representing the folder of the dataset.
+        chunksize: An int representing the number of shots per chunk.
+    Returns:
+        A set of tuples of the (year, franchise) partitions written to.
+    """
+    os.makedirs(dataset_dir, exist_ok=True)
+    return ingest_shots(read_shot_chunks(path, chunksize), dataset_dir)
@@ -0,0 +1,219 @@
+"""
+Finds the team-seasons that shot like a given team-season, such as the
+teams that shot like the Moreyball Rockets.
+
+A team-season's shot profile is the share of its field goals attempted
+from each distance in SHOT_PROFILE, from at the rim to behind the three
+point line. Profiles are scaled to sum to one, then every distance is
+standardized over all team-seasons so rare shots weigh as much as common
+ones, and the points are kept in a KD-tree (scipy's cKDTree). A k nearest
+neighbours or radius query then costs microseconds and grows with the log
+of the number of team-seasons, and many profiles can be queried at once.
+Neighbours come with their outcomes: the regular season win percentage and
+the number of playoffs series won.
+"""
+import functools
+import numpy as np
+import pandas as pd
+from data_analysis import team_stats, load_win_records, load_playoff_outcomes, \
+    register_cache
+from franchises import franchise_id
+from instrument import instrumented
+
+SHOT_PROFILE = ['2PA_0-3', '2PA_3-10', '2PA_10-16', '2PA_16+',
+    'Field_Goals_Attempted_3PA']
+
+
+def shot_profiles(playoff=False, years=None):
+    """
+    Gets the shot profile of every team-season.
+    Args:
+        playoff: A boolean representing whether to use playoff or regular
+        season stats.
+        years: An optional list of ints of the seasons to get, every
+        scrapped season by default.
+    Returns:
+        A Pandas dataframe indexed by (Year, Franchise) with one column per
+        distance in SHOT_PROFILE, where each row sums to one. Team-seasons
+        missing a distance are left out.
+    """
+    profiles = team_stats(SHOT_PROFILE, playoff, years).astype(np.float64)
+    profiles = profiles.dropna()
+    profiles = profiles[profiles.sum(axis=1) > 0]
+    return profiles.div(profiles.sum(axis=1), axis=0)
+
+
+def standardize(index, profiles):
+    """
+    Scales shot profiles to the points of an index.
+    Args:
+        index: A dictionary as returned by build_index.
+        profiles: A (profile, distance) NumPy array or Pandas dataframe of
+        the attempts from each distance in SHOT_PROFILE, as shares or
+        counts.
+    Returns:
+        A (profile, distance) NumPy array of float64.
+    """
+    profiles = np.asarray(profiles, dtype=np.float64)
+    profiles = profiles / profiles.sum(axis=-1, keepdims=True)
+    return (profiles - index['center']) / index['scale']
+
+
+def build_index(profiles):
+    """
+    Builds a similarity index over shot profiles.
+    Args:
+        profiles: A Pandas dataframe as returned by shot_profiles.
+    Returns:
+        A dictionary with the 'keys' of the team-seasons (the index of
+        profiles), their 'profiles', the 'center' and 'scale' used to
+        standardize them, the KD-'tree' of the standardized points, and the
+        'outcomes', a Pandas dataframe indexed like profiles with columns
+        'Win_Percent' and 'Playoff_Rounds' (NaN for teams that missed the
+        playoffs).
+    """
+    # scipy takes most of a second to import, so only callers pay for it.
+    from scipy.spatial import cKDTree # pylint: disable=import-outside-toplevel
+    values = profiles.to_numpy(np.float64)
+    scale = values.std(axis=0)
+    index = {'keys': profiles.index, 'profiles': profiles,
+        'center': values.mean(axis=0), 'scale': np.where(scale > 0, scale, 1)}
+    index['tree'] = cKDTree(standardize(index, values))
+    index['outcomes'] = pd.DataFrame({
+        'Win_Percent': load_win_records()['Win_Percent'].reindex(profiles.index),
+        'Playoff_Rounds': load_playoff_outcomes().reindex(profiles.index)})
+    return index
+
+
+@register_cache
+@functools.lru_cache(maxsize=None)
+@instrumented('analysis')
+def load_index(playoff=False):
+    """
+    Builds the similarity index of every scrapped team-season once.
+    Args:
+        playoff: A boolean representing whether to use playoff or regular
+        season shot profiles.
+    Returns:
+        A dictionary as returned by build_index, shared by every caller,
+        which must not be modified.
+    Cleared by data_analysis.clear_caches().
+    """
+    return build_index(shot_profiles(playoff))
+
+
+def nearest(index, points, k=5):
+    """
+    Finds the nearest team-seasons of many standardized points at once.
+    Args:
+        index: A dictionary as returned by build_index.
+        points: A (point, distance) NumPy array as returned by standardize.
+        k: An int representing the number of neighbours of each point.
+    Returns:
+        A tuple of two (point, k) NumPy arrays: the distances, closest
+        first, and the positions of the neighbours in index['keys'].
+    """
+    k = min(k, len(index['keys']))
+    distances, positions = index['tree'].query(points, k=[*range(1, k + 1)])
+    return distances, positions
+
+
+def in_radius(index, points, radius):
+    """
+    Finds the team-seasons within a distance of many standardized points
+    at once.
+    Args:
+        index: A dictionary as returned by build_index.
+        points: A (point, distance) NumPy array as returned by standardize.
+        radius: A float with the largest distance, in standard deviations.
+    Returns:
+        A list with, for each point, a NumPy array of the positions of the
+        neighbours in index['keys'].
+    """
+    return [np.asarray(positions, dtype=np.intp) for positions in
+        index['tree'].query_ball_point(points, radius, return_sorted=True)]
+
+
+def _neighbour_frame(index, point, positions):
+    """
+    Describes some team-seasons of an index, closest to a point first.
+    Args:
+        index: A dictionary as returned by build_index.
+        point: A NumPy array of a standardized point.
+        positions: A NumPy array of positions in index['keys'].
+    Returns:
+        A Pandas dataframe indexed by (Year, Franchise) with the 'Distance'
+        to the point, the outcomes and the shot profile.
+    """
+    distances = np.sqrt(((index['tree'].data[positions] - point) ** 2)
+        .sum(axis=1))
+    order = np.argsort(distances, kind='stable')
+    positions = positions[order]
+    frame = pd.concat([index['outcomes'].iloc[positions],
+        index['profiles'].iloc[positions]], axis=1)
+    frame.insert(0, 'Distance', distances[order])
+    return frame
+
+
+def _team_point(index, team, year):
+    """
+    Gets the position and standardized point of a team-season.
+    Args:
+        index: A dictionary as returned by build_index.
+        team: A string with a team name or abbreviation.
+        year: An int with the season.
+    Returns:
+        A tuple of the int position in index['keys'] and the NumPy point.
+    Raises:
+        KeyError if the team or team-season is not found.
+    """
+    position = index['keys'].get_loc((int(year), franchise_id(team)))
+    return position, index['tree'].data[position]
+
+
+@instrumented('analysis')
+def similar_seasons(team, year, k=5, playoff=False):
+    """
+    Finds the team-seasons whose shot profile is the closest to that of a
+    team-season.
+    Args:
+        team: A string with a team name or abbreviation.
+        year: An int with the season.
+        k: An int representing the number of team-seasons to find.
+        playoff: A boolean representing whether to compare playoff or
+        regular season shot profiles.
+    Returns:
+        A Pandas dataframe as returned by _neighbour_frame, with the k
+        closest other team-seasons.
+    Raises:
+        KeyError if the team or team-season is not found.
+    """
+    index = load_index(playoff)
+    position, point = _team_point(index, team, year)
+    positions = nearest(index, point[np.newaxis], k + 1)[1][0]
+    positions = positions[positions != position][:k]
+    return _neighbour_frame(index, point, positions)
+
+
+@instrumented('analysis')
+def seasons_within(team, year, radius, playoff=False):
+    """
+    Finds the team-seasons whose shot profile is within a distance of that
+    of a team-season.
+    Args:
+        team: A string with a team name or abbreviation.
+        year: An int with the season.
+        radius: A float with the largest distance, in standard deviations
+        of each shot distance.
+        playoff: A boolean representing whether to compare playoff or
+        regular season shot profiles.
+    Returns:
+        A Pandas dataframe as returned by _neighbour_frame, with every other
+        team-season within radius.
+    Raises:
+        KeyError if the team or team-season is not found.
+    """
+    index = load_index(playoff)
+    position, point = _team_point(index, team, year)
+    positions = in_radius(index, point[np.newaxis], radius)[0]
+    return _neighbour_frame(index, point, positions[positions != position])
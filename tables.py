@@ -0,0 +1,195 @@
+"""
+Fast extraction of a single HTML table from a downloaded page.
+
+The page is streamed through lxml instead of being built into a full
+BeautifulSoup tree, every element before the table is freed as soon as it
+is parsed, and the rows are put straight in a data frame whose columns
+are then converted to numbers. The result is the same data frame
+pd.read_html would return for the table.
+"""
+import io
+import re
+import pandas as pd
+from lxml import etree
+
+WHITESPACE = re.compile(r'\s+')
+
+# The strings pd.read_html reads as missing values by default.
+NA_VALUES = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN',
+    '-nan', '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None',
+    'n/a', 'nan', 'null'}
+
+
+def _is_hidden(element):
+    """
+    Checks whether an element is hidden with an inline style, which
+    pd.read_html leaves out.
+    Args:
+        element: An lxml element.
+    Returns:
+        A boolean, True if the element has display: none.
+    """
+    return 'display:none' in WHITESPACE.sub('', element.get('style', ''))
+
+
+def _row_texts(rows):
+    """
+    Gets the text of every cell of some table rows, copying the text of
+    cells with colspan or rowspan into every cell they cover.
+    Args:
+        rows: A list of lxml <tr> elements.
+    Returns:
+        A list of rows, each a list of strings.
+    """
+    all_texts = []
+    remainder = []
+    for row in rows:
+        texts = []
+        next_remainder = []
+        index = 0
+        for cell in row:
+            if cell.tag not in ('td', 'th') or _is_hidden(cell):
+                continue
+            while remainder and remainder[0][0] <= index:
+                prev_index, prev_text, prev_rowspan = remainder.pop(0)
+                texts.append(prev_text)
+                if prev_rowspan > 1:
+                    next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+                index += 1
+            text = WHITESPACE.sub(' ', cell.xpath('string()')).strip()
+            rowspan = int(cell.get('rowspan') or 1)
+            for _ in range(int(cell.get('colspan') or 1)):
+                texts.append(text)
+                if rowspan > 1:
+                    next_remainder.append((index, text, rowspan - 1))
+                index += 1
+        for prev_index, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+        all_texts.append(texts)
+        remainder = next_remainder
+
+    while remainder:
+        all_texts.append([text for _, text, _ in remainder])
+        remainder = [(index, text, rowspan - 1)
+            for index, text, rowspan in remainder if rowspan > 1]
+    return all_texts
+
+
+def _section_rows(table, section):
+    """
+    Gets the visible rows of one section of a table.
+    Args:
+        table: An lxml <table> element.
+        section: A string, 'thead', 'tbody' or 'tfoot'.
+    Returns:
+        A list of lxml <tr> elements.
+    """
+    return [row for row in table.xpath(f'./{section}/tr')
+        if not _is_hidden(row)]
+
+
+def table_to_frame(table):
+    """
+    Converts an lxml table element to a data frame the way pd.read_html
+    does, including its header rows, colspan handling and type inference.
+    Args:
+        table: An lxml <table> element.
+    Returns:
+        A Pandas data frame with the table.
+    """
+    head = _section_rows(table, 'thead')
+    body = _section_rows(table, 'tbody') + \
+        [row for row in table.xpath('./tr') if not _is_hidden(row)]
+    foot = _section_rows(table, 'tfoot')
+    if not head:
+        while body and all(cell.tag == 'th' for cell in body[0]
+            if isinstance(cell.tag, str)):
+            head.append(body.pop(0))
+
+    head = _row_texts(head)
+    head = [row for row in head if any(row)] or head
+    rows = _row_texts(body) + _row_texts(foot)
+    width = max((len(row) for row in head + rows), default=0)
+    head = [row + [''] * (width - len(row)) for row in head]
+    rows = [row + [''] * (width - len(row)) for row in rows]
+    frame = pd.DataFrame(rows, columns=_columns(head) if head else None)
+    for position in range(width):
+        frame.isetitem(position, _to_numeric(frame.iloc[:, position]))
+    return frame
+
+
+def _columns(head):
+    """
+    Names the columns of a table from its header rows the way pd.read_html
+    does, with 'Unnamed' names for empty cells and a suffix for duplicates.
+    Args:
+        head: A list of lists of strings, the non-empty header rows, all as
+        wide as the table.
+    Returns:
+        A Pandas index, or multi-index if there are several header rows.
+    """
+    if len(head) == 1:
+        names = [text or f'Unnamed: {i}' for i, text in enumerate(head[0])]
+    else:
+        names = [tuple(text or f'Unnamed: {i}_level_{level}'
+            for level, text in enumerate(texts))
+            for i, texts in enumerate(zip(*head))]
+    seen = {}
+    for i, name in enumerate(names):
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        if count and isinstance(name, tuple):
+            names[i] = name[:-1] + (f'{name[-1]}.{count}',)
+        elif count:
+            names[i] = f'{name}.{count}'
+    if len(head) == 1:
+        return pd.Index(names)
+    return pd.MultiIndex.from_tuples(names)
+
+
+def _to_numeric(column):
+    """
+    Converts a column of cell texts the way pd.read_html does: missing
+    values to NaN, and the whole column to numbers, thousands separators
+    included, if every other text is one.
+    Args:
+        column: A Pandas series of strings.
+    Returns:
+        A Pandas series of numbers, or of strings and NaN.
+    """
+    column = column.mask(column.isin(NA_VALUES))
+    try:
+        return pd.to_numeric(column.str.replace(',', '', regex=False))
+    except (ValueError, TypeError):
+        return column
+
+
+def extract_table(content, table_id=None):
+    """
+    Streams a page and gets one table from it.
+    Args:
+        content: The bytes of the page.
+        table_id: An optional string with the id of the table to get. The
+        first table on the page is used if it is None.
+    Returns:
+        A Pandas data frame with the table, or None if the page has no
+        such table.
+    """
+    target = None
+    events = etree.iterparse(io.BytesIO(content), events=('start', 'end'),
+        html=True, recover=True, huge_tree=True)
+    for event, element in events:
+        if event == 'start':
+            if target is None and element.tag == 'table' and \
+                (table_id is None or element.get('id') == table_id):
+                target = element
+        elif element is target:
+            return table_to_frame(target)
+        elif target is None:
+            # Everything that ends before the table starts is done with.
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+    return None
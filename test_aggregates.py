@@ -0,0 +1,78 @@
+"""
+Tests of the incremental aggregates.
+"""
+import numpy as np
+import pandas as pd
+from aggregates import (
+    empty_state,
+    apply_deltas,
+    shot_deltas,
+    game_deltas,
+    save_state,
+    load_state,
+    stat_summary,
+    DERIVED
+)
+
+TEAMS = ['ATL', 'BOS', 'BRK', 'CHI', 'DAL', 'DEN', 'HOU', 'LAL', 'MIA',
+    'Golden State Warriors', 'New Jersey Nets', 'Detroit Pistons']
+
+OUTCOMES = pd.Series([4, 3, 2, 0, 4, 1], index=pd.MultiIndex.from_tuples(
+    [(2019, 'BOS'), (2019, 'HOU'), (2019, 'MIA'), (2019, 'DEN'),
+    (2020, 'LAL'), (2020, 'DAL')], names=['Year', 'Franchise']))
+
+
+def random_shots(rng, year, count):
+    """
+    Creates random shots of one season.
+    """
+    shots = pd.DataFrame({'year': year, 'team': rng.choice(TEAMS[:9], count),
+        'distance': rng.integers(0, 30, count).astype(float)})
+    shots['shot_type'] = np.where(shots['distance'] >= 23, 3, 2)
+    shots['made'] = rng.random(count) < 0.45
+    return shots
+
+
+def random_games(rng, year, count):
+    """
+    Creates random game results of one season.
+    """
+    return pd.DataFrame({'year': year, 'team': rng.choice(TEAMS, count),
+        'won': rng.random(count) < 0.5})
+
+
+def test_apply_deltas(tmp_path):
+    """
+    Tests that applying games and seasons one at a time gives the same
+    tables as applying them all at once, and only recomputes the seasons
+    they touch.
+    """
+    rng = np.random.default_rng(0)
+    deltas = [shot_deltas(random_shots(rng, 2019, 2000)),
+        game_deltas(random_games(rng, 2019, 300)),
+        shot_deltas(random_shots(rng, 2020, 2000)),
+        game_deltas(random_games(rng, 2020, 300)),
+        shot_deltas(random_shots(rng, 2019, 500))]
+
+    state = empty_state()
+    for delta in deltas[:4]:
+        state, _ = apply_deltas(state, delta, OUTCOMES)
+    edge_cases_2020 = state['edge_cases'].loc['2020'].copy()
+    state['edge_cases'].loc['2020'] = 99
+    state, years = apply_deltas(state, deltas[4], OUTCOMES)
+    assert years == [2019]
+    assert (state['edge_cases'].loc['2020'] == 99).all()
+    state['edge_cases'].loc['2020'] = edge_cases_2020
+
+    full, _ = apply_deltas(empty_state(),
+        pd.concat(deltas).groupby(level=['Year', 'Franchise']).sum(), OUTCOMES)
+    for name in ['counts'] + DERIVED:
+        pd.testing.assert_frame_equal(state[name], full[name])
+    assert state['counts'].loc[(2019, 'BRK'), 'Wins'] == \
+        full['counts'].loc[(2019, 'BRK'), 'Wins']
+    assert list(stat_summary(state, 'Field_Goals_3P').columns) == ['2019', '2020']
+
+    save_state(state, str(tmp_path / 'aggregates.pkl'))
+    pd.testing.assert_frame_equal(
+        load_state(str(tmp_path / 'aggregates.pkl'))['splits'], state['splits'])
+    assert load_state(str(tmp_path / 'missing.pkl'))['splits'] is None
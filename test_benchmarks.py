@@ -0,0 +1,263 @@
+"""
+Benchmarks for the analysis hot paths and the scraper parsers, with time
+measured by pytest-benchmark and peak memory saved in each benchmark's
+extra info. See benchmarks.py for how to compare runs.
+
+They take about a minute, so they are skipped unless pytest is run with
+--benchmark-only, which leaves them out of the regular test run.
+"""
+import tracemalloc
+import pytest
+pytest.importorskip('pytest_benchmark')
+# pylint: disable=wrong-import-position
+import data_analysis
+import scraper
+from data_analysis import (
+    season_full_data,
+    nba_stat_summary,
+    team_summary,
+    edge_cases_metric,
+    edge_cases_matrix,
+    playoff_round_3p,
+    playoff_round_stats,
+    win_compare_r_squared,
+    win_correlations,
+    load_season_store,
+    clear_caches
+)
+from tables import extract_table
+from resampling import win_r_squared_test
+from similarity import load_index, nearest, similar_seasons
+from benchmarks import (
+    shooting_page,
+    win_data_page,
+    playoff_series_page,
+    efg_page,
+    large_table_page,
+    synthetic_data,
+    import_times,
+    IMPORT_BUDGETS,
+    LAZY_IMPORTS
+)
+
+
+def run(benchmark, function, *args, setup=None, rounds=None):
+    """
+    Benchmarks a function, after measuring its peak memory once.
+    Args:
+        benchmark: The pytest-benchmark fixture.
+        function: The function to measure.
+        args: The arguments to call the function with.
+        setup: An optional function called before every call, outside the
+        measured time, to measure cold calls.
+        rounds: An optional int representing the number of calls to
+        measure, for slow functions. Calibrated by pytest-benchmark if
+        None and there is no setup.
+    Returns:
+        The return value of the function.
+    """
+    if setup:
+        setup()
+    tracemalloc.start()
+    function(*args)
+    benchmark.extra_info['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    if setup or rounds:
+        return benchmark.pedantic(function, args, setup=setup,
+            rounds=rounds or 5)
+    return benchmark(function, *args)
+
+
+@pytest.fixture(name='benchmarks_only', scope='module', autouse=True)
+def fixture_benchmarks_only(request):
+    """
+    Skips the benchmarks unless pytest was run with --benchmark-only.
+    """
+    if not request.config.getoption('benchmark_only'):
+        pytest.skip('benchmarks only run with --benchmark-only')
+
+
+@pytest.fixture(name='warm')
+def fixture_warm():
+    """
+    Loads the scrapped data in memory before a benchmark.
+    """
+    clear_caches()
+    load_season_store()
+
+
+@pytest.fixture(name='synthetic', scope='module')
+def fixture_synthetic(tmp_path_factory):
+    """
+    Writes a synthetic scrapped data folder of 100 seasons.
+    """
+    root = tmp_path_factory.mktemp('synthetic')
+    return root, synthetic_data(str(root), seasons=100)
+
+
+@pytest.fixture(name='in_synthetic')
+def fixture_in_synthetic(synthetic, monkeypatch):
+    """
+    Runs a benchmark from inside the synthetic data folder.
+    """
+    root, years = synthetic
+    monkeypatch.chdir(root)
+    clear_caches()
+    yield years
+    clear_caches()
+
+
+def test_bench_load_season_store_cold(benchmark):
+    """
+    Loading every season from the Feather cache.
+    """
+    store = run(benchmark, load_season_store, setup=clear_caches)
+    assert len(store) > 0
+
+
+def test_bench_season_full_data(benchmark, warm):
+    """
+    Looking up one season.
+    """
+    assert run(benchmark, season_full_data, 2015, False).shape[0] == 30
+
+
+def test_bench_nba_stat_summary(benchmark, warm):
+    """
+    Pivoting one stat over every season.
+    """
+    assert run(benchmark, nba_stat_summary, 'Field_Goals_3P', False).shape[0] == 30
+
+
+def test_bench_team_summary(benchmark, warm):
+    """
+    Looking up every season of one team.
+    """
+    assert run(benchmark, team_summary, 'Houston Rockets').shape[0] > 11
+
+
+def test_bench_edge_cases_metric(benchmark, warm):
+    """
+    Computing the edge case metric of one stat.
+    """
+    assert run(benchmark, edge_cases_metric, 'Field_Goals_3P').shape[0] == 11
+
+
+def test_bench_playoff_round_3p(benchmark, warm):
+    """
+    Averaging the 3 point stats of one playoffs by round.
+    """
+    assert len(run(benchmark, playoff_round_3p, 2015, True)) == 5
+
+
+def test_bench_playoff_round_stats(benchmark, warm):
+    """
+    Averaging every stat of every season by round.
+    """
+    assert run(benchmark, playoff_round_stats).shape[1] == 16
+
+
+def test_bench_win_compare_r_squared(benchmark, warm):
+    """
+    Computing the R^2 of one stat against the win percentage.
+    """
+    assert len(run(benchmark, win_compare_r_squared, 'Field_Goals_3P')) == 11
+
+
+def test_bench_win_r_squared_test(benchmark, warm):
+    """
+    Bootstrapping and permuting the R^2 of every stat, 10000 times each.
+    """
+    assert run(benchmark, win_r_squared_test, rounds=1).shape[0] == 11
+
+
+@pytest.mark.parametrize('module', list(IMPORT_BUDGETS))
+def test_bench_import_time(benchmark, module):
+    """
+    Importing a module in a fresh interpreter, which must stay within its
+    budget on top of pandas and not load the plotting libraries or scipy.
+    """
+    times = run(benchmark, import_times, module, rounds=3)
+    benchmark.extra_info['import_s'] = times[module]
+    assert times[module] - times['pandas'] <= IMPORT_BUDGETS[module]
+    assert not [name for name in LAZY_IMPORTS if name in times]
+
+
+@pytest.mark.parametrize('parse, page, year', [
+    (scraper.parse_shooting, lambda year: shooting_page(year, False, 200), 2015),
+    (scraper.parse_win_data, win_data_page, 2015),
+    (scraper.parse_win_data, win_data_page, 2018),
+    (scraper.parse_playoff_series_won, playoff_series_page, 2015),
+    (scraper.parse_efg, efg_page, 2015),
+], ids=['shooting', 'win_data_divisions', 'win_data_conferences',
+    'playoff_series', 'efg'])
+def test_bench_parse(benchmark, parse, page, year):
+    """
+    Parsing a downloaded page.
+    """
+    assert len(run(benchmark, parse, page(year), year)) > 0
+
+
+def test_bench_extract_large_table(benchmark):
+    """
+    Extracting a play-by-play sized table.
+    """
+    content = large_table_page(20000)
+    assert run(benchmark, extract_table, content, 'large',
+        rounds=3).shape == (20000, 12)
+
+
+def test_bench_synthetic_load(benchmark, in_synthetic):
+    """
+    Loading 100 seasons without a warm Feather cache.
+    """
+    store = run(benchmark, load_season_store, setup=clear_caches, rounds=3)
+    assert store.index.get_level_values('Year').nunique() == len(in_synthetic)
+
+
+def test_bench_synthetic_edge_cases(benchmark, in_synthetic):
+    """
+    Computing the edge case metric of every stat over 100 seasons.
+    """
+    load_season_store()
+    matrix = run(benchmark, edge_cases_matrix)
+    assert matrix.shape[0] == len(in_synthetic)
+
+
+def test_bench_synthetic_win_correlations(benchmark, in_synthetic):
+    """
+    Computing the win correlations of every stat over 100 seasons.
+    """
+    load_season_store()
+    correlations = run(benchmark, win_correlations)
+    assert correlations.shape[0] == len(in_synthetic)
+
+
+def test_bench_synthetic_team_summary(benchmark, in_synthetic):
+    """
+    Looking up every season of one team over 100 seasons, with the season
+    store in memory.
+    """
+    load_season_store()
+    summary = run(benchmark, team_summary, 'Boston Celtics',
+        setup=data_analysis._team_summary.cache_clear) # pylint: disable=protected-access
+    assert summary.shape[0] >= len(in_synthetic)
+
+
+def test_bench_similar_seasons(benchmark, warm):
+    """
+    Finding the team-seasons that shot the most like the 2018 Rockets.
+    """
+    load_index()
+    assert len(run(benchmark, similar_seasons, 'HOU', 2018)) == 5
+
+
+def test_bench_synthetic_similarity(benchmark, in_synthetic):
+    """
+    Querying the 10 nearest shot profiles of one team-season out of 100
+    seasons of teams.
+    """
+    index = load_index()
+    assert len(index['keys']) == 30 * len(in_synthetic)
+    point = index['tree'].data[:1]
+    assert run(benchmark, nearest, index, point, 10)[1].shape == (1, 10)
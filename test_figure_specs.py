@@ -0,0 +1,80 @@
+"""
+Tests of the precomputed interactive_map figure specs.
+"""
+import json
+import numpy as np
+import pytest
+import data_analysis
+import figure_specs
+from data_analysis import team_summary, clear_caches, STAT_NAMES
+from figure_specs import encode_array, decode_array, load_specs, figure_spec
+
+
+@pytest.fixture(name='figure_path', autouse=True)
+def fixture_figure_path(tmp_path, monkeypatch):
+    """
+    Keeps the figure specs written during the tests out of the real cache.
+    """
+    path = str(tmp_path / 'figures.json')
+    monkeypatch.setattr(figure_specs, 'FIGURE_PATH', path)
+    load_specs.cache_clear()
+    yield path
+    load_specs.cache_clear()
+
+
+def test_encode_array():
+    """
+    Tests that typed arrays round trip, missing values included.
+    """
+    spec = encode_array([1.5, np.nan, 3])
+    assert spec['dtype'] == 'f4' and isinstance(spec['bdata'], str)
+    assert np.array_equal(decode_array(spec), [1.5, np.nan, 3], equal_nan=True)
+    assert decode_array(encode_array([2010, 2011], 'i2')).tolist() == [2010, 2011]
+
+
+def test_load_specs(figure_path, monkeypatch):
+    """
+    Tests that the specs hold the team summaries, are written once, are
+    rebuilt when they are stale and are dropped by clear_caches.
+    """
+    specs = load_specs()
+    assert len(specs['teams']) == 30 and specs['stats'] == STAT_NAMES
+    axis = specs['axis']
+    seasons = np.arange(axis['length']) * axis['dx'] + axis['x0']
+    for playoff, season_type in [(False, 'season'), (True, 'playoffs')]:
+        expected = team_summary('HOU', playoff)['Field_Goals_3P']
+        stored = decode_array(specs['teams']['HOU'][season_type][
+            STAT_NAMES.index('Field_Goals_3P')])
+        assert len(stored) == len(seasons)
+        assert np.allclose(stored[~np.isnan(stored)], expected)
+    with open(figure_path, encoding='utf-8') as file:
+        assert json.load(file) == specs
+
+    with open(figure_path, 'w', encoding='utf-8') as file:
+        json.dump({**specs, 'stats': []}, file)
+    assert load_specs() is specs
+    clear_caches()
+    assert load_specs()['stats'] == []
+
+    monkeypatch.setattr(figure_specs, 'CLEAN_VERSION',
+        data_analysis.CLEAN_VERSION + '+1')
+    clear_caches()
+    assert load_specs()['stats'] == STAT_NAMES
+
+
+def test_figure_spec():
+    """
+    Tests that compared teams share the season axis and that each dropdown
+    button carries the arrays of its stat.
+    """
+    spec = figure_spec(['Houston Rockets', 'GSW'])
+    assert len(spec['data']) == 4
+    assert all('x' not in trace for trace in spec['data'])
+    assert len({(trace['x0'], trace['dx']) for trace in spec['data']}) == 1
+    buttons = spec['layout']['updatemenus'][0]['buttons']
+    assert [button['label'] for button in buttons] == STAT_NAMES
+    assert [trace['y'] for trace in spec['data']] == buttons[0]['args'][0]['y']
+    specs = load_specs()
+    assert buttons[3]['args'][0]['y'][3] == specs['teams']['GSW']['playoffs'][3]
+    with pytest.raises(KeyError):
+        figure_spec('Nowhere')
@@ -1,11 +1,39 @@
 """
 PyTest Functions
 """
+import os
+import pytest
+import pandas as pd
+from scipy import stats
+import data_analysis
+from season_cache import cached_frame
+from franchises import franchise_id
 from data_analysis import (
     season_full_data,
     season_summary,
     edge_cases_metric,
+    edge_cases_matrix,
+    win_correlations,
+    win_compare_r_squared,
+    win_stat_frame,
+    win_stat_pairs,
+    load_win_records,
+    team_summary,
     playoff_round_3p,
+    playoff_round_stats,
+    load_playoff_outcomes,
+    franchise_keys,
+    load_season_store,
+    load_league_averages,
+    query,
+    season_partitions,
+    nba_stat_summary,
+    clear_caches,
+    apply_schema,
+    memory_report,
+    DATA_TYPES,
+    LEAGUE_AVERAGE,
+    STAT_NAMES,
     YEARS_LIST
 )
 
@@ -31,15 +59,35 @@ def test_playoff_round_3p():
     data is formatted the same and will be consistent with the
     results of this test.
     """
-    assert playoff_round_3p(2019, True) == \
-    {0: [.35725, .323125], 1: [0.38525, 0.346],\
-         2: [0.397, 0.348], 3: [0.38, 0.37200000000000005],\
-            4: [0.406, 0.34600000000000003]}
+    expected = {
+        (2019, True): {0: [.35725, .323125], 1: [0.38525, 0.346],
+            2: [0.397, 0.348], 3: [0.38, 0.372], 4: [0.406, 0.346]},
+        (2018, False): {0: [0.307625, 0.361], 1: [0.34925, 0.36375],
+            2: [0.4295, 0.3695], 3: [0.379, 0.372], 4: [0.339, 0.391]},
+    }
+    # Stats are stored as float32, so averages match to about 7 digits.
+    for (year, playoff), rounds in expected.items():
+        result = playoff_round_3p(year, playoff)
+        assert list(result) == list(rounds)
+        for playoff_round, values in rounds.items():
+            assert result[playoff_round] == pytest.approx(values, rel=1e-6)
 
-    assert playoff_round_3p(2018, False) == \
-    {0: [0.307625, 0.361], 1: [0.34925, 0.36375], \
-        2: [0.4295, 0.36950000000000005], 3: [0.379, 0.37200000000000005],\
-            4: [0.33899999999999997, 0.391]}
+
+def test_playoff_round_stats():
+    """
+    Tests that averaging every season at once matches averaging each
+    season's teams by playoffs outcome.
+    """
+    table = playoff_round_stats(['Field_Goals_3P', 'Average_Distance'], True)
+    assert list(table.index.names) == ['Year', 'Round']
+    assert list(table.columns) == ['Field_Goals_3P', 'Average_Distance']
+    outcomes = load_playoff_outcomes().loc[2016]
+    teams = season_full_data(2016, True).set_index(
+        franchise_keys(season_full_data(2016, True)['Team']))
+    champion = outcomes[outcomes == 4].index[0]
+    assert table.loc[(2016, 4), 'Field_Goals_3P'] == \
+        teams.loc[champion, 'Field_Goals_3P']
+    assert set(table.loc[2016].index) == set(outcomes)
 
 
 def test_edge_case():
@@ -71,3 +119,215 @@ def test_get_season_clean_csv():
 
         test_df = season_full_data(years, True)
         assert test_df.isnull().values.any() == condition
+
+
+def test_load_season_store():
+    """
+    Tests that the season store holds every season once, keyed by year,
+    season type and team, and that lookups return the stored values.
+    """
+    store = load_season_store()
+    assert list(store.index.names) == ['Year', 'Playoff', 'Franchise']
+    assert load_season_store() is store
+    assert store.loc[(2010, False)].shape[0] == 30
+    assert store.loc[(2010, True)].shape[0] == 16
+    assert LEAGUE_AVERAGE not in store.index.get_level_values('Franchise')
+    assert list(season_full_data(2010, False)['Team']) == \
+        list(store.loc[(2010, False), 'Team'])
+
+
+def test_season_schema():
+    """
+    Tests that the season tables are typed as declared in DATA_TYPES, and
+    that the schema takes less memory than float64 and string columns.
+    """
+    store = load_season_store()
+    assert dict(store.dtypes.astype(str)) == \
+        {column: DATA_TYPES[column] for column in store.columns}
+    assert set(load_league_averages().dtypes.astype(str)) == {'float32'}
+    assert str(season_full_data(2010, False)['Rank'].dtype) == 'int8'
+    with pytest.raises(ValueError):
+        apply_schema(pd.DataFrame({'Games_Played': [10.8]}))
+    report = memory_report()
+    assert list(report.index) == ['season_store', 'league_averages']
+    assert (report['ratio'] > 1).all()
+
+
+def test_cached_frame(tmp_path):
+    """
+    Tests that the Feather cache is only rebuilt when the contents of the
+    source file or the version of the build change, and not when only the
+    modification time changes.
+    """
+    source = tmp_path / 'season.csv'
+    source.write_text('Team,3PA\nBoston,0.3\n')
+    builds = []
+
+    def build():
+        builds.append(1)
+        return pd.read_csv(source)
+
+    for _ in range(2):
+        frame = cached_frame(str(source), build, cache_dir=str(tmp_path))
+    assert len(builds) == 1
+    assert frame['3PA'].tolist() == [0.3]
+
+    os.utime(source, ns=(0, 0))
+    cached_frame(str(source), build, cache_dir=str(tmp_path))
+    assert len(builds) == 1
+
+    source.write_text('Team,3PA\nBoston,0.4\n')
+    frame = cached_frame(str(source), build, ['3PA'], str(tmp_path))
+    assert len(builds) == 2
+    assert frame['3PA'].tolist() == [0.4]
+
+    cached_frame(str(source), build, cache_dir=str(tmp_path))
+    cached_frame(str(source), build, cache_dir=str(tmp_path), version='2')
+    assert len(builds) == 3
+    cached_frame(str(source), build, cache_dir=str(tmp_path), version='2')
+    assert len(builds) == 3
+
+
+def test_edge_cases_matrix():
+    """
+    Tests that the edge case matrix agrees with edge_cases_metric for every
+    stat, and that k changes how many teams count as edge cases.
+    """
+    matrix = edge_cases_matrix(['Field_Goals_3P', 'Field_Goals_Attempted_3PA'])
+    assert matrix.loc['2013', ('Edge Case Metric',
+        'Field_Goals_Attempted_3PA')] == 3
+    assert matrix.loc['2011', ('All Edge Cases', 'Field_Goals_3P')] == 3
+
+    full = edge_cases_matrix()
+    assert full.shape == (len(YEARS_LIST), 2 * 16)
+    assert (edge_cases_matrix(k=15)['All Edge Cases'] ==
+        edge_cases_matrix(k=30)['All Edge Cases'] / 2).all().all()
+
+
+def test_win_correlations():
+    """
+    Tests the batch correlations against scipy for one season, and that
+    win_compare_r_squared is a slice of them.
+    """
+    correlations = win_correlations()
+    wins = load_win_records().loc[2015, 'Win_Percent']
+    threes = load_season_store().loc[(2015, False), 'Field_Goals_3P']
+    threes = threes.reindex(wins.index)
+    pearson = stats.pearsonr(wins, threes)
+    spearman = stats.spearmanr(wins, threes)
+    season = correlations.loc['2015']
+    assert round(season[('Pearson', 'Field_Goals_3P')], 10) == \
+        round(pearson[0], 10)
+    assert round(season[('Pearson p-value', 'Field_Goals_3P')], 10) == \
+        round(pearson[1], 10)
+    assert round(season[('Spearman', 'Field_Goals_3P')], 10) == \
+        round(spearman[0], 10)
+    assert round(season[('Spearman p-value', 'Field_Goals_3P')], 10) == \
+        round(spearman[1], 10)
+    assert list(win_compare_r_squared('Field_Goals_3P')) == YEARS_LIST
+
+
+def test_franchise_keys():
+    """
+    Tests that renamed franchises and abbreviations share one key, so that
+    tables are joined by team rather than by row position, and that the
+    Charlotte Hornets before 2002 are the franchise now in New Orleans.
+    """
+    assert franchise_id('New Jersey Nets*') == franchise_id('Brooklyn Nets')
+    assert franchise_id('Charlotte Bobcats') == franchise_id('CHA')
+    assert franchise_id('New Orleans Hornets') == 'NOP'
+    assert franchise_id('Charlotte Hornets*', 1998) == franchise_id('CHH') == 'NOP'
+    assert franchise_id('Charlotte Hornets', 2015) == 'CHO'
+    hornets = pd.Series(['Charlotte Hornets', 'Charlotte Hornets*'])
+    assert franchise_keys(hornets, pd.Series([2001, 2016])).tolist() == \
+        ['NOP', 'CHO']
+    assert franchise_keys(hornets, 2002).tolist() == ['NOP', 'NOP']
+    nets = team_summary('Brooklyn Nets', playoff=False)
+    assert list(nets.index) == YEARS_LIST
+    assert nets.equals(team_summary('New Jersey Nets', playoff=False))
+    records = load_win_records()
+    assert records.loc[(2010, 'BRK'), 'Wins'] == 12
+    assert records.loc[(2015, 'CHO'), 'Team'] == 'Charlotte Hornets'
+
+
+def test_team_summary():
+    """
+    Tests that team_summary covers the regular season and playoffs of a
+    team, matches the season tables, and cannot be changed by callers.
+    """
+    celtics = team_summary('Boston Celtics')
+    assert list(celtics.index[:2]) == ['2010', '2010p']
+    assert list(celtics.columns) == ['Rank'] + STAT_NAMES
+    season = season_full_data(2010, True)
+    row = season[season['Team'] == 'Boston Celtics'].iloc[0]
+    assert list(celtics.loc['2010p', STAT_NAMES]) == list(row[STAT_NAMES])
+    playoffs = team_summary('BOS', playoff=True)
+    assert all(name.endswith('p') for name in playoffs.index)
+    playoffs.loc[:, 'Games_Played'] = 0.0
+    assert team_summary('BOS', playoff=True)['Games_Played'].ne(0.0).all()
+
+
+def test_query():
+    """
+    Tests that queries read only the files they need when the season
+    store is not loaded, and return the same rows as the loaded store.
+    """
+    selection = query().seasons(2014, 2016).teams('HOU', 'Boston Celtics') \
+        .stats(['Field_Goals_3P']).playoff(True)
+    assert selection.partitions() == [(2014, True), (2015, True), (2016, True)]
+    clear_caches()
+    from_disk = selection.collect()
+    assert list(from_disk.columns) == ['Team', 'Field_Goals_3P']
+    assert set(from_disk.index.get_level_values('Franchise')) <= {'HOU', 'BOS'}
+    assert set(from_disk.index.get_level_values('Year')) <= {2014, 2015, 2016}
+    load_season_store()
+    pd.testing.assert_frame_equal(selection.collect(), from_disk)
+    assert query().seasons([2012]).playoff(False).collect().shape == \
+        (30, 1 + len(STAT_NAMES))
+
+
+def test_season_loads(monkeypatch):
+    """
+    Tests that analyses of the whole store read every season file once,
+    however many of them run.
+    """
+    clear_caches()
+    loads = []
+    load_season = data_analysis.load_season
+    monkeypatch.setattr(data_analysis, 'load_season',
+        lambda *args: loads.append(args) or load_season(*args))
+    for _ in range(2):
+        for stat in ['Field_Goals_3P', 'Field_Goals_Attempted_3PA', '2P16+']:
+            nba_stat_summary(stat, True)
+            edge_cases_metric(stat)
+            win_compare_r_squared(stat)
+        playoff_round_stats()
+    assert len(loads) == len(season_partitions())
+
+
+def test_league_averages():
+    """
+    Tests that the league average table has every season and season type
+    and that season summaries are slices of it.
+    """
+    averages = load_league_averages()
+    assert averages.shape == (2 * len(YEARS_LIST), len(STAT_NAMES))
+    summary = season_summary(2015, True)
+    assert list(summary['Team']) == [LEAGUE_AVERAGE]
+    assert list(summary[STAT_NAMES].iloc[0]) == list(averages.loc[(2015, True)])
+
+
+def test_win_stat_pairs():
+    """
+    Tests that win/stat pairs match the single season join, in the order
+    they were requested.
+    """
+    pairs = [(2019, 'Field_Goals_3P'), (2012, 'Games_Played'),
+        (2019, 'Games_Played')]
+    scatter = win_stat_pairs(pairs)
+    assert list(scatter.index.droplevel('Franchise').unique()) == pairs
+    season = win_stat_frame(['Games_Played'], years=[2012]).loc[2012]
+    pair = scatter.loc[(2012, 'Games_Played')]
+    assert list(pair['Value']) == list(season['Games_Played'])
+    assert list(pair['Win_Percent']) == list(season['Win_Percent'])
+    assert win_stat_frame(['Field_Goals_3P']).shape[0] == 330
@@ -0,0 +1,64 @@
+"""
+Tests of the headless rendering of graphs.
+"""
+import os
+import pytest
+from matplotlib.figure import Figure
+import plotly.graph_objects as go
+import figure_specs
+from graphs import (
+    render,
+    render_catalog,
+    chart_jobs,
+    team_summary_visual,
+    edge_case_graph,
+    playoffs_versus_season,
+    win_compare_many,
+    interactive_map
+)
+
+
+@pytest.fixture(autouse=True)
+def fixture_figure_path(tmp_path, monkeypatch):
+    """
+    Keeps the figure specs written during the tests out of the real cache.
+    """
+    monkeypatch.setattr(figure_specs, 'FIGURE_PATH',
+        str(tmp_path / 'figures.json'))
+    figure_specs.load_specs.cache_clear()
+    yield
+    figure_specs.load_specs.cache_clear()
+
+
+def test_render(tmp_path):
+    """
+    Tests that plots are drawn on new figures and written in every format.
+    """
+    fig = render(team_summary_visual, 'Boston Celtics', 'Field_Goals_3P', True)
+    assert isinstance(fig, Figure)
+    assert len(fig.axes[0].lines[0].get_xdata()) > 0
+    assert len(render(playoffs_versus_season).axes) == 4
+    fig = render(win_compare_many, [(2019, 'Field_Goals_3P'), (2015, '2P16+')],
+        False)
+    assert [len(axes.collections[0].get_offsets()) for axes in fig.axes] == [30, 30]
+    for extension in ['png', 'svg', 'html']:
+        path = tmp_path / f'edge.{extension}'
+        render(edge_case_graph, 'Field_Goals_3P', path=str(path))
+        assert path.stat().st_size > 0
+    fig = render(interactive_map, 'HOU', path=str(tmp_path / 'map.html'))
+    assert isinstance(fig, go.Figure)
+    assert len(render(interactive_map, ['HOU', 'BOS']).data) == 4
+    with pytest.raises(ValueError):
+        render(interactive_map, 'HOU', path=str(tmp_path / 'map.png'))
+
+
+def test_render_catalog(tmp_path):
+    """
+    Tests that the catalog is rendered across processes.
+    """
+    jobs = chart_jobs(str(tmp_path), ['BOS', 'HOU'], ['Field_Goals_3P'])
+    paths = render_catalog(str(tmp_path), ['BOS', 'HOU'], ['Field_Goals_3P'],
+        max_workers=2)
+    assert paths == [path for _, _, path in jobs]
+    assert all(os.path.getsize(path) > 0 for path in paths)
+    assert os.path.exists(tmp_path / 'teams' / 'HOU' / 'Field_Goals_3P_playoffs.png')
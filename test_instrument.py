@@ -0,0 +1,76 @@
+"""
+Tests of the timing and profiling instrumentation.
+"""
+import json
+import pytest
+import pandas as pd
+import instrument
+from instrument import span, count
+from data_analysis import team_summary, clear_caches
+
+
+@pytest.fixture(name='recording')
+def fixture_recording():
+    """
+    Stops recording after a test, even if it fails.
+    """
+    yield
+    instrument.disable()
+
+
+def test_span(recording):
+    """
+    Tests that spans are only recorded when enabled, and that counters add
+    up into the spans that contain them.
+    """
+    with span('outer', 'test') as counters:
+        assert counters is None
+    assert instrument.trace() == []
+
+    instrument.enable(memory=True)
+    with span('outer', 'test'):
+        count('rows', 2)
+        with span('inner', 'test') as counters:
+            counters['bytes'] = 10
+            count('rows', 3)
+            payload = list(range(100000))
+    del payload
+    inner, outer = instrument.trace()
+    assert (inner['name'], inner['parent'], inner['depth']) == ('inner', 'outer', 1)
+    assert (inner['rows'], inner['bytes']) == (3, 10)
+    assert (outer['rows'], outer['bytes']) == (5, 10)
+    assert outer['wall_s'] >= inner['wall_s']
+    assert outer['peak_mb'] >= inner['peak_mb'] > 1
+    assert instrument.disable() == [inner, outer]
+    assert instrument.trace() == []
+
+
+def test_instrumented(recording, tmp_path):
+    """
+    Tests that analysis calls are recorded with their cache counters, and
+    that the trace and profiles can be exported.
+    """
+    instrument.enable(profile=['analysis'])
+    clear_caches()
+    team_summary('Boston Celtics', playoff=True)
+    names = [record['name'] for record in instrument.trace()]
+    assert names[-1] == 'data_analysis.team_summary'
+    assert 'data_analysis.load_season' in names
+    last = instrument.trace()[-1]
+    assert last['cache_hits'] + last['cache_misses'] == \
+        names.count('data_analysis.load_season')
+
+    totals = instrument.summary()
+    assert totals.loc['data_analysis.team_summary', 'calls'] == 1
+    assert instrument.profile_stats('analysis').total_calls > 0
+    assert instrument.profile_stats('graphs') is None
+    assert instrument.write_profiles(str(tmp_path)) == \
+        [str(tmp_path / 'analysis.prof')]
+
+    instrument.write_trace(str(tmp_path / 'trace.json'))
+    instrument.write_trace(str(tmp_path / 'trace.csv'))
+    with open(tmp_path / 'trace.json', encoding='utf-8') as file:
+        assert json.load(file) == instrument.trace()
+    assert list(pd.read_csv(tmp_path / 'trace.csv')['name']) == names
+    with pytest.raises(ValueError):
+        instrument.write_trace(str(tmp_path / 'trace.txt'))
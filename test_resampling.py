@@ -0,0 +1,64 @@
+"""
+Tests of the bootstrap and permutation engine.
+"""
+import numpy as np
+from data_analysis import (
+    edge_cases_matrix,
+    win_correlations,
+    win_stat_frame,
+    season_arrays,
+    STAT_NAMES
+)
+from resampling import (
+    resample,
+    r_squared,
+    edge_cases_test,
+    win_r_squared_test,
+    playoff_round_test,
+    _replicate
+)
+
+
+def test_estimates():
+    """
+    Tests that the statistics of the data match the analysis functions.
+    """
+    r_squared_test = win_r_squared_test(replicates=200, max_workers=1)
+    assert np.allclose(r_squared_test['Estimate'].to_numpy(),
+        win_correlations()['R^2'].to_numpy(), equal_nan=True)
+    edge_test = edge_cases_test(replicates=200, max_workers=1)
+    assert (edge_test['Estimate'].to_numpy() ==
+        edge_cases_matrix()['Edge Case Metric'].to_numpy()).all()
+    round_test = playoff_round_test(['Field_Goals_3P'], True, replicates=200,
+        max_workers=1)
+    assert list(round_test.index) == [0, 1, 2, 3, 4]
+    estimate = round_test['Estimate']['Field_Goals_3P']
+    assert ((round_test['CI Low']['Field_Goals_3P'] <= estimate) &
+        (estimate <= round_test['CI High']['Field_Goals_3P'])).all()
+    assert round_test['p-value'].gt(0).all().all()
+
+
+def test_resample():
+    """
+    Tests that replicates only depend on the seed, not on the number of
+    processes, and that replicates stay within each season's teams.
+    """
+    _, arrays = season_arrays(win_stat_frame(STAT_NAMES[2:5], True))
+    serial = resample(arrays, r_squared, replicates=1100, seed=7, max_workers=1)
+    parallel = resample(arrays, r_squared, replicates=1100, seed=7, max_workers=2)
+    assert serial.shape == (1100,) + r_squared(arrays).shape
+    assert np.array_equal(serial, parallel, equal_nan=True)
+    assert not np.array_equal(serial,
+        resample(arrays, r_squared, replicates=1100, seed=8, max_workers=1),
+        equal_nan=True)
+
+    rng = np.random.default_rng(0)
+    permuted = _replicate(arrays, 'permutation', 3, rng)
+    assert np.array_equal(np.sort(permuted[..., 0], axis=-1),
+        np.broadcast_to(np.sort(arrays[..., 0], axis=-1), permuted.shape[:-1]),
+        equal_nan=True)
+    drawn = _replicate(arrays, 'bootstrap', 3, rng)
+    assert np.array_equal(np.isnan(drawn), np.broadcast_to(np.isnan(arrays),
+        drawn.shape))
+    for season in range(arrays.shape[0]):
+        assert np.isin(drawn[:, season, :, 0], arrays[season, :, 0]).all()
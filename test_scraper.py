@@ -0,0 +1,340 @@
+"""
+PyTest Functions for the scraper, run against a local stand-in server.
+"""
+import os
+import json
+import time
+import datetime
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import pandas as pd
+import page_store
+import scraper
+from benchmarks import shooting_page, legacy_extract
+from tables import extract_table
+from fetch import fetch_all
+from page_store import put_page, get_page, evict, load_index
+from scraper import scrape_years, parse_shooting, season_years, is_final
+
+TABLE_PAGE = b"""<html><body><table id="team_shooting">
+<thead><tr><th>Team</th><th>3P</th></tr></thead>
+<tbody><tr><td>Boston Celtics</td><td>0.348</td></tr></tbody>
+</table></body></html>"""
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Serves canned responses and records how it was called.
+    """
+    protocol_version = 'HTTP/1.1'
+    calls = {}
+    in_flight = 0
+    max_in_flight = 0
+    ports = set()
+    lock = threading.Lock()
+
+    def do_GET(self): # pylint: disable=invalid-name
+        """
+        Answers a GET request based on its path.
+        """
+        cls = type(self)
+        with cls.lock:
+            cls.calls[self.path] = cls.calls.get(self.path, 0) + 1
+            cls.ports.add(self.client_address[1])
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+            count = cls.calls[self.path]
+        try:
+            if self.path.startswith('/slow'):
+                time.sleep(0.05)
+            if self.path.startswith('/flaky') and count < 3:
+                self.reply(503, b'busy')
+            elif self.path.startswith('/limited') and count < 2:
+                self.reply(429, b'slow down', {'Retry-After': '0'})
+            elif self.path.startswith('/closed'):
+                self.reply(503, b'come back tomorrow', {'Retry-After': '86400'})
+            elif self.path.startswith('/etag'):
+                if self.headers.get('If-None-Match') == '"v1"':
+                    self.reply(304, b'')
+                else:
+                    self.reply(200, TABLE_PAGE, {'ETag': '"v1"'})
+            elif self.path.startswith('/truncated'):
+                self.reply(200, TABLE_PAGE[:20])
+            elif self.path.startswith('/empty'):
+                self.reply(200, b'')
+            elif self.path.startswith('/missing'):
+                self.reply(404, b'not found')
+            else:
+                self.reply(200, TABLE_PAGE)
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def reply(self, status, body, headers=None):
+        """
+        Sends a complete response.
+        """
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args): # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture(autouse=True)
+def fixture_page_store(tmp_path, monkeypatch):
+    """
+    Keeps pages downloaded during the tests out of the real page store.
+    """
+    monkeypatch.setattr(page_store, 'STORE_DIR', str(tmp_path / 'pages'))
+
+
+@pytest.fixture(name='server')
+def fixture_server():
+    """
+    Starts the stand-in server and resets its counters.
+    """
+    StandInHandler.calls = {}
+    StandInHandler.ports = set()
+    StandInHandler.max_in_flight = 0
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fetch_all_retries(server):
+    """
+    Tests that server errors and rate limits are retried, that a page
+    asking to wait too long is given up on, and that a page that keeps
+    failing does not stop the others from being downloaded.
+    """
+    urls = [f'{server}/flaky', f'{server}/limited', f'{server}/missing',
+        f'{server}/closed']
+    start = time.perf_counter()
+    responses = fetch_all(urls, backoff=0)
+    assert time.perf_counter() - start < 10
+    assert responses[urls[0]].status_code == 200
+    assert responses[urls[1]].status_code == 200
+    assert isinstance(responses[urls[2]], Exception)
+    assert isinstance(responses[urls[3]], Exception)
+    assert StandInHandler.calls == {'/flaky': 3, '/limited': 2, '/missing': 1,
+        '/closed': 1}
+
+
+def test_fetch_all_limits_hosts(server):
+    """
+    Tests that no more than max_per_host requests are in flight at once,
+    and that connections are reused.
+    """
+    urls = [f'{server}/slow/{i}' for i in range(12)]
+    responses = fetch_all(urls, max_workers=6, max_per_host=2)
+    assert all(response.status_code == 200 for response in responses.values())
+    assert StandInHandler.max_in_flight <= 2
+    assert len(StandInHandler.ports) < len(urls)
+
+
+def test_scrape_years(server):
+    """
+    Tests that scrape_years parses the pages it could download and reports
+    the ones it could not download or parse.
+    """
+    def url_for_year(year):
+        paths = {2012: 'missing', 2013: 'truncated', 2014: 'empty'}
+        return f'{server}/{paths.get(year, year)}'
+
+    tables, failures = scrape_years(url_for_year, parse_shooting,
+        [2010, 2011, 2012, 2013, 2014])
+    assert sorted(tables) == [2010, 2011]
+    assert sorted(failures) == [f'{server}/{path}'
+        for path in ['empty', 'missing', 'truncated']]
+    assert isinstance(failures[f'{server}/truncated'], ValueError)
+    assert get_page(f'{server}/truncated') is None
+    assert get_page(f'{server}/2010') == TABLE_PAGE
+    assert tables[2010].iloc[0, 1] == 0.348
+
+
+def test_scrape_years_incremental(server, tmp_path):
+    """
+    Tests that final seasons already on disk are not requested again, and
+    that other seasons are requested conditionally and not parsed again
+    when the server reports them unchanged.
+    """
+    manifest = {}
+    current = max(season_years())
+
+    def url_for_year(year):
+        return f'{server}/etag/{year}'
+
+    def output_path(year):
+        return str(tmp_path / f'{year}.csv')
+
+    tables, _ = scrape_years(url_for_year, parse_shooting, [2010, current],
+        manifest=manifest, output_path=output_path)
+    for year, table in tables.items():
+        table.to_csv(output_path(year))
+    assert sorted(tables) == [2010, current]
+    assert manifest[url_for_year(2010)]['final']
+    assert manifest[url_for_year(current)]['etag'] == '"v1"'
+
+    tables, _ = scrape_years(url_for_year, parse_shooting, [2010, current],
+        manifest=manifest, output_path=output_path)
+    assert not tables
+    assert StandInHandler.calls == {'/etag/2010': 1, f'/etag/{current}': 2}
+
+
+def test_scrape_years_deleted_output(server, tmp_path):
+    """
+    Tests that a page whose saved file was deleted is parsed again, both
+    when it is requested again and when the server reports it unchanged.
+    """
+    manifest = {}
+    current = max(season_years())
+
+    def url_for_year(year):
+        return f'{server}/etag/{year}'
+
+    def output_path(year):
+        return str(tmp_path / f'{year}.csv')
+
+    tables, _ = scrape_years(url_for_year, parse_shooting, [2010, current],
+        manifest=manifest, output_path=output_path)
+    for year, table in tables.items():
+        table.to_csv(output_path(year))
+    os.remove(output_path(current))
+    tables, _ = scrape_years(url_for_year, parse_shooting, [current],
+        manifest=manifest, output_path=output_path)
+    assert list(tables) == [current]
+    assert StandInHandler.calls[f'/etag/{current}'] == 2
+
+    responses = fetch_all([url_for_year(current)],
+        headers={url_for_year(current): {'If-None-Match': '"v1"'}})
+    assert responses[url_for_year(current)].status_code == 304
+    tables, failures = scrape_years(url_for_year, parse_shooting, [current],
+        responses, manifest, output_path)
+    assert not failures and tables[current].iloc[0, 1] == 0.348
+    tables[current].to_csv(output_path(current))
+    tables, _ = scrape_years(url_for_year, parse_shooting, [current],
+        responses, manifest, output_path)
+    assert not tables
+
+
+def test_season_years():
+    """
+    Tests that the year range follows the calendar instead of being fixed.
+    """
+    assert max(season_years(last_year=2030)) == 2030
+    assert not is_final(2021, datetime.date(2021, 7, 1))
+    assert is_final(2021, datetime.date(2021, 11, 1))
+
+
+def test_page_store(tmp_path):
+    """
+    Tests that pages are stored once per content and that the least
+    recently used pages are evicted first.
+    """
+    store_dir = str(tmp_path / 'store')
+    put_page('a', b'x' * 1000, store_dir)
+    put_page('b', b'x' * 1000, store_dir)
+    assert get_page('b', store_dir) == b'x' * 1000
+    assert len(set(load_index(store_dir).values())) == 1
+
+    put_page('c', b'y' * 1000, store_dir)
+    time.sleep(0.01)
+    get_page('a', store_dir)
+    evicted = evict(100, store_dir)
+    assert len(evicted) == 1
+    assert get_page('c', store_dir) is None
+    assert get_page('a', store_dir) == b'x' * 1000
+
+
+def test_page_store_evicts_over_cap(tmp_path, monkeypatch):
+    """
+    Tests that the store keeps its size in the index and only walks the
+    store to evict pages once it grows past its cap.
+    """
+    store_dir = str(tmp_path / 'store')
+    evictions = []
+    monkeypatch.setattr(page_store, 'evict',
+        lambda *args: evictions.append(args) or evict(*args))
+    for page in range(20):
+        put_page(str(page), str(page).encode() * 100, store_dir, 1000)
+    sizes = [os.path.getsize(os.path.join(folder, name))
+        for folder, _, names in os.walk(tmp_path / 'store' / 'objects')
+        for name in names]
+    with open(tmp_path / 'store' / 'index.json', encoding='utf-8') as index:
+        assert json.load(index)['bytes'] == sum(sizes) <= 1000
+    assert 0 < len(evictions) < 20
+
+
+def test_scrape_years_offline(server):
+    """
+    Tests that downloaded pages can be parsed again without the network.
+    """
+    def url_for_year(year):
+        return f'{server}/{year}'
+
+    scrape_years(url_for_year, parse_shooting, [2010])
+    tables, failures = scrape_years(url_for_year, parse_shooting,
+        [2010, 2011], offline=True)
+    assert StandInHandler.calls == {'/2010': 1}
+    assert tables[2010].iloc[0, 0] == 'Boston Celtics'
+    assert list(failures) == [f'{server}/2011']
+
+
+def test_run_scraper_report(monkeypatch, capsys):
+    """
+    Tests that offline runs count the pages missing from the page store
+    apart from the pages that failed to parse.
+    """
+    failures = {'a': LookupError('a is not in the page store'),
+        'b': ValueError('No table found')}
+    for name in ['get_shooting_playoffs', 'get_shooting_reg_season',
+        'get_win_data', 'get_playoff_series_won', 'get_efg']:
+        monkeypatch.setattr(scraper, name, lambda *args: failures)
+    assert scraper.run_scraper([2010], offline=True) == failures
+    output = capsys.readouterr().out
+    assert '1 pages are not in the page store' in output
+    assert 'Failed to scrape b: No table found' in output
+    assert 'Failed to scrape a' not in output
+
+
+def test_extract_table():
+    """
+    Tests that extract_table returns the same data frame as the previous
+    BeautifulSoup and pd.read_html path, including multi-level headers,
+    colspan, rowspan and hidden cells.
+    """
+    page = shooting_page(2019, True, padding=3)
+    pd.testing.assert_frame_equal(extract_table(page, 'team_shooting'),
+        legacy_extract(page, 'team_shooting'))
+    pd.testing.assert_frame_equal(extract_table(page),
+        legacy_extract(page))
+
+    standings = b"""<html><body><table id="divs_standings_E">
+    <tr><th>Eastern Conference</th><th>W</th><th>L</th></tr>
+    <tr class="thead"><th colspan="3">Atlantic Division</th></tr>
+    <tr><td rowspan="2"><a href="#">Boston Celtics*</a></td><td>1,050</td>
+    <td style="display: none">9</td><td>32</td></tr>
+    <tr><td>40</td><td>42</td></tr></table></body></html>"""
+    pd.testing.assert_frame_equal(extract_table(standings, 'divs_standings_E'),
+        legacy_extract(standings, 'divs_standings_E'))
+    assert extract_table(standings, 'misc_stats') is None
+
+
+def test_parse_shooting():
+    """
+    Tests that parsing a shooting page gives back the table saved in the
+    scrapped CSV.
+    """
+    saved = pd.read_csv('Data/season_shooting/2015.csv', header=[0, 1, 2],
+        index_col=0)
+    parsed = parse_shooting(shooting_page(2015, False), 2015)
+    pd.testing.assert_frame_equal(parsed, saved, check_dtype=False)
@@ -0,0 +1,119 @@
+"""
+Tests of the analytics HTTP service.
+"""
+import json
+import time
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+import figure_specs
+from data_analysis import nba_stat_summary
+from service import start, make_state, cached_response
+
+
+@pytest.fixture(autouse=True)
+def fixture_figure_path(tmp_path, monkeypatch):
+    """
+    Keeps the figure specs written during the tests out of the real cache.
+    """
+    monkeypatch.setattr(figure_specs, 'FIGURE_PATH',
+        str(tmp_path / 'figures.json'))
+    figure_specs.load_specs.cache_clear()
+    yield
+    figure_specs.load_specs.cache_clear()
+
+
+async def get(port, target, headers=None):
+    """
+    Sends one GET request on a new connection.
+    Args:
+        port: An int with the port of the service.
+        target: A string with the path and query.
+        headers: An optional dictionary of extra headers.
+    Returns:
+        A tuple of the int status, a dictionary of lowercase header names to
+        values and the body bytes.
+    """
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    lines = [f'GET {target} HTTP/1.1', 'Host: localhost', 'Connection: close']
+    lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode())
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    head = head.decode().split('\r\n')
+    response_headers = dict(line.split(': ', 1) for line in head[1:])
+    return int(head[0].split(' ')[1]), \
+        {name.lower(): value for name, value in response_headers.items()}, body
+
+
+def test_service():
+    """
+    Tests the endpoints, errors and ETag revalidation.
+    """
+    async def run():
+        server, state = await start(port=0, cache_size=2)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            target = '/stat_summary?stat=Field_Goals_3P&playoff=true'
+            status, headers, body = await get(port, target)
+            assert status == 200
+            expected = nba_stat_summary('Field_Goals_3P', True)
+            served = pd.DataFrame(**json.loads(body))
+            assert list(served.index) == list(expected.index)
+            assert np.allclose(served.to_numpy(float), expected.to_numpy(float),
+                equal_nan=True)
+
+            status, again, _ = await get(port, target,
+                {'If-None-Match': headers['etag']})
+            assert (status, again['etag']) == (304, headers['etag'])
+            assert (state['hits'], state['misses']) == (1, 1)
+
+            status, _, body = await get(port, '/team_summary?team=Boston+Celtics')
+            assert status == 200 and '2010p' in json.loads(body)['index']
+            status, _, body = await get(port, '/team_figure?teams=HOU,BOS')
+            assert status == 200 and len(json.loads(body)['data']) == 4
+            await get(port, '/edge_cases?stat=Field_Goals_3P')
+            assert len(state['cache']) == 2
+            assert ('/stat_summary', ('Field_Goals_3P', True)) not in state['cache']
+
+            for target, status in [('/nothing', 404),
+                ('/edge_cases', 400), ('/edge_cases?stat=Height', 400),
+                ('/team_summary?team=Nowhere', 400),
+                ('/team_figure?teams=HOU,Nowhere', 400),
+                ('/edge_cases?stat=Field_Goals_3P&year=2010', 400)]:
+                assert (await get(port, target))[0] == status
+
+    asyncio.run(run())
+
+
+def test_coalescing():
+    """
+    Tests that concurrent requests for the same key compute it once, and
+    that errors reach every waiting request without being cached.
+    """
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return b'{}'
+
+    def fail():
+        calls.append(1)
+        time.sleep(0.05)
+        raise KeyError('missing')
+
+    async def run():
+        state = make_state()
+        entries = await asyncio.gather(*[cached_response(state, 'key', compute)
+            for _ in range(10)])
+        assert len(calls) == 1 and len(set(entries)) == 1
+        results = await asyncio.gather(*[cached_response(state, 'bad', fail)
+            for _ in range(3)], return_exceptions=True)
+        assert len(calls) == 2
+        assert all(isinstance(result, KeyError) for result in results)
+        assert 'bad' not in state['cache'] and not state['pending']
+
+    asyncio.run(run())
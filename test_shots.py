@@ -0,0 +1,71 @@
+"""
+Tests of the shot-level ingestion.
+"""
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from shots import (
+    ingest_shot_file,
+    shot_counts,
+    bucket_counts,
+    shooting_splits,
+    SHOT_COLUMNS
+)
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture(name='shot_file')
+def fixture_shot_file(tmp_path):
+    """
+    Writes a CSV of random shots by three teams over two seasons.
+    """
+    rng = np.random.default_rng(0)
+    count = 5000
+    shots = pd.DataFrame({
+        'year': rng.choice([2019, 2020], count),
+        'team': rng.choice(['Houston Rockets', 'HOU', 'New Jersey Nets',
+            'Boston Celtics'], count),
+        'game_id': 'game',
+        'loc_x': rng.normal(size=count).round(1),
+        'loc_y': rng.normal(size=count).round(1),
+        'distance': rng.integers(0, 30, count),
+    })
+    shots['shot_type'] = np.where(shots['distance'] >= 23, 3, 2)
+    shots['made'] = rng.random(count) < 0.45
+    shots[list(SHOT_COLUMNS)].to_csv(tmp_path / 'shots.csv', index=False)
+    return tmp_path / 'shots.csv', shots
+
+
+def test_ingest_shots(tmp_path, shot_file):
+    """
+    Tests that shots are partitioned by year and franchise, and that
+    counting the dataset in batches matches counting every shot at once.
+    """
+    path, shots = shot_file
+    dataset = str(tmp_path / 'shots')
+    written = ingest_shot_file(str(path), dataset, chunksize=700)
+    assert written == {(year, team) for year in [2019, 2020]
+        for team in ['BOS', 'BRK', 'HOU']}
+    assert sorted(os.listdir(os.path.join(dataset, 'year=2019'))) == \
+        ['team=BOS', 'team=BRK', 'team=HOU']
+
+    counts = shot_counts(dataset, batch_size=300)
+    shots['team'] = shots['team'].replace({'Houston Rockets': 'HOU',
+        'New Jersey Nets': 'BRK', 'Boston Celtics': 'BOS'})
+    assert counts.equals(bucket_counts(shots).sort_index())
+    assert counts['FGA_3P'].sum() == (shots['shot_type'] == 3).sum()
+    assert counts['FGA_0-3'].sum() == (shots['distance'] < 3).sum()
+    assert counts['FGA_16+'].sum() == shots['distance'].between(16, 22).sum()
+    assert shot_counts(dataset, years=[2020], teams=['BRK']).shape[0] == 1
+    assert shot_counts(dataset, years=[1990]).empty
+
+    splits = shooting_splits(counts)
+    hou = shots[(shots['year'] == 2019) & (shots['team'] == 'HOU')]
+    assert splits.loc[(2019, 'HOU'), 'Field_Goals_Attempted_3PA'] == \
+        pytest.approx((hou['shot_type'] == 3).mean())
+    assert splits.loc[(2019, 'HOU'), 'Field_Goal_Percent'] == \
+        pytest.approx(hou['made'].mean())
+    assert splits.loc[(2019, 'HOU'), 'Average_Distance'] == \
+        pytest.approx(hou['distance'].mean())
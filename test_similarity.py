@@ -0,0 +1,66 @@
+"""
+Tests of the shot profile similarity search.
+"""
+import numpy as np
+import pytest
+from data_analysis import load_win_records, load_playoff_outcomes, clear_caches
+from similarity import shot_profiles, load_index, standardize, nearest, \
+    in_radius, similar_seasons, seasons_within, SHOT_PROFILE
+
+
+def test_shot_profiles():
+    """
+    Tests that every profile is a share of the attempts of each distance.
+    """
+    profiles = shot_profiles(years=[2018])
+    assert list(profiles.columns) == SHOT_PROFILE and len(profiles) == 30
+    assert np.allclose(profiles.sum(axis=1), 1)
+
+
+def test_queries_match_brute_force():
+    """
+    Tests that the k nearest and radius queries of many points at once
+    find the same team-seasons as comparing every pair of points.
+    """
+    index = load_index()
+    points = standardize(index, index['profiles'].iloc[:20])
+    distances = np.sqrt(((points[:, np.newaxis] - index['tree'].data) ** 2)
+        .sum(axis=-1))
+    found, positions = nearest(index, points, 4)
+    assert positions.shape == (20, 4) and (positions[:, 0] == np.arange(20)).all()
+    assert np.allclose(found, np.sort(distances, axis=1)[:, :4])
+    for row, within in enumerate(in_radius(index, points, 1.5)):
+        assert set(within) == set(np.flatnonzero(distances[row] <= 1.5))
+
+
+def test_similar_seasons():
+    """
+    Tests that the neighbours of a team-season leave it out, are sorted by
+    distance and carry their outcomes.
+    """
+    neighbours = similar_seasons('Houston Rockets', 2018, k=10)
+    assert len(neighbours) == 10 and (2018, 'HOU') not in neighbours.index
+    assert neighbours['Distance'].is_monotonic_increasing
+    wins = load_win_records()['Win_Percent']
+    assert np.allclose(neighbours['Win_Percent'], wins[neighbours.index])
+    rounds = load_playoff_outcomes().reindex(neighbours.index)
+    assert neighbours['Playoff_Rounds'].equals(rounds.rename('Playoff_Rounds'))
+
+    radius = neighbours['Distance'].iloc[4]
+    within = seasons_within('HOU', 2018, radius)
+    assert list(within.index) == list(neighbours.index[:len(within)])
+    assert len(within) >= 5 and (within['Distance'] <= radius).all()
+    assert len(similar_seasons('HOU', 2018, playoff=True)) == 5
+    with pytest.raises(KeyError):
+        similar_seasons('HOU', 1950)
+
+
+def test_clear_caches():
+    """
+    Tests that clear_caches drops the index, so it is rebuilt from the
+    reloaded seasons.
+    """
+    index = load_index()
+    assert load_index() is index
+    clear_caches()
+    assert load_index() is not index